@@ -8,13 +8,37 @@ This package provides tools to fetch:
 It includes custom exceptions for error handling related to API communication and data parsing.
 
 Main components:
+- `client.py`: Async client owning the session, base URLs and optional shared cache, rate limiter and metrics.
 - `data_fetcher.py`: Contains functions to fetch data from API endpoints.
 - `sensors.py`: Defines sensor classes for parsing specific sensor data types.
+- `timezone.py`: Precomputed Europe/Madrid DST table for fast local-to-UTC conversion.
+- `executors.py`: Inline, thread or process pool parsing strategies with automatic size thresholds.
+- `columns.py`: Columnar series buffers with NumPy, Arrow and pandas exports.
+- `resample.py`: Gap detection and regular-grid resampling with NaN, forward-fill or linear filling.
+- `correlation.py`: Rain-to-flow lagged cross-correlation for many sensor pairs, FFT-batched with NumPy and cached per pair.
+- `quality.py`: Per-sample quality flags (range, spike, stuck value, rate of change) over columnar series.
+- `series.py`: Sorted series that merges overlapping polling windows in linear time.
+- `archive.py`: Compressed, month-partitioned columnar archive of sensor series.
+- `backfill.py`: Resumable parallel historical backfill of every catalog variable.
+- `catalog.py`: Columnar station catalog with an on-disk snapshot for instant cold starts.
+- `cassette.py`: Record-and-replay session for offline tests and benchmarks.
+- `metrics.py`: Catalog-wide reservoir fill ratios, storage deltas and per-subcuenca storage, cached per refresh.
+- `basins.py`: Per sub-basin (subcuenca) aggregates computed from concurrent sensor fetches.
+- `geo.py`: Grid index over station coordinates for bounding-box, polygon and nearest-station queries.
+- `changes.py`: Change feed emitting per-station diffs between station list refreshes.
 - `exceptions.py`: Defines custom exception classes.
-- `config.py`: Stores API base URLs.
+- `config.py`: Stores API base URLs (optionally pointing at a local caching proxy).
+- `sync_client.py`: Blocking client for non-async code, backed by a background event loop.
+- `scheduler.py`: Adaptive polling scheduler driven by risk level and data cadence.
+- `hedging.py`: Per-endpoint latency percentiles, hedged requests and batch deadlines.
+- `push.py`: Server-Sent Events and WebSocket push of live readings and risk changes with per-client backpressure.
+- `watchlist.py`: Shared watchlist merging subscribers' sensors into one fetch per variable at the widest window.
+- `priority.py`: Bounded fetch queue ordered by risk, staleness and user priority, with preemption.
+- `proxy.py`: Local caching proxy daemon (`chj_saih-proxy`) that fans out one upstream poll to many consumers.
 """
 
-from .sensors import RainGaugeSensor, FlowSensor, ReservoirSensor, TemperatureSensor
+from .sensors import RainGaugeSensor, FlowSensor, ReservoirSensor, TemperatureSensor, iter_sensors_data
+from .client import CHJSAIHClient, ClientMetrics, RateLimiter, ResponseCache
 from .data_fetcher import (
     fetch_sensor_data,
     fetch_station_list,
@@ -23,21 +47,101 @@ from .data_fetcher import (
     fetch_station_list_by_location,
     fetch_stations_by_subcuenca
 )
-from .exceptions import CHJSAIHError, APIError, DataParseError, InvalidInputError
+from .basins import SubcuencaSummary, fetch_subcuenca_summaries
+from .cassette import CassetteSession
+from .catalog import StationCatalog, StationCatalogStore, fetch_station_catalog
+from .metrics import CatalogMetrics, CatalogMetricsCache, SubcuencaStorage, compute_catalog_metrics
+from .geo import StationGeoIndex
+from .changes import StationChangeFeed, StationListDiff, diff_station_lists
+from .timezone import MADRID, MadridTimeTable, columns_to_utc, local_to_utc_datetime
+from .executors import ParseExecutor
+from .columns import SeriesColumns, align_columns, to_wide_frame
+from .resample import GapReport, align_to_grid, detect_gaps, resample
+from .correlation import LagCorrelation, LagCorrelationEngine, compute_lag_correlations, subcuenca_pairs
+from .quality import QCConfig, QualityFlag, check_sensor, quality_flags
+from .series import SensorSeries
+from .archive import SeriesArchive
+from .backfill import BackfillEngine, BackfillProgress, archive_key, archive_sink
+from .sync_client import SyncCHJSAIHClient
+from .proxy import CachingProxy
+from .hedging import HedgedFetcher, LatencyTracker, gather_with_deadline
+from .push import PushHub, PushServer
+from .watchlist import WatchlistRegistry, WatchSubscription
+from .priority import PriorityFetchQueue
+from .scheduler import AdaptivePollScheduler, PollJob
+from .exceptions import CHJSAIHError, APIError, DeadlineExceededError, DataParseError, InvalidInputError
 
 __all__ = [
     "RainGaugeSensor",
     "FlowSensor",
     "ReservoirSensor",
     "TemperatureSensor",
+    "iter_sensors_data",
+    "CHJSAIHClient",
+    "ClientMetrics",
+    "RateLimiter",
+    "ResponseCache",
     "fetch_sensor_data",
     "fetch_station_list",
     "fetch_all_stations",
     "fetch_stations_by_risk",
     "fetch_station_list_by_location",
     "fetch_stations_by_subcuenca",
+    "SubcuencaSummary",
+    "fetch_subcuenca_summaries",
+    "CassetteSession",
+    "StationCatalog",
+    "StationCatalogStore",
+    "fetch_station_catalog",
+    "CatalogMetrics",
+    "CatalogMetricsCache",
+    "SubcuencaStorage",
+    "compute_catalog_metrics",
+    "StationGeoIndex",
+    "StationChangeFeed",
+    "StationListDiff",
+    "diff_station_lists",
+    "MADRID",
+    "MadridTimeTable",
+    "columns_to_utc",
+    "local_to_utc_datetime",
+    "ParseExecutor",
+    "SeriesColumns",
+    "align_columns",
+    "to_wide_frame",
+    "GapReport",
+    "align_to_grid",
+    "detect_gaps",
+    "resample",
+    "LagCorrelation",
+    "LagCorrelationEngine",
+    "compute_lag_correlations",
+    "subcuenca_pairs",
+    "QCConfig",
+    "QualityFlag",
+    "check_sensor",
+    "quality_flags",
+    "SensorSeries",
+    "SeriesArchive",
+    "BackfillEngine",
+    "BackfillProgress",
+    "archive_key",
+    "archive_sink",
+    "SyncCHJSAIHClient",
+    "CachingProxy",
+    "HedgedFetcher",
+    "LatencyTracker",
+    "gather_with_deadline",
+    "PushHub",
+    "PushServer",
+    "WatchlistRegistry",
+    "WatchSubscription",
+    "PriorityFetchQueue",
+    "AdaptivePollScheduler",
+    "PollJob",
     "CHJSAIHError",
     "APIError",
+    "DeadlineExceededError",
     "DataParseError",
     "InvalidInputError"
 ]
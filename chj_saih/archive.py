@@ -0,0 +1,346 @@
+"""
+Compressed columnar archive of sensor series for long-term history.
+
+`SeriesArchive` stores `SeriesColumns` on disk partitioned by variable and month:
+
+    <root>/<variable>/<YYYY-MM>/part-000000.parquet   (when pyarrow is installed)
+    <root>/<variable>/<YYYY-MM>/part-000000.chjs      (built-in fallback format)
+
+Each `append` writes new part files, so archiving is incremental and never rewrites
+history. A part is written under a temporary name and hard-linked to the first free
+`part-NNNNNN` name, so concurrent appends to the same month never overwrite each other.
+Readers merge the parts of the requested months (later parts win on duplicate timestamps),
+skip parts outside the requested time range, and can decode a single column.
+
+The `.chjs` fallback is a small header followed by two zlib-compressed blocks: the
+timestamps delta-encoded as little-endian int64, and the values as little-endian float64.
+"""
+import bisect
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Literal, Optional, Tuple
+
+from .columns import SeriesColumns, EPOCH, require_optional, TIMESTAMP_COLUMN, VALUE_COLUMN
+from .exceptions import DataParseError, InvalidInputError
+
+ArchiveBackendLiteral = Literal["auto", "parquet", "binary"]
+ColumnLiteral = Literal["timestamp", "value"]
+
+_MAGIC = b"CHJS"
+_VERSION = 1
+# magic, version, row count, timestamp block size, value block size, min timestamp, max timestamp
+_HEADER = struct.Struct("<4sBIIIqq")
+_BINARY_EXT = ".chjs"
+_PARQUET_EXT = ".parquet"
+
+
+def _to_epoch(dt: Optional[datetime]) -> Optional[int]:
+    return None if dt is None else int((dt - EPOCH).total_seconds())
+
+
+def _little_endian(buffer: array) -> array:
+    if sys.byteorder == "big":
+        buffer = array(buffer.typecode, buffer)
+        buffer.byteswap()
+    return buffer
+
+
+def _month_start(year: int, month: int) -> int:
+    return int((datetime(year, month, 1) - EPOCH).total_seconds())
+
+
+def _overlap(ranges: List[Tuple[int, int]]) -> bool:
+    ranges = sorted(ranges)
+    return any(ranges[k][0] <= ranges[k - 1][1] for k in range(1, len(ranges)))
+
+
+class SeriesArchive:
+    """
+    Appends and reads sensor series in a month-partitioned, compressed columnar layout.
+    """
+    def __init__(self, root: str, backend: ArchiveBackendLiteral = "auto", compression_level: int = 6):
+        """
+        Args:
+            root: Directory holding the archive. Created on first append.
+            backend: "parquet" (requires pyarrow), "binary" (built-in format), or "auto"
+                     to use Parquet when pyarrow is importable.
+            compression_level: zlib level for the binary format (1-9).
+
+        Raises:
+            InvalidInputError: If `backend` is not one of the accepted values.
+        """
+        if backend not in ("auto", "parquet", "binary"):
+            raise InvalidInputError(f"Invalid backend '{backend}'. Use 'auto', 'parquet' or 'binary'.")
+        if backend == "auto":
+            try:
+                import pyarrow.parquet  # noqa: F401
+                backend = "parquet"
+            except ImportError:
+                backend = "binary"
+        self.root = root
+        self.backend = backend
+        self.compression_level = compression_level
+
+    def _variable_dir(self, variable: str) -> str:
+        if not variable or variable.startswith(".") or "/" in variable or os.sep in variable:
+            raise InvalidInputError(f"Invalid variable name for archive: '{variable}'.")
+        return os.path.join(self.root, variable)
+
+    def variables(self) -> List[str]:
+        """Variables present in the archive, sorted."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def months(self, variable: str) -> List[str]:
+        """Month partitions ("YYYY-MM") stored for a variable, sorted."""
+        directory = self._variable_dir(variable)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.listdir(directory))
+
+    def _parts(self, variable: str, month: str) -> List[str]:
+        directory = os.path.join(self._variable_dir(variable), month)
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.endswith((_BINARY_EXT, _PARQUET_EXT))]
+
+    def append(self, variable: str, columns: SeriesColumns) -> int:
+        """
+        Appends a series, writing one new part file per month it spans.
+
+        Args:
+            variable: The sensor variable ID.
+            columns: The series to store, sorted by timestamp (as produced by the parser).
+
+        Returns:
+            The number of rows written.
+        """
+        timestamps, values = columns.timestamps, columns.values
+        i, n = 0, len(timestamps)
+        while i < n:
+            first = EPOCH + timedelta(seconds=timestamps[i])
+            next_year, next_month = (first.year + 1, 1) if first.month == 12 else (first.year, first.month + 1)
+            j = bisect.bisect_left(timestamps, _month_start(next_year, next_month), i)
+            directory = os.path.join(self._variable_dir(variable), f"{first.year:04d}-{first.month:02d}")
+            os.makedirs(directory, exist_ok=True)
+            self._add_part(directory, SeriesColumns(timestamps[i:j], values[i:j]))
+            i = j
+        return n
+
+    def _add_part(self, directory: str, columns: SeriesColumns) -> str:
+        """Writes `columns` as the next free part of `directory` and returns its path."""
+        ext = _PARQUET_EXT if self.backend == "parquet" else _BINARY_EXT
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        os.close(fd)
+        try:
+            self._write_part(tmp_path, columns)
+            index = sum(1 for name in os.listdir(directory) if name.startswith("part-"))
+            while True:
+                path = os.path.join(directory, f"part-{index:06d}{ext}")
+                try:
+                    os.link(tmp_path, path)  # Fails instead of overwriting a part another writer just added.
+                    return path
+                except FileExistsError:
+                    index += 1
+        finally:
+            os.remove(tmp_path)
+
+    def _write_part(self, path: str, columns: SeriesColumns) -> None:
+        if self.backend == "parquet":
+            pq = require_optional("pyarrow.parquet", "The Parquet archive backend")
+            pq.write_table(columns.to_arrow(), path, compression="zstd")
+        else:
+            timestamps = columns.timestamps
+            deltas = array('q', [timestamps[0]]) if timestamps else array('q')
+            deltas.extend(b - a for a, b in zip(timestamps, timestamps[1:]))
+            ts_block = zlib.compress(_little_endian(deltas).tobytes(), self.compression_level)
+            value_block = zlib.compress(_little_endian(columns.values).tobytes(), self.compression_level)
+            header = _HEADER.pack(_MAGIC, _VERSION, len(timestamps), len(ts_block), len(value_block),
+                                  timestamps[0] if timestamps else 0, timestamps[-1] if timestamps else 0)
+            with open(path, "wb") as f:
+                f.write(header)
+                f.write(ts_block)
+                f.write(value_block)
+
+    def _read_binary_part(self, path: str, start: Optional[int], end: Optional[int],
+                          need_timestamps: bool, need_values: bool) -> Optional[Tuple[array, array]]:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            try:
+                magic, version, count, ts_size, value_size, min_ts, max_ts = _HEADER.unpack(header)
+            except struct.error as e:
+                raise DataParseError(f"Truncated archive part '{path}'.") from e
+            if magic != _MAGIC or version != _VERSION:
+                raise DataParseError(f"'{path}' is not a chj_saih archive part (version {_VERSION}).")
+            if count == 0 or (start is not None and max_ts < start) or (end is not None and min_ts > end):
+                return None
+            fully_inside = (start is None or min_ts >= start) and (end is None or max_ts <= end)
+            timestamps = array('q')
+            values = array('d')
+            if need_timestamps or not fully_inside:
+                timestamps.frombytes(zlib.decompress(f.read(ts_size)))
+                timestamps = _little_endian(timestamps)
+                running = 0
+                for k in range(count):
+                    running += timestamps[k]
+                    timestamps[k] = running
+            else:
+                f.seek(ts_size, os.SEEK_CUR)
+            if need_values:
+                values.frombytes(zlib.decompress(f.read(value_size)))
+                values = _little_endian(values)
+        if not fully_inside:
+            lo = 0 if start is None else bisect.bisect_left(timestamps, start)
+            hi = count if end is None else bisect.bisect_right(timestamps, end)
+            timestamps = timestamps[lo:hi]
+            if need_values:
+                values = values[lo:hi]
+        return timestamps, values
+
+    def _read_parquet_part(self, path: str, start: Optional[int], end: Optional[int],
+                           need_values: bool) -> Optional[Tuple[array, array]]:
+        pq = require_optional("pyarrow.parquet", "Reading Parquet archive parts")
+        pc = require_optional("pyarrow.compute", "Reading Parquet archive parts")
+        pa = require_optional("pyarrow", "Reading Parquet archive parts")
+        table = pq.read_table(path, columns=[TIMESTAMP_COLUMN, VALUE_COLUMN] if need_values else [TIMESTAMP_COLUMN])
+        # Parquet may widen the second-resolution timestamps to milliseconds on write.
+        seconds = table.column(TIMESTAMP_COLUMN).cast(pa.timestamp("s")).cast(pa.int64())
+        table = table.set_column(0, TIMESTAMP_COLUMN, seconds)
+        if start is not None or end is not None:
+            ts = table.column(TIMESTAMP_COLUMN)
+            mask = None
+            if start is not None:
+                mask = pc.greater_equal(ts, start)
+            if end is not None:
+                upper = pc.less_equal(ts, end)
+                mask = upper if mask is None else pc.and_(mask, upper)
+            table = table.filter(mask)
+        if table.num_rows == 0:
+            return None
+        timestamps = array('q')
+        timestamps.frombytes(table.column(TIMESTAMP_COLUMN).to_numpy().tobytes())
+        values = array('d')
+        if need_values:
+            values.frombytes(table.column(VALUE_COLUMN).to_numpy().tobytes())
+        return timestamps, values
+
+    @staticmethod
+    def _binary_range(path: str) -> Optional[Tuple[int, int]]:
+        """Stored min/max timestamps of a binary part, read from its header; None if it is empty."""
+        with open(path, "rb") as f:
+            try:
+                _, _, count, _, _, min_ts, max_ts = _HEADER.unpack(f.read(_HEADER.size))
+            except struct.error as e:
+                raise DataParseError(f"Truncated archive part '{path}'.") from e
+        return (min_ts, max_ts) if count else None
+
+    def _read(self, variable: str, start: Optional[datetime], end: Optional[datetime],
+              need_timestamps: bool, need_values: bool) -> Tuple[array, array]:
+        start_ts, end_ts = _to_epoch(start), _to_epoch(end)
+        first_month = None if start is None else f"{start.year:04d}-{start.month:02d}"
+        last_month = None if end is None else f"{end.year:04d}-{end.month:02d}"
+        paths = [path for month in self.months(variable)
+                 if not ((first_month is not None and month < first_month) or (last_month is not None and month > last_month))
+                 for path in self._parts(variable, month)]
+        if not need_timestamps:
+            binary_ranges = [self._binary_range(path) for path in paths if path.endswith(_BINARY_EXT)]
+            if _overlap([r for r in binary_ranges if r is not None]):
+                need_timestamps = True  # Needed to deduplicate overlapping parts.
+        # (first/last timestamp, timestamps, values) per part, in write order.
+        parts: List[Tuple[Tuple[int, int], array, array]] = []
+        for path in paths:
+            if path.endswith(_PARQUET_EXT):
+                part = self._read_parquet_part(path, start_ts, end_ts, need_values)
+            else:
+                part = self._read_binary_part(path, start_ts, end_ts, need_timestamps, need_values)
+            if part is None or not (part[0] or part[1]):
+                continue
+            part_ts, part_values = part
+            span = (part_ts[0], part_ts[-1]) if part_ts else self._binary_range(path)
+            parts.append((span, part_ts, part_values))
+
+        if not _overlap([span for span, _, _ in parts]):
+            # Parts are written in arrival order, which need not be time order (e.g. a backfill).
+            timestamps = array('q')
+            values = array('d')
+            for _, part_ts, part_values in sorted(parts, key=lambda part: part[0]):
+                timestamps.extend(part_ts)
+                values.extend(part_values)
+            return timestamps, values
+        if not need_timestamps:
+            # A Parquet part overlaps a binary part that was read without its timestamps.
+            return self._read(variable, start, end, True, need_values)
+        # Later parts override earlier ones for the same timestamp (last write wins).
+        if not need_values:
+            return array('q', sorted({ts for _, part_ts, _ in parts for ts in part_ts})), array('d')
+        merged: Dict[int, float] = {}
+        for _, part_ts, part_values in parts:
+            merged.update(zip(part_ts, part_values))
+        order = sorted(merged)
+        return array('q', order), array('d', [merged[ts] for ts in order])
+
+    def read(self, variable: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> SeriesColumns:
+        """
+        Reads a variable's series, optionally restricted to `start <= t <= end`.
+
+        Only the month partitions overlapping the range are opened, and parts whose
+        stored min/max timestamps fall outside it are skipped.
+
+        Args:
+            variable: The sensor variable ID.
+            start: First wall-clock time to include, or None for no lower bound.
+            end: Last wall-clock time to include, or None for no upper bound.
+
+        Returns:
+            A `SeriesColumns` sorted by timestamp; empty if nothing is stored.
+        """
+        timestamps, values = self._read(variable, start, end, need_timestamps=True, need_values=True)
+        return SeriesColumns(timestamps, values)
+
+    def read_column(self, variable: str, column: ColumnLiteral,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None) -> array:
+        """
+        Reads a single column, decoding only what the projection needs.
+
+        Args:
+            variable: The sensor variable ID.
+            column: "timestamp" or "value".
+            start: First wall-clock time to include, or None for no lower bound.
+            end: Last wall-clock time to include, or None for no upper bound.
+
+        Returns:
+            An `array('q')` of timestamps or an `array('d')` of values.
+
+        Raises:
+            InvalidInputError: If `column` is not a known column.
+        """
+        if column not in (TIMESTAMP_COLUMN, VALUE_COLUMN):
+            raise InvalidInputError(f"Invalid column '{column}'. Use '{TIMESTAMP_COLUMN}' or '{VALUE_COLUMN}'.")
+        timestamps, values = self._read(variable, start, end,
+                                        need_timestamps=column == TIMESTAMP_COLUMN,
+                                        need_values=column == VALUE_COLUMN)
+        return timestamps if column == TIMESTAMP_COLUMN else values
+
+    def compact(self, variable: str, month: str) -> None:
+        """Rewrites the parts of one month as a single deduplicated part."""
+        directory = os.path.join(self._variable_dir(variable), month)
+        parts = self._parts(variable, month)
+        if len(parts) <= 1:
+            return
+        year, month_number = (int(x) for x in month.split("-"))
+        start = datetime(year, month_number, 1)
+        end = (datetime(year + 1, 1, 1) if month_number == 12 else datetime(year, month_number + 1, 1)) - timedelta(seconds=1)
+        merged = self.read(variable, start, end)
+        ext = _PARQUET_EXT if self.backend == "parquet" else _BINARY_EXT
+        target = os.path.join(directory, f"part-000000{ext}")
+        # The merged part replaces part 0 before the others are removed, so readers see
+        # either the old parts or the merged one overlapping with them, never a gap.
+        os.replace(self._add_part(directory, merged), target)
+        for old in parts:
+            if old != target:
+                os.remove(old)
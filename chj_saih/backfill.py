@@ -0,0 +1,211 @@
+"""
+Resumable, parallel historical backfill of every variable in the station catalog.
+
+`BackfillEngine` enumerates variables from `fetch_all_stations`, fetches the requested
+period groupings (by default `ultimoanno` and `ultimomes`) with bounded concurrency and
+hands each parsed series to a sink, such as `archive_sink(SeriesArchive(root))`. Completed
+(variable, period) pairs are appended to a checkpoint file as they finish, so an
+interrupted run resumes where it stopped. Failures are retried in a final pass, and
+progress (throughput and ETA) is reported after every item. Parsing runs off the event
+loop, in the default thread pool or a `ParseExecutor`.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import aiohttp
+
+from .columns import SeriesColumns
+from .data_fetcher import fetch_all_stations, fetch_sensor_data
+from .exceptions import CHJSAIHError
+from .sensors import Sensor
+
+if TYPE_CHECKING:
+    from .archive import SeriesArchive
+    from .executors import ParseExecutor
+
+BackfillKey = Tuple[str, str]
+BackfillSink = Callable[[str, str, SeriesColumns], Union[None, Awaitable[None]]]
+
+DEFAULT_BACKFILL_PERIODS: Tuple[str, ...] = ("ultimoanno", "ultimomes")
+
+BACKFILL_NUM_VALUES: Dict[str, int] = {
+    "ultimoanno": 366,
+    "ultimomes": 31,
+    "ultimasemana": 168,
+    "ultimodia": 24,
+}
+"""Number of values requested per period grouping so the whole period is covered."""
+
+
+@dataclass
+class BackfillProgress:
+    """Progress of a backfill run."""
+    total: int
+    completed: int = 0
+    skipped: int = 0
+    failed: Dict[BackfillKey, str] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started."""
+        return time.monotonic() - self.started_at
+
+    @property
+    def remaining(self) -> int:
+        """Items not yet completed, including failed ones awaiting retry."""
+        return self.total - self.skipped - self.completed
+
+    @property
+    def throughput(self) -> float:
+        """Items completed per second in this run."""
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds to finish, or None before the first item completes."""
+        throughput = self.throughput
+        return self.remaining / throughput if throughput > 0 else None
+
+
+class BackfillCheckpoint:
+    """
+    Append-only record of completed (variable, period) pairs.
+
+    Each completion is written as one line and flushed, so a crash loses at most
+    the item in progress.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[BackfillKey] = set()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    variable, sep, period = line.rstrip("\n").partition("\t")
+                    if sep:
+                        self.done.add((variable, period))
+
+    def mark_done(self, key: BackfillKey) -> None:
+        """Records a completed pair."""
+        if key in self.done:
+            return
+        self.done.add(key)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{key[0]}\t{key[1]}\n")
+            f.flush()
+
+
+def archive_key(variable: str, period_grouping: str) -> str:
+    """Name under which `archive_sink` stores a variable's series for one period grouping."""
+    return f"{variable}@{period_grouping}"
+
+
+def archive_sink(archive: "SeriesArchive") -> BackfillSink:
+    """
+    Sink that appends each backfilled series to a `SeriesArchive`, in the default thread pool.
+
+    Each period grouping is stored separately, under `archive_key(variable, period_grouping)`,
+    so daily `ultimoanno` values and hourly `ultimomes` values are not merged into one series.
+    """
+    async def _append(variable: str, period_grouping: str, columns: SeriesColumns) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, archive.append, archive_key(variable, period_grouping), columns)
+    return _append
+
+
+class BackfillEngine:
+    """
+    Backfills historical data for every catalog variable, with resume support.
+    """
+    def __init__(
+        self,
+        sink: BackfillSink,
+        checkpoint_path: str,
+        periods: Sequence[str] = DEFAULT_BACKFILL_PERIODS,
+        max_concurrency: int = 8,
+        progress_callback: Optional[Callable[[BackfillProgress], None]] = None,
+        executor: Optional["ParseExecutor"] = None,
+    ):
+        """
+        Args:
+            sink: Called with `(variable, period_grouping, columns)` for each fetched series.
+                  May be a coroutine function.
+            checkpoint_path: File used to record completed items and resume from.
+            periods: Period groupings to backfill for each variable.
+            max_concurrency: Maximum simultaneous requests.
+            progress_callback: Called with the current `BackfillProgress` after every item.
+            executor: Parses the payloads. None parses them in the default thread pool.
+        """
+        self.sink = sink
+        self.checkpoint = BackfillCheckpoint(checkpoint_path)
+        self.periods = tuple(periods)
+        self.max_concurrency = max_concurrency
+        self.progress_callback = progress_callback
+        self.executor = executor
+
+    async def list_items(self, session: aiohttp.ClientSession) -> List[BackfillKey]:
+        """Enumerates the (variable, period) pairs to backfill from `fetch_all_stations`."""
+        stations = await fetch_all_stations(session)
+        variables = sorted({station["variable"] for station in stations if station.get("variable")})
+        return [(variable, period) for variable in variables for period in self.periods]
+
+    async def _process(self, key: BackfillKey, session: aiohttp.ClientSession) -> None:
+        variable, period = key
+        sensor = Sensor(variable, period, BACKFILL_NUM_VALUES.get(period, 30))
+        raw_data = await fetch_sensor_data(variable, period, sensor.num_values, session)
+        if self.executor is not None:
+            columns = await self.executor.parse_columns(sensor, raw_data)
+        else:
+            columns = await asyncio.get_running_loop().run_in_executor(None, sensor.parse_columns, raw_data)
+        outcome = self.sink(variable, period, columns)
+        if asyncio.iscoroutine(outcome):
+            await outcome
+
+    async def _run_pass(self, keys: Sequence[BackfillKey], session: aiohttp.ClientSession,
+                        progress: BackfillProgress) -> None:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _one(key: BackfillKey) -> None:
+            async with semaphore:
+                try:
+                    await self._process(key, session)
+                except CHJSAIHError as e:
+                    progress.failed[key] = str(e)
+                except Exception as e:  # A failing sink must not abort the other items.
+                    progress.failed[key] = f"{type(e).__name__}: {e}"
+                else:
+                    progress.failed.pop(key, None)
+                    self.checkpoint.mark_done(key)
+                    progress.completed += 1
+            if self.progress_callback is not None:
+                self.progress_callback(progress)
+
+        await asyncio.gather(*(_one(key) for key in keys))
+
+    async def run(self, session: aiohttp.ClientSession, items: Optional[Sequence[BackfillKey]] = None) -> BackfillProgress:
+        """
+        Runs the backfill, skipping items already in the checkpoint.
+
+        Args:
+            session: The aiohttp client session to use for all requests.
+            items: Explicit (variable, period) pairs; enumerated from the catalog if None.
+
+        Returns:
+            The final `BackfillProgress`. Items that still failed after the retry pass
+            are listed in `failed` and will be attempted again on the next run.
+        """
+        keys = list(items) if items is not None else await self.list_items(session)
+        pending = [key for key in keys if key not in self.checkpoint.done]
+        progress = BackfillProgress(total=len(keys), skipped=len(keys) - len(pending))
+
+        await self._run_pass(pending, session, progress)
+        if progress.failed:
+            await self._run_pass(list(progress.failed), session, progress)
+        return progress
@@ -0,0 +1,140 @@
+"""
+Per sub-basin (subcuenca) aggregate dashboards.
+
+Building a summary per subcuenca used to take one `fetch_stations_by_subcuenca` call per
+sub-basin (each downloading the station lists again) followed by sequential
+`Sensor.get_data` calls. `fetch_subcuenca_summaries` downloads the catalog once, groups it
+by `subcuenca`, fetches every member sensor concurrently and folds each response into
+the aggregates as it arrives, in a single pass.
+"""
+import asyncio
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+
+from .catalog import StationCatalog, fetch_station_catalog
+from .exceptions import CHJSAIHError
+from .sensors import SENSOR_CLASS_BY_TYPE
+
+
+@dataclass
+class SubcuencaSummary:
+    """
+    Aggregates for one sub-basin.
+
+    Attributes:
+        subcuenca: Sub-basin ID (None for stations without one).
+        station_count: Stations of the requested types in the sub-basin.
+        rain_gauges: Rain gauges with readings in the window.
+        mean_rainfall: Mean over those gauges of each gauge's accumulation in the window
+                       (mm), or None without rain data. Summing across gauges instead
+                       would grow with the number of gauges, not with the rain.
+        max_rainfall: Highest single-gauge accumulation in the window (mm), or None.
+        max_flow: Highest flow reading in the window (m³/s), or None without flow data.
+        reservoir_volume: Sum of the latest reading of each reservoir (hm³).
+        reservoir_capacity: Sum of `datoTotal` of the reservoirs with a reading (hm³).
+        worst_risk: Highest `estadoInt` among the sub-basin's stations.
+        failed: Variables whose data could not be fetched or parsed.
+    """
+    subcuenca: Optional[int]
+    station_count: int = 0
+    rain_gauges: int = 0
+    mean_rainfall: Optional[float] = None
+    max_rainfall: Optional[float] = None
+    max_flow: Optional[float] = None
+    reservoir_volume: float = 0.0
+    reservoir_capacity: float = 0.0
+    worst_risk: int = 0
+    failed: List[str] = field(default_factory=list)
+
+    @property
+    def fill_ratio(self) -> Optional[float]:
+        """Reservoir volume over capacity, or None without reservoirs of known capacity."""
+        return self.reservoir_volume / self.reservoir_capacity if self.reservoir_capacity > 0 else None
+
+
+async def fetch_subcuenca_summaries(
+    session: aiohttp.ClientSession,
+    period_grouping: str = "ultimashoras",
+    num_values: int = 24,
+    sensor_types: Sequence[str] = ('p', 'a', 'e'),
+    max_concurrency: int = 8,
+    catalog: Optional[StationCatalog] = None,
+    timeout: Optional[float] = None,
+) -> Dict[Optional[int], SubcuencaSummary]:
+    """
+    Computes per-subcuenca aggregates for the whole basin in one call.
+
+    Args:
+        session: The aiohttp client session to use for requests.
+        period_grouping: Time aggregation of the sensor windows.
+        num_values: Number of values per sensor window.
+        sensor_types: Station types to include ('p', 'a', 'e', 't').
+        max_concurrency: Maximum simultaneous sensor requests.
+        catalog: A catalog to use instead of fetching one (e.g. from `StationCatalogStore`).
+        timeout: Seconds after which each sensor request is given up. None waits indefinitely.
+
+    Returns:
+        A dictionary of sub-basin ID to `SubcuencaSummary`. Sensor failures (API errors,
+        timeouts, connection errors) are recorded in `failed` instead of aborting the whole call.
+    """
+    if catalog is None:
+        catalog = await fetch_station_catalog(session)
+
+    summaries: Dict[Optional[int], SubcuencaSummary] = {}
+    members = []
+    for station in catalog.stations():
+        if station.get("tipo") not in sensor_types:
+            continue
+        subcuenca = station.get("subcuenca")
+        summary = summaries.get(subcuenca)
+        if summary is None:
+            summary = summaries[subcuenca] = SubcuencaSummary(subcuenca)
+        summary.station_count += 1
+        risk = station.get("estadoInt")
+        if isinstance(risk, int) and risk > summary.worst_risk:
+            summary.worst_risk = risk
+        if station.get("variable"):
+            members.append((station, summary))
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _fetch(station, summary):
+        sensor = SENSOR_CLASS_BY_TYPE[station["tipo"]](station["variable"], period_grouping, num_values)
+        async with semaphore:
+            try:
+                return station, summary, await sensor.get_columns(session, timeout=timeout)
+            except (CHJSAIHError, asyncio.TimeoutError, aiohttp.ClientError):
+                return station, summary, None
+
+    for next_result in asyncio.as_completed([_fetch(station, summary) for station, summary in members]):
+        station, summary, columns = await next_result
+        if columns is None:
+            summary.failed.append(station["variable"])
+            continue
+        readings = [v for v in columns.values if not math.isnan(v)]
+        if not readings:
+            continue
+        tipo = station["tipo"]
+        if tipo == 'p':
+            accumulation = sum(readings)
+            summary.rain_gauges += 1
+            mean = summary.mean_rainfall or 0.0
+            summary.mean_rainfall = mean + (accumulation - mean) / summary.rain_gauges
+            if summary.max_rainfall is None or accumulation > summary.max_rainfall:
+                summary.max_rainfall = accumulation
+        elif tipo == 'a':
+            peak = max(readings)
+            if summary.max_flow is None or peak > summary.max_flow:
+                summary.max_flow = peak
+        elif tipo == 'e':
+            capacity = station.get("datoTotal")
+            if isinstance(capacity, (int, float)) and capacity > 0:
+                summary.reservoir_volume += readings[-1]
+                summary.reservoir_capacity += capacity
+
+    for summary in summaries.values():
+        summary.failed.sort()
+    return summaries
@@ -0,0 +1,181 @@
+"""
+Record-and-replay HTTP layer for deterministic tests and offline benchmarks.
+
+`CassetteSession` can be passed anywhere the library expects an `aiohttp.ClientSession`.
+In "record" mode it forwards each GET to a real session and stores the response; in
+"replay" mode it answers from the stored responses at memory speed, optionally adding a
+simulated latency. Cassettes are gzip-compressed JSON files keyed by URL.
+
+Example:
+    # Once, with network access:
+    async with aiohttp.ClientSession() as real, CassetteSession("tests/fixtures/lists.json.gz", "record", real) as s:
+        await fetch_all_stations(s)
+    # Afterwards, offline:
+    async with CassetteSession("tests/fixtures/lists.json.gz") as s:
+        stations = await fetch_all_stations(s)
+"""
+import asyncio
+import base64
+import gzip
+import json
+import os
+from typing import Any, Callable, Dict, Literal, Optional, Union
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from .exceptions import InvalidInputError
+
+CassetteModeLiteral = Literal["replay", "record", "auto"]
+LatencyType = Union[float, Callable[[str], float]]
+
+_CASSETTE_VERSION = 2
+
+
+class CassetteResponse:
+    """A recorded response, exposing the subset of `aiohttp.ClientResponse` the library uses."""
+    def __init__(self, url: str, status: int, reason: str, body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self._body = body
+
+    def raise_for_status(self) -> None:
+        """Raises `aiohttp.ClientResponseError` for 4xx/5xx statuses, like aiohttp."""
+        if self.status >= 400:
+            url = URL(self.url)
+            request_info = aiohttp.RequestInfo(url, "GET", CIMultiDictProxy(CIMultiDict()), url)
+            raise aiohttp.ClientResponseError(request_info=request_info, history=(), status=self.status, message=self.reason)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return self._body.decode(encoding)
+
+    async def json(self, **kwargs: Any) -> Any:
+        return json.loads(self._body)
+
+    async def __aenter__(self) -> "CassetteResponse":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+def _decode_body(recorded: Dict[str, Any]) -> bytes:
+    """Body of a recorded interaction; version 1 cassettes stored it as UTF-8 text."""
+    if recorded.get("encoding") == "base64":
+        return base64.b64decode(recorded["body"])
+    return recorded["body"].encode("utf-8")
+
+
+class SessionRequest:
+    """
+    Awaitable and async context manager, like the object returned by `ClientSession.get`.
+
+    Resolves to `owner._respond(url)`; shared by the session stand-ins (`CassetteSession`
+    and `CHJSAIHClient`).
+    """
+    def __init__(self, owner: Any, url: str):
+        self._owner = owner
+        self._url = url
+
+    def __await__(self):
+        return self._owner._respond(self._url).__await__()
+
+    async def __aenter__(self) -> CassetteResponse:
+        return await self._owner._respond(self._url)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+class CassetteSession:
+    """
+    Session stand-in that records real responses or replays recorded ones.
+
+    Attributes:
+        interactions (Dict[str, Dict[str, Any]]): Recorded responses keyed by URL.
+        hits (int): Number of requests answered from the cassette.
+    """
+    def __init__(
+        self,
+        path: str,
+        mode: CassetteModeLiteral = "replay",
+        session: Optional[aiohttp.ClientSession] = None,
+        latency: LatencyType = 0.0,
+    ):
+        """
+        Args:
+            path: Cassette file (gzip-compressed JSON).
+            mode: "replay" answers only from the cassette; "record" always queries `session`
+                  and stores the result; "auto" replays known URLs and records the rest.
+            session: Real session used for recording. Required unless mode is "replay".
+            latency: Seconds to wait before each replayed response, or a function of the URL.
+
+        Raises:
+            InvalidInputError: If `mode` is invalid or a recording mode has no session.
+        """
+        if mode not in ("replay", "record", "auto"):
+            raise InvalidInputError(f"Invalid cassette mode '{mode}'. Use 'replay', 'record' or 'auto'.")
+        if mode != "replay" and session is None:
+            raise InvalidInputError(f"Cassette mode '{mode}' requires a real session to record from.")
+        self.path = path
+        self.mode = mode
+        self.session = session
+        self.latency = latency
+        self.hits = 0
+        self.interactions: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                self.interactions = json.load(f).get("interactions", {})
+
+    def get(self, url: str, **kwargs: Any) -> SessionRequest:
+        """Returns a request object usable with `async with` or `await`, like aiohttp."""
+        return SessionRequest(self, str(url))
+
+    async def _respond(self, url: str) -> CassetteResponse:
+        recorded = self.interactions.get(url)
+        if recorded is not None and self.mode != "record":
+            latency = self.latency(url) if callable(self.latency) else self.latency
+            if latency > 0:
+                await asyncio.sleep(latency)
+            self.hits += 1
+            return CassetteResponse(url, recorded["status"], recorded["reason"], _decode_body(recorded))
+        if self.mode == "replay":
+            raise aiohttp.ClientConnectionError(f"No recorded response in cassette '{self.path}' for {url}")
+
+        assert self.session is not None
+        async with self.session.get(url) as response:
+            body = await response.read()
+            status, reason = response.status, response.reason or ""
+        self.interactions[url] = {"status": status, "reason": reason, "encoding": "base64",
+                                  "body": base64.b64encode(body).decode("ascii")}
+        self._dirty = True
+        return CassetteResponse(url, status, reason, body)
+
+    def save(self) -> None:
+        """Writes recorded interactions to the cassette file, if anything was recorded."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"version": _CASSETTE_VERSION, "interactions": self.interactions}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    async def close(self) -> None:
+        """Saves recordings. The wrapped real session is left open for its owner to close."""
+        self.save()
+
+    async def __aenter__(self) -> "CassetteSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
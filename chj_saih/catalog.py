@@ -0,0 +1,314 @@
+"""
+Station catalog with a compact on-disk snapshot for instant cold starts.
+
+`fetch_all_stations` needs four round-trips to saih.chj.es before anything can be
+answered. `StationCatalog` holds the same stations in columnar form and can be saved
+to, and loaded from, a small binary snapshot through `mmap`. `StationCatalogStore`
+serves the snapshot immediately at start-up and swaps in fresh data when a background
+refresh completes.
+
+Snapshot layout (little-endian): a header with magic, version, creation time and row
+count, followed by one length-prefixed section per column. Integer columns are int64
+(`INT_NONE` marks a missing value), float columns are float64 (NaN marks a missing
+value) and string columns are UTF-8 joined with NUL (`\\x01` marks a missing value).
+"""
+import asyncio
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .data_fetcher import fetch_station_list, SensorTypeLiteral
+from .exceptions import DataParseError
+
+INT_NONE = -(2 ** 63)
+"""Sentinel stored in integer columns for missing values."""
+
+_STR_NONE = "\x01"
+_MAGIC = b"CHJC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBdI")  # magic, version, created_at, row count
+_SECTION = struct.Struct("<I")
+
+CATALOG_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("id", "int"),
+    ("latitud", "float"),
+    ("longitud", "float"),
+    ("nombre", "str"),
+    ("variable", "str"),
+    ("unidades", "str"),
+    ("subcuenca", "int"),
+    ("estado", "str"),
+    ("datoActual", "float"),
+    ("datoTotal", "float"),
+    ("municipioNombre", "str"),
+    ("estadoInt", "int"),
+    ("estadoInternal", "str"),
+    ("tipo", "str"),
+)
+"""Columns kept in the catalog (as in `all_stations_json_to_csv.csv`) and their storage kind.
+`tipo` is the sensor type ('a', 't', 'e', 'p') of the list the station came from."""
+
+SENSOR_TYPES: Tuple[SensorTypeLiteral, ...] = ('a', 't', 'e', 'p')
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool) or value is None:
+        return INT_NONE
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return INT_NONE
+
+
+def _to_float(value: Any) -> float:
+    if value is None or isinstance(value, bool):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _little_endian(buffer: array) -> array:
+    if sys.byteorder == "big":
+        buffer = array(buffer.typecode, buffer)
+        buffer.byteswap()
+    return buffer
+
+
+class StationCatalog:
+    """
+    Columnar station catalog.
+
+    Attributes:
+        columns (Dict[str, Any]): Column name to `array('q')`, `array('d')` or list of str.
+        created_at (float): Epoch seconds when the data was fetched from the API.
+    """
+    def __init__(self, columns: Dict[str, Any], created_at: float):
+        self.columns = columns
+        self.created_at = created_at
+        self._stations: Optional[List[Dict[str, Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    @property
+    def age(self) -> float:
+        """Seconds since the catalog data was fetched."""
+        return time.time() - self.created_at
+
+    @classmethod
+    def from_stations(cls, stations: List[Dict[str, Any]], created_at: Optional[float] = None) -> "StationCatalog":
+        """
+        Builds a catalog from station dictionaries (e.g. from `fetch_station_list`).
+
+        Only `CATALOG_COLUMNS` are kept; numeric fields that are not numbers are stored as missing.
+        """
+        columns: Dict[str, Any] = {}
+        for name, kind in CATALOG_COLUMNS:
+            if kind == "int":
+                columns[name] = array('q', [_to_int(s.get(name)) for s in stations])
+            elif kind == "float":
+                columns[name] = array('d', [_to_float(s.get(name)) for s in stations])
+            else:
+                columns[name] = [None if s.get(name) is None else str(s.get(name)) for s in stations]
+        return cls(columns, time.time() if created_at is None else created_at)
+
+    def stations(self) -> List[Dict[str, Any]]:
+        """
+        Station dictionaries with the catalog columns, in catalog order.
+
+        Missing values are None. The list is built once and cached; treat it as read-only.
+        """
+        if self._stations is None:
+            decoded = []
+            for name, kind in CATALOG_COLUMNS:
+                column = self.columns[name]
+                if kind == "int":
+                    decoded.append([None if v == INT_NONE else v for v in column])
+                elif kind == "float":
+                    decoded.append([None if math.isnan(v) else v for v in column])
+                else:
+                    decoded.append(column)
+            names = [name for name, _ in CATALOG_COLUMNS]
+            self._stations = [dict(zip(names, row)) for row in zip(*decoded)]
+        return self._stations
+
+    def save(self, path: str) -> None:
+        """Writes the snapshot atomically (temporary file + rename)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.created_at, len(self)))
+            for name, kind in CATALOG_COLUMNS:
+                column = self.columns[name]
+                if kind == "str":
+                    payload = "\x00".join(_STR_NONE if v is None else v for v in column).encode("utf-8")
+                else:
+                    payload = _little_endian(column).tobytes()
+                f.write(_SECTION.pack(len(payload)))
+                f.write(payload)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "StationCatalog":
+        """
+        Loads a snapshot written by `save` through a memory map.
+
+        Raises:
+            DataParseError: If the file is not a valid catalog snapshot.
+        """
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                magic, version, created_at, count = _HEADER.unpack_from(view, 0)
+                if magic != _MAGIC or version != _VERSION:
+                    raise DataParseError(f"'{path}' is not a station catalog snapshot (version {_VERSION}).")
+                offset = _HEADER.size
+                columns: Dict[str, Any] = {}
+                for name, kind in CATALOG_COLUMNS:
+                    (size,) = _SECTION.unpack_from(view, offset)
+                    offset += _SECTION.size
+                    chunk = view[offset:offset + size]
+                    if len(chunk) != size:
+                        raise DataParseError(f"Truncated station catalog snapshot '{path}'.")
+                    offset += size
+                    if kind == "str":
+                        values = bytes(chunk).decode("utf-8").split("\x00") if count else []
+                        columns[name] = [None if v == _STR_NONE else v for v in values]
+                    else:
+                        column = array('q' if kind == "int" else 'd')
+                        column.frombytes(chunk)
+                        columns[name] = _little_endian(column)
+                    if len(columns[name]) != count:
+                        raise DataParseError(f"Column '{name}' in '{path}' has {len(columns[name])} rows, expected {count}.")
+                    chunk.release()
+            except struct.error as e:
+                raise DataParseError(f"Truncated station catalog snapshot '{path}'.") from e
+            finally:
+                view.release()
+        return cls(columns, created_at)
+
+
+async def fetch_station_catalog(
+    session: aiohttp.ClientSession,
+    previous: Optional[StationCatalog] = None,
+) -> StationCatalog:
+    """
+    Fetches the station lists of all sensor types into a `StationCatalog`, sorted by name.
+
+    Each station is tagged with the `tipo` of the list it came from. A sensor type whose
+    list fails or comes back empty keeps its rows from `previous`; without `previous` it
+    is skipped and the rest are kept, like in `fetch_all_stations`.
+
+    Args:
+        session: The aiohttp client session to use for requests.
+        previous: Catalog to take the rows of failed sensor types from.
+
+    Returns:
+        The fetched catalog.
+    """
+    results = await asyncio.gather(*(fetch_station_list(t, session) for t in SENSOR_TYPES), return_exceptions=True)
+    carried = previous.stations() if previous is not None else []
+    stations: List[Dict[str, Any]] = []
+    for sensor_type, res in zip(SENSOR_TYPES, results):
+        if isinstance(res, Exception) or not res:
+            stations.extend(station for station in carried if station["tipo"] == sensor_type)
+            continue
+        stations.extend(dict(station, tipo=sensor_type) for station in res)
+    stations.sort(key=lambda station: station.get("nombre", ""))
+    return StationCatalog.from_stations(stations)
+
+
+class StationCatalogStore:
+    """
+    Serves the station catalog from an on-disk snapshot and refreshes it in the background.
+
+    A refresh keeps the current rows of any sensor type whose list fails, so a partial
+    outage never saves a catalog with that type missing. An empty catalog (every station
+    list failed and nothing to keep, e.g. while saih.chj.es is down on a cold start) is never
+    saved, and an empty snapshot is treated as missing. After such a failed refresh,
+    another one is attempted every `retry_interval` seconds until one succeeds.
+    """
+    def __init__(self, path: str, max_age: float = 3600.0, retry_interval: float = 60.0):
+        """
+        Args:
+            path: Snapshot file location.
+            max_age: Seconds after which a loaded snapshot is refreshed in the background.
+            retry_interval: Seconds between retries after a refresh returned no stations.
+        """
+        self.path = path
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self.catalog: Optional[StationCatalog] = None
+        self.listeners: List[Callable[[StationCatalog], None]] = []
+        self._refresh_task: Optional["asyncio.Task[StationCatalog]"] = None
+        self._retry_task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self, session: aiohttp.ClientSession) -> StationCatalog:
+        """
+        Returns a catalog as soon as possible.
+
+        A valid snapshot is returned immediately; if it is older than `max_age`, a
+        background refresh is started. Without a usable snapshot, the catalog is fetched
+        before returning (an empty catalog if the upstream is unavailable, with retries
+        scheduled in the background).
+        """
+        try:
+            self.catalog = StationCatalog.load(self.path)
+        except (OSError, ValueError, DataParseError):
+            self.catalog = None
+        if self.catalog is not None and len(self.catalog) == 0:
+            self.catalog = None  # Written by an older version during an outage; unusable.
+        if self.catalog is None:
+            return await self.refresh(session)
+        if self.catalog.age > self.max_age:
+            self.refresh_in_background(session)
+        return self.catalog
+
+    async def refresh(self, session: aiohttp.ClientSession) -> StationCatalog:
+        """
+        Fetches the catalog, saves the snapshot and swaps it in. Listeners are notified.
+
+        Sensor types that fail keep their rows from the current catalog. If no station
+        could be fetched, nothing is saved or swapped, the current catalog (or an empty
+        one) is returned and a retry is scheduled.
+        """
+        catalog = await fetch_station_catalog(session, self.catalog)
+        if len(catalog) == 0:
+            self._schedule_retry(session)
+            return self.catalog if self.catalog is not None else catalog
+        catalog.save(self.path)
+        self.catalog = catalog
+        for listener in self.listeners:
+            listener(catalog)
+        return catalog
+
+    def refresh_in_background(self, session: aiohttp.ClientSession) -> "asyncio.Task[StationCatalog]":
+        """Starts `refresh` as a task, unless one is already running."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh(session))
+        return self._refresh_task
+
+    def _schedule_retry(self, session: aiohttp.ClientSession) -> None:
+        if self._retry_task is None or self._retry_task.done():
+            self._retry_task = asyncio.create_task(self._retry_later(session))
+
+    async def _retry_later(self, session: aiohttp.ClientSession) -> None:
+        await asyncio.sleep(self.retry_interval)
+        self._retry_task = None  # Lets a failed retry schedule the next one.
+        await self.refresh(session)
+
+    async def stop(self) -> None:
+        """Cancels any background refresh or pending retry."""
+        tasks = [task for task in (self._refresh_task, self._retry_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refresh_task = self._retry_task = None
@@ -0,0 +1,157 @@
+"""
+Change feed over the station lists.
+
+Between two refreshes of the station lists usually only `datoActual` and a few
+`estado` fields change. `diff_station_lists` compares two snapshots in one pass keyed by
+station `id`, and `StationChangeFeed` keeps the previous snapshot and yields only the
+differences as an async stream, so consumers handle just what changed.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from .catalog import SENSOR_TYPES
+from .data_fetcher import fetch_station_list
+
+FieldChange = Tuple[Any, Any]
+
+
+@dataclass
+class StationListDiff:
+    """
+    Differences between two station list snapshots.
+
+    Attributes:
+        added: Stations present only in the new snapshot.
+        removed: Stations present only in the old snapshot.
+        changed: Station id to `{field: (old_value, new_value)}` for stations in both
+                 snapshots whose fields differ. Fields missing on one side appear as None.
+        stations: The new snapshot keyed by id, for looking up unchanged fields.
+    """
+    added: List[Dict[str, Any]] = field(default_factory=list)
+    removed: List[Dict[str, Any]] = field(default_factory=list)
+    changed: Dict[Any, Dict[str, FieldChange]] = field(default_factory=dict)
+    stations: Dict[Any, Dict[str, Any]] = field(default_factory=dict, repr=False)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_station_lists(
+    old: Iterable[Dict[str, Any]],
+    new: Iterable[Dict[str, Any]],
+    key: str = "id",
+    ignore_fields: Iterable[str] = (),
+) -> StationListDiff:
+    """
+    Computes per-station field differences between two station lists.
+
+    Args:
+        old: Previous snapshot.
+        new: Current snapshot.
+        key: Field identifying a station. If a list repeats a key, the last entry wins.
+        ignore_fields: Fields whose changes are not reported.
+
+    Returns:
+        A `StationListDiff`.
+    """
+    ignored = set(ignore_fields)
+    remaining = {station.get(key): station for station in old}
+    diff = StationListDiff()
+    for station in new:
+        station_id = station.get(key)
+        diff.stations[station_id] = station
+        previous = remaining.pop(station_id, None)
+        if previous is None:
+            diff.added.append(station)
+            continue
+        if previous == station:
+            continue
+        fields: Dict[str, FieldChange] = {}
+        for name in previous.keys() | station.keys():
+            if name in ignored:
+                continue
+            before, after = previous.get(name), station.get(name)
+            if before != after:
+                fields[name] = (before, after)
+        if fields:
+            diff.changed[station_id] = fields
+    diff.removed.extend(remaining.values())
+    return diff
+
+
+class StationChangeFeed:
+    """
+    Polls the station lists and streams only what changed between refreshes.
+
+    Example:
+        feed = StationChangeFeed(session, interval=300)
+        async for diff in feed.stream():
+            for station_id, fields in diff.changed.items():
+                if "estadoInt" in fields:
+                    ...
+    """
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        interval: float = 300.0,
+        key: str = "id",
+        ignore_fields: Iterable[str] = (),
+        fetch: Optional[Callable[[aiohttp.ClientSession], Awaitable[List[Dict[str, Any]]]]] = None,
+    ):
+        """
+        Args:
+            session: The aiohttp client session to use for requests.
+            interval: Seconds between refreshes in `stream()`.
+            key: Field identifying a station.
+            ignore_fields: Fields whose changes are not reported.
+            fetch: Coroutine function returning the station list. By default each sensor
+                   type's list is fetched with `fetch_station_list`, and a type whose list
+                   fails keeps its stations from the previous refresh.
+        """
+        self.session = session
+        self.interval = interval
+        self.key = key
+        self.ignore_fields = tuple(ignore_fields)
+        self.fetch = fetch or self._fetch_lists
+        self.snapshot: Optional[List[Dict[str, Any]]] = None
+        self._lists: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def _fetch_lists(self, session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
+        """`fetch_all_stations`, but a failed or empty list is replaced by the last good one of that type."""
+        results = await asyncio.gather(*(fetch_station_list(t, session) for t in SENSOR_TYPES), return_exceptions=True)
+        stations: List[Dict[str, Any]] = []
+        for sensor_type, res in zip(SENSOR_TYPES, results):
+            if isinstance(res, Exception) or not res:
+                res = self._lists.get(sensor_type, [])
+            else:
+                self._lists[sensor_type] = res
+            stations.extend(res)
+        stations.sort(key=lambda station: station.get("nombre", ""))
+        return stations
+
+    async def refresh(self) -> StationListDiff:
+        """
+        Fetches the lists once and returns the diff against the previous snapshot.
+
+        The first refresh reports every station as added. With the default fetch, a sensor
+        type whose list fails keeps its previous stations, so a partial outage does not
+        report them as removed and then added again. If the fetch returns no stations at
+        all, the snapshot is kept and an empty diff is returned.
+        """
+        stations = await self.fetch(self.session)
+        if not stations and self.snapshot:
+            return StationListDiff()
+        diff = diff_station_lists(self.snapshot or [], stations, self.key, self.ignore_fields)
+        self.snapshot = stations
+        return diff
+
+    async def stream(self) -> AsyncIterator[StationListDiff]:
+        """Yields non-empty diffs, refreshing every `interval` seconds, until cancelled."""
+        while True:
+            diff = await self.refresh()
+            if diff:
+                yield diff
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,166 @@
+"""
+Columnar representation of parsed sensor series.
+
+`SensorDataParser.extract_data` returns a list of `(datetime, value)` tuples, which is
+convenient to read but expensive to convert for analysis. `SeriesColumns` keeps the same
+series as two typed buffers (`array('q')` of timestamps and `array('d')` of values), built
+straight from the raw API strings, and exposes them to NumPy, Arrow and pandas without
+further copies.
+
+NumPy, pyarrow and pandas are optional; the exports import them on demand.
+
+The modules that analyse these columns (`quality`, `resample`, `metrics`, `correlation`)
+run vectorized with NumPy when it is installed (`pip install chj_saih[numpy]`) and fall
+back to pure Python otherwise, with identical results. Their `use_numpy` argument
+forces either path.
+"""
+import importlib
+import math
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+EPOCH = datetime(1970, 1, 1)
+
+TIMESTAMP_COLUMN = "timestamp"
+VALUE_COLUMN = "value"
+
+
+def require_optional(module: str, feature: str) -> Any:
+    """Imports an optional dependency, raising an ImportError that names the feature needing it."""
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError(
+            f"{feature} requires the optional dependency '{module}'. Install it with: pip install {module}"
+        ) from e
+
+
+class SeriesColumns:
+    """
+    A sensor series stored as two parallel typed buffers, sorted by timestamp.
+
+    Attributes:
+        timestamps (array): `array('q')` of seconds since 1970-01-01, read from the API's
+                            local wall-clock time (no timezone conversion applied).
+        values (array): `array('d')` of readings; NaN where the value was not numeric.
+    """
+    __slots__ = ("timestamps", "values")
+
+    def __init__(self, timestamps: Optional[array] = None, values: Optional[array] = None):
+        self.timestamps: array = timestamps if timestamps is not None else array('q')
+        self.values: array = values if values is not None else array('d')
+        if len(self.timestamps) != len(self.values):
+            raise ValueError("timestamps and values must have the same length.")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SeriesColumns):
+            return NotImplemented
+        return self.timestamps == other.timestamps and all(
+            a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(self.values, other.values))
+
+    def __repr__(self) -> str:
+        return f"SeriesColumns(len={len(self)})"
+
+    @classmethod
+    def from_list(cls, readings: List[Tuple[datetime, Optional[float]]]) -> "SeriesColumns":
+        """Builds columns from `(datetime, value)` tuples; None values become NaN."""
+        nan = math.nan
+        return cls(
+            array('q', [int((dt - EPOCH).total_seconds()) for dt, _ in readings]),
+            array('d', [nan if value is None else value for _, value in readings]),
+        )
+
+    def to_bytes(self) -> Tuple[bytes, bytes]:
+        """The raw buffers, e.g. to send the series to another process."""
+        return self.timestamps.tobytes(), self.values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, timestamps: bytes, values: bytes) -> "SeriesColumns":
+        """Rebuilds columns from the output of `to_bytes` (same machine byte order)."""
+        ts_buffer, value_buffer = array('q'), array('d')
+        ts_buffer.frombytes(timestamps)
+        value_buffer.frombytes(values)
+        return cls(ts_buffer, value_buffer)
+
+    def to_list(self) -> List[Tuple[datetime, Optional[float]]]:
+        """Converts back to the `(datetime, value)` tuples returned by `extract_data`."""
+        return [(EPOCH + timedelta(seconds=ts), None if math.isnan(v) else v)
+                for ts, v in zip(self.timestamps, self.values)]
+
+    def to_numpy(self) -> Tuple[Any, Any]:
+        """
+        Returns NumPy views over the buffers, without copying.
+
+        Returns:
+            A `(timestamps, values)` tuple: a `datetime64[s]` array and a `float64` array.
+        """
+        np = require_optional("numpy", "SeriesColumns.to_numpy()")
+        timestamps = np.frombuffer(self.timestamps, dtype=np.int64).view("datetime64[s]")
+        values = np.frombuffer(self.values, dtype=np.float64)
+        return timestamps, values
+
+    def to_arrow(self) -> Any:
+        """
+        Returns a `pyarrow.Table` with `timestamp` (timestamp[s]) and `value` (float64)
+        columns that wrap the buffers without copying.
+        """
+        pa = require_optional("pyarrow", "SeriesColumns.to_arrow()")
+        n = len(self)
+        timestamps = pa.Array.from_buffers(pa.timestamp("s"), n, [None, pa.py_buffer(self.timestamps)])
+        values = pa.Array.from_buffers(pa.float64(), n, [None, pa.py_buffer(self.values)])
+        return pa.table({TIMESTAMP_COLUMN: timestamps, VALUE_COLUMN: values})
+
+    def to_pandas(self, name: str = VALUE_COLUMN) -> Any:
+        """Returns a `pandas.Series` named `name`, indexed by a `DatetimeIndex`."""
+        pd = require_optional("pandas", "SeriesColumns.to_pandas()")
+        timestamps, values = self.to_numpy()
+        return pd.Series(values, index=pd.DatetimeIndex(timestamps, name=TIMESTAMP_COLUMN), name=name, copy=False)
+
+
+def align_columns(series: Mapping[str, SeriesColumns]) -> Tuple[array, Dict[str, array]]:
+    """
+    Aligns several series on the union of their timestamps, without NumPy.
+
+    Args:
+        series: Mapping of variable name to its series.
+
+    Returns:
+        A `(timestamps, values_by_name)` tuple: the sorted union of timestamps as
+        `array('q')`, and for each name an `array('d')` with NaN where it has no sample.
+    """
+    union = array('q', sorted(set().union(*(s.timestamps for s in series.values()))))
+    position = {ts: i for i, ts in enumerate(union)}
+    nan = float("nan")
+    aligned: Dict[str, array] = {}
+    for name, s in series.items():
+        column = array('d', [nan]) * len(union)
+        for ts, value in zip(s.timestamps, s.values):
+            column[position[ts]] = value
+        aligned[name] = column
+    return union, aligned
+
+
+def to_wide_frame(series: Mapping[str, SeriesColumns]) -> Any:
+    """
+    Builds one wide `pandas.DataFrame` with a column per variable, aligned on timestamps.
+
+    Missing samples are NaN. Alignment is done with NumPy set and search operations
+    over the buffers, one vectorized pass per variable.
+    """
+    np = require_optional("numpy", "to_wide_frame()")
+    pd = require_optional("pandas", "to_wide_frame()")
+    arrays = {name: s.to_numpy() for name, s in series.items()}
+    if arrays:
+        index = np.unique(np.concatenate([ts for ts, _ in arrays.values()]))
+    else:
+        index = np.array([], dtype="datetime64[s]")
+    data = {}
+    for name, (ts, values) in arrays.items():
+        column = np.full(len(index), np.nan)
+        column[np.searchsorted(index, ts)] = values
+        data[name] = column
+    return pd.DataFrame(data, index=pd.DatetimeIndex(index, name=TIMESTAMP_COLUMN))
@@ -3,10 +3,30 @@ Configuration module for the CHJ-SAIH client.
 
 This module stores base URLs for the Confederación Hidrográfica del Júcar (CHJ)
 Sistema Automático de Información Hidrológica (SAIH) API endpoints.
+
+If the environment variable `CHJ_SAIH_PROXY_URL` is set (e.g. "http://127.0.0.1:8765"),
+the library talks to a local `chj_saih-proxy` daemon instead of saih.chj.es. The proxy
+serves the same URL paths, so only the host part of the URLs changes.
 """
+import os
+
+API_PATH = "/chj/saih/stats/datosGrafico"
+"""URL path of the sensor statistical data endpoint."""
+
+STATION_LIST_PATH = "/chj/saih/glayer/listaEstaciones"
+"""URL path of the station list endpoint."""
+
+UPSTREAM_API_URL = f"http://saih.chj.es{API_PATH}"
+"""Upstream saih.chj.es URL for fetching sensor statistical data."""
+
+UPSTREAM_BASE_URL_STATION_LIST = f"https://saih.chj.es{STATION_LIST_PATH}"
+"""Upstream saih.chj.es URL for fetching lists of monitoring stations."""
+
+PROXY_URL = os.environ.get("CHJ_SAIH_PROXY_URL") or None
+"""Base URL of a local caching proxy (`chj_saih-proxy`), or None to query saih.chj.es directly."""
 
-API_URL = "http://saih.chj.es/chj/saih/stats/datosGrafico"
+API_URL = f"{PROXY_URL.rstrip('/')}{API_PATH}" if PROXY_URL else UPSTREAM_API_URL
 """Base URL for fetching sensor statistical data."""
 
-BASE_URL_STATION_LIST = "https://saih.chj.es/chj/saih/glayer/listaEstaciones"
+BASE_URL_STATION_LIST = f"{PROXY_URL.rstrip('/')}{STATION_LIST_PATH}" if PROXY_URL else UPSTREAM_BASE_URL_STATION_LIST
 """Base URL for fetching lists of monitoring stations."""
@@ -0,0 +1,255 @@
+"""
+Lagged cross-correlation between rain gauges and flow sensors.
+
+To estimate flood arrival times, an upstream rain series is correlated with a downstream
+flow series at increasing lags; the lag with the highest correlation approximates the
+travel time. `compute_lag_correlations` evaluates many (rain, flow) pairs at once: the
+series are put on a shared regular grid (see `align_to_grid`) and all pairs are
+correlated in a single batched FFT (a direct sum on the pure-Python path).
+
+`LagCorrelationEngine` keeps a rolling `SensorSeries` per variable and a cached result per
+pair. New data only invalidates the pairs that involve the updated variable, so each
+refresh recomputes just those.
+"""
+import importlib.util
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .columns import SeriesColumns, require_optional
+from .exceptions import InvalidInputError
+from .resample import CadenceType, align_to_grid, resolve_cadence
+from .series import SensorSeries, WindowType
+
+Pair = Tuple[str, str]
+
+
+@dataclass
+class LagCorrelation:
+    """
+    Cross-correlation of one (rain, flow) pair.
+
+    Attributes:
+        rain: Rain gauge variable.
+        flow: Flow sensor variable.
+        cadence: Grid step in seconds; lag k corresponds to k * cadence seconds.
+        correlations: `array('d')` of correlation coefficients for lags 0..max_lag steps
+                      (flow lagging rain); NaN when there is too little data.
+        samples: Grid slots where both series had a value.
+    """
+    rain: str
+    flow: str
+    cadence: int
+    correlations: array
+    samples: int
+
+    @property
+    def best_lag_steps(self) -> Optional[int]:
+        """Lag, in grid steps, with the highest correlation (None without data)."""
+        best = None
+        for k, value in enumerate(self.correlations):
+            if not math.isnan(value) and (best is None or value > self.correlations[best]):
+                best = k
+        return best
+
+    @property
+    def best_lag_seconds(self) -> Optional[int]:
+        steps = self.best_lag_steps
+        return None if steps is None else steps * self.cadence
+
+    @property
+    def correlation(self) -> Optional[float]:
+        """Correlation at the best lag."""
+        steps = self.best_lag_steps
+        return None if steps is None else self.correlations[steps]
+
+
+def _centered(x: List[float], y: List[float]) -> Tuple[List[float], List[float], int]:
+    """Centres both series on their means over the slots where both have a value; others become 0."""
+    valid = [not (math.isnan(a) or math.isnan(b)) for a, b in zip(x, y)]
+    n = sum(valid)
+    if n == 0:
+        return [0.0] * len(x), [0.0] * len(y), 0
+    mean_x = sum(a for a, ok in zip(x, valid) if ok) / n
+    mean_y = sum(b for b, ok in zip(y, valid) if ok) / n
+    return ([a - mean_x if ok else 0.0 for a, ok in zip(x, valid)],
+            [b - mean_y if ok else 0.0 for b, ok in zip(y, valid)], n)
+
+
+def _correlate_python(x: Sequence[float], y: Sequence[float], max_lag: int) -> Tuple[array, int]:
+    cx, cy, n = _centered(list(x), list(y))
+    result = array('d', [math.nan]) * (max_lag + 1)
+    norm = math.sqrt(sum(a * a for a in cx) * sum(b * b for b in cy))
+    if n <= max_lag + 1 or norm == 0:
+        return result, n
+    length = len(cx)
+    for k in range(max_lag + 1):
+        result[k] = sum(cx[t] * cy[t + k] for t in range(length - k)) / norm
+    return result, n
+
+
+def _correlate_numpy(xs: Any, ys: Any, max_lag: int) -> Tuple[Any, Any]:
+    """Batched version: `xs` and `ys` are 2-D (pairs x slots). Returns (correlations, samples)."""
+    np = require_optional("numpy", "compute_lag_correlations(use_numpy=True)")
+    valid = ~(np.isnan(xs) | np.isnan(ys))
+    samples = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = np.where(valid, xs, 0.0).sum(axis=1) / samples
+        mean_y = np.where(valid, ys, 0.0).sum(axis=1) / samples
+        cx = np.where(valid, xs - mean_x[:, None], 0.0)
+        cy = np.where(valid, ys - mean_y[:, None], 0.0)
+        length = xs.shape[1]
+        size = 1 << max(1, (2 * length - 1).bit_length())
+        spectrum = np.conj(np.fft.rfft(cx, size, axis=1)) * np.fft.rfft(cy, size, axis=1)
+        raw = np.fft.irfft(spectrum, size, axis=1)[:, :max_lag + 1]
+        norm = np.sqrt((cx * cx).sum(axis=1) * (cy * cy).sum(axis=1))
+        correlations = raw / norm[:, None]
+    correlations[(samples <= max_lag + 1) | (norm == 0)] = np.nan
+    return correlations, samples
+
+
+def compute_lag_correlations(
+    series: Mapping[str, SeriesColumns],
+    pairs: Iterable[Pair],
+    cadence: CadenceType = "ultimashoras",
+    max_lag: float = 48 * 3600,
+    use_numpy: Optional[bool] = None,
+) -> Dict[Pair, LagCorrelation]:
+    """
+    Lagged cross-correlation for many (rain, flow) pairs.
+
+    Args:
+        series: Series by variable; must contain every variable named in `pairs`.
+        pairs: `(rain_variable, flow_variable)` tuples.
+        cadence: Grid step in seconds, or a `period_grouping`.
+        max_lag: Largest lag to evaluate, in seconds.
+        use_numpy: Force (True) or avoid (False) NumPy. Defaults to NumPy if installed.
+
+    Returns:
+        A `LagCorrelation` per pair. Series are aligned on a shared grid with linear
+        interpolation; coefficients are normalized by the full-series energies.
+
+    Raises:
+        InvalidInputError: If a pair names an unknown variable or `max_lag` is negative.
+    """
+    pairs = list(pairs)
+    step = resolve_cadence(cadence)
+    if max_lag < 0:
+        raise InvalidInputError("max_lag must not be negative.")
+    lag_steps = int(max_lag // step)
+    variables = {variable for pair in pairs for variable in pair}
+    missing = variables.difference(series)
+    if missing:
+        raise InvalidInputError(f"No series for variables: {sorted(missing)}")
+    if not pairs:
+        return {}
+    _, aligned, _ = align_to_grid({v: series[v] for v in variables}, step, "linear", use_numpy=use_numpy)
+    if use_numpy is None:
+        use_numpy = importlib.util.find_spec("numpy") is not None
+
+    results: Dict[Pair, LagCorrelation] = {}
+    if use_numpy:
+        np = require_optional("numpy", "compute_lag_correlations(use_numpy=True)")
+        xs = np.array([np.frombuffer(aligned[rain], dtype=np.float64) for rain, _ in pairs]).reshape(len(pairs), -1)
+        ys = np.array([np.frombuffer(aligned[flow], dtype=np.float64) for _, flow in pairs]).reshape(len(pairs), -1)
+        if xs.shape[1] == 0:
+            correlations = np.full((len(pairs), lag_steps + 1), np.nan)
+            samples = np.zeros(len(pairs), dtype=np.int64)
+        else:
+            correlations, samples = _correlate_numpy(xs, ys, lag_steps)
+            if correlations.shape[1] < lag_steps + 1:
+                padding = np.full((len(pairs), lag_steps + 1 - correlations.shape[1]), np.nan)
+                correlations = np.concatenate((correlations, padding), axis=1)
+        for i, pair in enumerate(pairs):
+            row = array('d')
+            row.frombytes(np.ascontiguousarray(correlations[i]).tobytes())
+            results[pair] = LagCorrelation(pair[0], pair[1], step, row, int(samples[i]))
+    else:
+        for rain, flow in pairs:
+            row, samples_count = _correlate_python(aligned[rain], aligned[flow], lag_steps)
+            results[(rain, flow)] = LagCorrelation(rain, flow, step, row, samples_count)
+    return results
+
+
+def subcuenca_pairs(stations: Iterable[Dict[str, Any]]) -> List[Pair]:
+    """
+    Every (rain gauge, flow sensor) variable pair sharing a `subcuenca`.
+
+    Stations need `tipo` ('p' rain, 'a' flow), as in `StationCatalog.stations()`.
+    """
+    rain: Dict[Any, List[str]] = {}
+    flow: Dict[Any, List[str]] = {}
+    for station in stations:
+        subcuenca, variable = station.get("subcuenca"), station.get("variable")
+        if subcuenca is None or not variable:
+            continue
+        if station.get("tipo") == "p":
+            rain.setdefault(subcuenca, []).append(variable)
+        elif station.get("tipo") == "a":
+            flow.setdefault(subcuenca, []).append(variable)
+    return [(r, f) for subcuenca in rain if subcuenca in flow for r in rain[subcuenca] for f in flow[subcuenca]]
+
+
+class LagCorrelationEngine:
+    """
+    Rolling series per variable with per-pair cached lag correlations.
+
+    Attributes:
+        pairs (List[Pair]): Registered (rain, flow) pairs.
+        series (Dict[str, SensorSeries]): Rolling series by variable.
+    """
+    def __init__(
+        self,
+        cadence: CadenceType = "ultimashoras",
+        max_lag: float = 48 * 3600,
+        history: Optional[float] = 30 * 86400,
+        use_numpy: Optional[bool] = None,
+    ):
+        """
+        Args:
+            cadence: Grid step in seconds, or a `period_grouping`.
+            max_lag: Largest lag to evaluate, in seconds.
+            history: Seconds of data kept per variable (None keeps everything).
+            use_numpy: Force (True) or avoid (False) NumPy.
+        """
+        self.cadence = resolve_cadence(cadence)
+        self.max_lag = max_lag
+        self.history = history
+        self.use_numpy = use_numpy
+        self.pairs: List[Pair] = []
+        self.series: Dict[str, SensorSeries] = {}
+        self._versions: Dict[str, int] = {}
+        self._cache: Dict[Pair, Tuple[Tuple[int, int], LagCorrelation]] = {}
+
+    def add_pair(self, rain: str, flow: str) -> None:
+        if (rain, flow) not in self.pairs:
+            self.pairs.append((rain, flow))
+        for variable in (rain, flow):
+            if variable not in self.series:
+                self.series[variable] = SensorSeries(max_age=self.history)
+                self._versions[variable] = 0
+
+    def remove_pair(self, rain: str, flow: str) -> None:
+        if (rain, flow) in self.pairs:
+            self.pairs.remove((rain, flow))
+        self._cache.pop((rain, flow), None)
+
+    def update(self, variable: str, window: WindowType) -> None:
+        """Merges new readings of a variable, invalidating the pairs that use it."""
+        if variable not in self.series:
+            raise InvalidInputError(f"Variable '{variable}' is not part of any pair.")
+        self.series[variable].merge(window)
+        self._versions[variable] += 1
+
+    def results(self) -> Dict[Pair, LagCorrelation]:
+        """Correlations for every pair, recomputing only pairs whose series changed."""
+        stale = [pair for pair in self.pairs
+                 if pair not in self._cache or self._cache[pair][0] != (self._versions[pair[0]], self._versions[pair[1]])]
+        if stale:
+            variables = {variable for pair in stale for variable in pair}
+            fresh = compute_lag_correlations({v: self.series[v].to_columns() for v in variables}, stale,
+                                             self.cadence, self.max_lag, self.use_numpy)
+            for pair, result in fresh.items():
+                self._cache[pair] = ((self._versions[pair[0]], self._versions[pair[1]]), result)
+        return {pair: self._cache[pair][1] for pair in self.pairs}
@@ -7,6 +7,9 @@ This module provides asynchronous functions to retrieve:
 
 It uses `aiohttp` for HTTP requests and handles API-specific errors
 by raising custom exceptions defined in `chj_saih.exceptions`.
+
+`CHJSAIHClient` (in `client.py`) exposes the same functions as methods of an object that
+owns the session, base URLs and optional cache, rate limiter and metrics.
 """
 import asyncio
 import aiohttp
@@ -14,7 +17,7 @@ from geopy.distance import geodesic # type: ignore[import-untyped]
 from typing import List, Dict, Any, Optional, Literal
 
 from .config import BASE_URL_STATION_LIST, API_URL
-from .exceptions import APIError, InvalidInputError
+from .exceptions import APIError, DeadlineExceededError, InvalidInputError
 
 # Define valid sensor type literals for better type hinting
 SensorTypeLiteral = Literal['a', 't', 'e', 'p']
@@ -22,7 +25,23 @@ SensorTypeAllLiteral = Literal['a', 't', 'e', 'p', 'all']
 ComparisonLiteral = Literal["equal", "greater_equal"]
 
 
-async def fetch_station_list(sensor_type: SensorTypeLiteral, session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
+async def get_json(session: aiohttp.ClientSession, url: str, timeout: Optional[float] = None) -> Any:
+    """GETs `url` and decodes the JSON body, cancelling the request after `timeout` seconds."""
+    async def _request() -> Any:
+        async with session.get(url) as response:
+            response.raise_for_status()  # Raises ClientResponseError for 4xx/5xx
+            return await response.json()
+
+    if timeout is None:
+        return await _request()
+    return await asyncio.wait_for(_request(), timeout)
+
+
+async def fetch_station_list(
+    sensor_type: SensorTypeLiteral,
+    session: aiohttp.ClientSession,
+    timeout: Optional[float] = None
+) -> List[Dict[str, Any]]:
     """
     Fetches a list of monitoring stations for a specific sensor type, sorted alphabetically by name.
 
@@ -30,40 +49,43 @@ async def fetch_station_list(sensor_type: SensorTypeLiteral, session: aiohttp.Cl
         sensor_type: Type of sensor ('a' for flow, 't' for temperature,
                        'e' for reservoir, 'p' for rain gauge).
         session: The aiohttp client session to use for the request.
+        timeout: Seconds after which the request is cancelled. None waits indefinitely.
 
     Returns:
         A list of dictionaries, where each dictionary represents a station
         with its details (id, latitude, longitude, name, etc.).
 
     Raises:
+        DeadlineExceededError: If the request does not complete within `timeout`.
         APIError: If there's an issue communicating with the API or the API
                   returns an error status.
     """
     url = f"{BASE_URL_STATION_LIST}?t={sensor_type}&id="
     try:
-        async with session.get(url) as response:
-            response.raise_for_status()  # Raises ClientResponseError for 4xx/5xx
-            stations_data: List[Dict[str, Any]] = await response.json()
-            # It's good practice to sort by a consistent key if the API doesn't guarantee order
-            stations_data.sort(key=lambda station: station.get("nombre", ""))
-            return stations_data
+        stations_data: List[Dict[str, Any]] = await get_json(session, url, timeout)
+        # It's good practice to sort by a consistent key if the API doesn't guarantee order
+        stations_data.sort(key=lambda station: station.get("nombre", ""))
+        return stations_data
     except aiohttp.ClientResponseError as e:
         raise APIError(f"Failed to fetch station list for type '{sensor_type}'. Status code: {e.status}, Message: {e.message}") from e
     except aiohttp.ClientError as e: # Catches other client errors like connection issues
         raise APIError(f"Client error while fetching station list for type '{sensor_type}': {e}") from e
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceededError(f"Fetching station list for type '{sensor_type}' exceeded the {timeout}s deadline.") from e
     except Exception as e: # Catch potential other errors like JSONDecodeError
         raise APIError(f"An unexpected error occurred while fetching station list for type '{sensor_type}': {e}") from e
 
 
-async def fetch_all_stations(session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
+async def fetch_all_stations(session: aiohttp.ClientSession, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Fetches and combines lists of all stations from all sensor types, sorted alphabetically by name.
 
-    Handles partial failures: if fetching for one sensor type fails, it will be skipped,
-    and data from other types will still be returned.
+    Handles partial failures: if fetching for one sensor type fails (including a request
+    that exceeds `timeout`), it will be skipped, and data from other types will still be returned.
 
     Args:
         session: The aiohttp client session to use for requests.
+        timeout: Seconds after which each request is cancelled. None waits indefinitely.
 
     Returns:
         A list of dictionaries, where each dictionary represents a station,
@@ -72,7 +94,7 @@ async def fetch_all_stations(session: aiohttp.ClientSession) -> List[Dict[str, A
     sensor_types: List[SensorTypeLiteral] = ['a', 't', 'e', 'p']
     all_stations: List[Dict[str, Any]] = []
 
-    tasks = [fetch_station_list(sensor_type, session) for sensor_type in sensor_types]
+    tasks = [fetch_station_list(sensor_type, session, timeout) for sensor_type in sensor_types]
     results = await asyncio.gather(*tasks, return_exceptions=True)
 
     for res in results:
@@ -91,7 +113,8 @@ async def fetch_sensor_data(
     variable: str,
     period_grouping: str = "ultimos5minutales",
     num_values: int = 30,
-    session: aiohttp.ClientSession = None  # Making session optional for direct calls, though typically managed outside
+    session: aiohttp.ClientSession = None,  # Making session optional for direct calls, though typically managed outside
+    timeout: Optional[float] = None
 ) -> List[Any]: # The API returns a list with mixed types: [metadata_dict, values_list, time_info_dict]
     """
     Fetches raw sensor data from the API for a given variable.
@@ -102,12 +125,14 @@ async def fetch_sensor_data(
                          Defaults to "ultimos5minutales".
         num_values: Number of data values to retrieve. Defaults to 30.
         session: The aiohttp client session. If None, a new one is created internally (not recommended for multiple calls).
+        timeout: Seconds after which the request is cancelled. None waits indefinitely.
 
     Returns:
         A list containing raw sensor data, typically structured as:
         [metadata_dict, list_of_value_tuples, time_info_dict].
 
     Raises:
+        DeadlineExceededError: If the request does not complete within `timeout`.
         APIError: If there's an issue communicating with the API or the API
                   returns an error status.
     """
@@ -121,15 +146,15 @@ async def fetch_sensor_data(
         _session_managed_internally = True
 
     try:
-        async with session.get(url) as response:
-            response.raise_for_status()
-            # Assuming the API returns a list, but could be Dict if error JSON
-            data: List[Any] = await response.json()
-            return data
+        # Assuming the API returns a list, but could be Dict if error JSON
+        data: List[Any] = await get_json(session, url, timeout)
+        return data
     except aiohttp.ClientResponseError as e:
         raise APIError(f"Failed to fetch sensor data for variable '{variable}'. Status code: {e.status}, Message: {e.message}") from e
     except aiohttp.ClientError as e:
         raise APIError(f"Client error while fetching sensor data for variable '{variable}': {e}") from e
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceededError(f"Fetching sensor data for variable '{variable}' exceeded the {timeout}s deadline.") from e
     except Exception as e: # Catch potential other errors like JSONDecodeError
         raise APIError(f"An unexpected error occurred while fetching sensor data for variable '{variable}': {e}") from e
     finally:
@@ -141,7 +166,8 @@ async def fetch_stations_by_risk(
     sensor_type: SensorTypeAllLiteral = "e",
     risk_level: int = 2,
     comparison: ComparisonLiteral = "greater_equal",
-    session: aiohttp.ClientSession = None # Made optional for consistency, though required by fetch_station_list
+    session: aiohttp.ClientSession = None, # Made optional for consistency, though required by fetch_station_list
+    timeout: Optional[float] = None
 ) -> List[Dict[str, Any]]:
     """
     Fetches stations of a specific type (or all types) that meet a specified risk level.
@@ -151,6 +177,7 @@ async def fetch_stations_by_risk(
         risk_level: Risk level integer (0: unknown, 1: green, 2: yellow, 3: red). Defaults to 2.
         comparison: How to compare with risk_level ("equal" or "greater_equal"). Defaults to "greater_equal".
         session: The aiohttp client session. If None, a new one is created (not recommended).
+        timeout: Seconds after which each request is cancelled. None waits indefinitely.
 
     Returns:
         A list of station dictionaries matching the criteria. Returns an empty list if
@@ -158,6 +185,7 @@ async def fetch_stations_by_risk(
 
     Raises:
         InvalidInputError: If sensor_type, risk_level, or comparison are invalid.
+        DeadlineExceededError: If the request for a single `sensor_type` exceeds `timeout`.
         APIError: If an underlying call to `fetch_station_list` fails for a reason other than
                   a standard HTTP error code (which `fetch_station_list` handles by raising APIError,
                   then caught and logged here if not re-raised by `fetch_station_list`).
@@ -190,7 +218,7 @@ async def fetch_stations_by_risk(
     try:
         for st in target_sensor_types:
             try:
-                current_stations = await fetch_station_list(st, session)
+                current_stations = await fetch_station_list(st, session, timeout)
                 if current_stations:
                     for station in current_stations:
                         station_risk = station.get("estadoInt")
@@ -218,7 +246,8 @@ async def fetch_station_list_by_location(
     lon: float,
     sensor_type: SensorTypeAllLiteral = "all",
     radius_km: float = 50.0,
-    session: aiohttp.ClientSession = None # Made optional
+    session: aiohttp.ClientSession = None, # Made optional
+    timeout: Optional[float] = None
 ) -> List[Dict[str, Any]]:
     """
     Fetches stations within a given radius (km) from a central latitude/longitude.
@@ -229,6 +258,7 @@ async def fetch_station_list_by_location(
         sensor_type: Sensor type ('a', 't', 'e', 'p', or 'all'). Defaults to 'all'.
         radius_km: Radius in kilometers. Defaults to 50.0.
         session: The aiohttp client session. If None, a new one is created (not recommended).
+        timeout: Seconds after which each request is cancelled. None waits indefinitely.
 
     Returns:
         A list of station dictionaries within the radius, sorted by name.
@@ -236,6 +266,7 @@ async def fetch_station_list_by_location(
 
     Raises:
         InvalidInputError: If sensor_type is invalid.
+        DeadlineExceededError: If a request for a single `sensor_type` exceeds `timeout`.
         APIError: If an underlying API call fails.
     """
     valid_sensor_types_set: set[SensorTypeAllLiteral] = {"t", "a", "p", "e", "all"}
@@ -260,9 +291,7 @@ async def fetch_station_list_by_location(
         for s_type in target_sensor_types:
             url = f"{BASE_URL_STATION_LIST}?t={s_type}&id="
             try:
-                async with await session.get(url) as response:
-                    response.raise_for_status()
-                    data: List[Dict[str, Any]] = await response.json()
+                data: List[Dict[str, Any]] = await get_json(session, url, timeout)
                 for station_data in data:
                     s_lat = station_data.get("latitud")
                     s_lon = station_data.get("longitud")
@@ -294,6 +323,9 @@ async def fetch_station_list_by_location(
                     raise APIError(f"Client error for type '{s_type}' in by_location: {e}") from e
                 # else:
                 #    print(f"ClientError for type '{s_type}' in by_location: {e}, skipping.")
+            except asyncio.TimeoutError as e:
+                if sensor_type != 'all':
+                    raise DeadlineExceededError(f"Fetching station list for type '{s_type}' exceeded the {timeout}s deadline.") from e
             except Exception as e:
                 if sensor_type != 'all':
                     raise APIError(f"Unexpected error for type '{s_type}' in by_location: {e}") from e
@@ -311,7 +343,8 @@ async def fetch_station_list_by_location(
 async def fetch_stations_by_subcuenca(
     subcuenca_id: int,
     sensor_type: SensorTypeAllLiteral = "all",
-    session: aiohttp.ClientSession = None # Made optional
+    session: aiohttp.ClientSession = None, # Made optional
+    timeout: Optional[float] = None
 ) -> List[Dict[str, Any]]:
     """
     Fetches stations in a specific sub-basin (subcuenca), optionally filtered by sensor type.
@@ -320,12 +353,14 @@ async def fetch_stations_by_subcuenca(
         subcuenca_id: The ID of the sub-basin.
         sensor_type: Sensor type ('t', 'a', 'p', 'e', or 'all'). Defaults to 'all'.
         session: The aiohttp client session. If None, a new one is created (not recommended).
+        timeout: Seconds after which each request is cancelled. None waits indefinitely.
 
     Returns:
         A list of station dictionaries in the specified sub-basin, sorted by name.
 
     Raises:
         InvalidInputError: If sensor_type is invalid.
+        DeadlineExceededError: If a request for a single `sensor_type` exceeds `timeout`.
         APIError: If an underlying API call fails.
     """
     valid_sensor_types_list: List[SensorTypeAllLiteral] = ["t", "a", "p", "e", "all"]
@@ -349,10 +384,7 @@ async def fetch_stations_by_subcuenca(
         for stype in target_sensor_types:
             url = f"{BASE_URL_STATION_LIST}?t={stype}&id="
             try:
-                async with await session.get(url) as response:
-                    response.raise_for_status()
-                    data: List[Dict[str, Any]] = await response.json()
-
+                data: List[Dict[str, Any]] = await get_json(session, url, timeout)
                 for station_data in data:
                     if station_data.get("subcuenca") == subcuenca_id:
                         stations_in_subcuenca.append(station_data)
@@ -366,6 +398,9 @@ async def fetch_stations_by_subcuenca(
                     raise APIError(f"Client error for type '{stype}' in by_subcuenca: {e}") from e
                 # else:
                 #    print(f"ClientError for type '{stype}' in by_subcuenca: {e}, skipping.")
+            except asyncio.TimeoutError as e:
+                if sensor_type != 'all':
+                    raise DeadlineExceededError(f"Fetching stations for type '{stype}' exceeded the {timeout}s deadline.") from e
             except Exception as e:
                 if sensor_type != 'all':
                     raise APIError(f"Unexpected error for type '{stype}' in by_subcuenca: {e}") from e
@@ -6,6 +6,10 @@ class APIError(CHJSAIHError):
     """Raised when there's an error communicating with the API."""
     pass
 
+class DeadlineExceededError(APIError):
+    """Raised when a request or a batch of requests does not complete before its deadline."""
+    pass
+
 class DataParseError(CHJSAIHError):
     """Raised when there's an error parsing data from the API."""
     pass
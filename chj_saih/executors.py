@@ -0,0 +1,196 @@
+"""
+Executor strategies for parsing sensor payloads off the event loop.
+
+`Sensor.get_data` parses the response inline, which is fine for a few dozen values but
+blocks every other coroutine (Home Assistant's loop included) for large `ultimoanno` or
+backfill payloads. `ParseExecutor` decides where each payload is parsed:
+
+- "inline": on the event loop, for payloads cheaper than a scheduling round-trip.
+- "thread": in a thread pool, keeping the loop responsive.
+- "process": in a process pool, for big backfills. Workers send the result back as raw
+  `array` buffers (see `SeriesColumns.to_bytes`) instead of pickled datetime tuples.
+  `parse_columns` wraps those buffers as they are; `parse_data` rebuilds its datetime
+  tuples from them in the thread pool, so the loop only ever copies buffers.
+- "auto": picks one of the above from the payload size and a running estimate of the
+  parse cost per value, measured on previous calls.
+
+The time spent per strategy is reported in `ParseExecutor.stats`.
+"""
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Literal, Optional, Tuple, TYPE_CHECKING
+
+from .columns import SeriesColumns
+from .exceptions import InvalidInputError
+
+if TYPE_CHECKING:
+    from .sensors import RawSensorDataType, Sensor
+
+ExecutorStrategyLiteral = Literal["inline", "thread", "process", "auto"]
+
+CALIBRATION_ITEMS = 256
+"""Payloads up to this many values are parsed inline while no cost estimate exists yet."""
+
+_EncodedData = Dict[str, Any]
+
+
+def _payload_size(raw_data: Any) -> int:
+    """Number of values in a raw `datosGrafico` payload (0 if malformed)."""
+    try:
+        return len(raw_data[1])
+    except (TypeError, IndexError, KeyError):
+        return 0
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _parse_data_encoded(sensor: "Sensor", raw_data: "RawSensorDataType") -> _EncodedData:
+    """Process worker: parses and encodes every series as raw buffers."""
+    parsed = sensor.parse_data(raw_data)
+    return {key: SeriesColumns.from_list(value).to_bytes() if isinstance(value, list) else value
+            for key, value in parsed.items()}
+
+
+def _decode_data(encoded: _EncodedData) -> Dict[str, Any]:
+    return {key: SeriesColumns.from_bytes(*value).to_list() if isinstance(value, tuple) else value
+            for key, value in encoded.items()}
+
+
+def _parse_columns_encoded(sensor: "Sensor", raw_data: "RawSensorDataType") -> Tuple[bytes, bytes]:
+    """Process worker: parses into columns and returns their raw buffers."""
+    return sensor.parse_columns(raw_data).to_bytes()
+
+
+@dataclass
+class StrategyStats:
+    """Time spent parsing with one strategy, as seen by the awaiting coroutine."""
+    calls: int = 0
+    items: int = 0
+    seconds: float = 0.0
+
+
+class ParseExecutor:
+    """
+    Runs `Sensor.parse_data` / `Sensor.parse_columns` inline, in threads or in processes.
+
+    Attributes:
+        strategy (str): "inline", "thread", "process" or "auto".
+        stats (Dict[str, StrategyStats]): Calls, values and seconds per strategy used.
+        seconds_per_item (Optional[float]): Running estimate of the inline parse cost per value.
+    """
+    def __init__(
+        self,
+        strategy: ExecutorStrategyLiteral = "auto",
+        max_workers: Optional[int] = None,
+        inline_budget: float = 0.002,
+        process_budget: Optional[float] = None,
+    ):
+        """
+        Args:
+            strategy: Where to parse; "auto" chooses per payload.
+            max_workers: Size of the thread or process pool (executor default if None).
+            inline_budget: In "auto", payloads estimated to parse faster than this many
+                           seconds run inline; larger ones go to the thread pool.
+            process_budget: In "auto", payloads estimated to take longer than this many
+                            seconds go to the process pool. None never uses processes.
+        """
+        if strategy not in ("inline", "thread", "process", "auto"):
+            raise InvalidInputError(f"Invalid executor strategy '{strategy}'. Use 'inline', 'thread', 'process' or 'auto'.")
+        self.strategy = strategy
+        self.max_workers = max_workers
+        self.inline_budget = inline_budget
+        self.process_budget = process_budget
+        self.seconds_per_item: Optional[float] = None
+        self.stats: Dict[str, StrategyStats] = {}
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    def choose(self, items: int) -> str:
+        """The strategy used for a payload of `items` values."""
+        if self.strategy != "auto":
+            return self.strategy
+        if self.seconds_per_item is None:
+            return "inline" if items <= CALIBRATION_ITEMS else "thread"
+        estimate = items * self.seconds_per_item
+        if estimate < self.inline_budget:
+            return "inline"
+        if self.process_budget is not None and estimate > self.process_budget:
+            return "process"
+        return "thread"
+
+    def _observe(self, items: int, parse_seconds: float) -> None:
+        if items <= 0:
+            return
+        sample = parse_seconds / items
+        if self.seconds_per_item is None:
+            self.seconds_per_item = sample
+        else:
+            self.seconds_per_item = 0.8 * self.seconds_per_item + 0.2 * sample
+
+    def _pool(self, strategy: str) -> Executor:
+        if strategy == "process":
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(self.max_workers)
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.max_workers, thread_name_prefix="chj_saih-parse")
+        return self._threads
+
+    async def _run(
+        self,
+        func: Callable[..., Any],
+        encoded: Callable[..., Any],
+        sensor: "Sensor",
+        raw_data: Any,
+        decode: Optional[Callable[[Any], Any]] = None
+    ) -> Tuple[str, Any]:
+        items = _payload_size(raw_data)
+        strategy = self.choose(items)
+        start = time.perf_counter()
+        if strategy == "inline":
+            result, parse_seconds = _timed(func, raw_data)
+        elif strategy == "thread":
+            loop = asyncio.get_running_loop()
+            result, parse_seconds = await loop.run_in_executor(self._pool("thread"), _timed, func, raw_data)
+        else:
+            loop = asyncio.get_running_loop()
+            result, parse_seconds = await loop.run_in_executor(self._pool("process"), _timed, encoded, sensor, raw_data)
+            if decode is not None:
+                result = await loop.run_in_executor(self._pool("thread"), decode, result)
+        if strategy != "process":
+            self._observe(items, parse_seconds)  # Process timings include encoding; keep the estimate inline-based.
+        stats = self.stats.setdefault(strategy, StrategyStats())
+        stats.calls += 1
+        stats.items += items
+        stats.seconds += time.perf_counter() - start
+        return strategy, result
+
+    async def parse_data(self, sensor: "Sensor", raw_data: "RawSensorDataType") -> Dict[str, Any]:
+        """Equivalent to `sensor.parse_data(raw_data)`, run with the chosen strategy."""
+        _, result = await self._run(sensor.parse_data, _parse_data_encoded, sensor, raw_data, _decode_data)
+        return result
+
+    async def parse_columns(self, sensor: "Sensor", raw_data: "RawSensorDataType") -> SeriesColumns:
+        """Equivalent to `sensor.parse_columns(raw_data)`, run with the chosen strategy."""
+        strategy, result = await self._run(sensor.parse_columns, _parse_columns_encoded, sensor, raw_data)
+        return SeriesColumns.from_bytes(*result) if strategy == "process" else result
+
+    def close(self) -> None:
+        """Shuts the pools down."""
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self._threads = None
+        self._processes = None
+
+    def __enter__(self) -> "ParseExecutor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,283 @@
+"""
+Spatial queries over station coordinates.
+
+`fetch_station_list_by_location` only answers "stations within a radius of a point", and
+computes a geodesic distance to every station on each call. `StationGeoIndex` buckets the
+catalog once into a regular latitude/longitude grid, so bounding-box and polygon queries
+(municipalities, flood zones...) only look at the grid cells they overlap. For polygons,
+cells crossed by the outline are tested station by station; every other cell is classified
+with a single point-in-polygon test on its centre.
+
+Nearest-station queries search rings of cells outwards from the query point and stop as
+soon as no unvisited cell can hold a closer station. They rank and report great-circle
+(haversine) distances.
+"""
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from .catalog import StationCatalog
+from .exceptions import InvalidInputError
+
+LatLon = Tuple[float, float]
+Polygon = Sequence[LatLon]
+"""Polygon vertices as (latitude, longitude) pairs; the ring is closed implicitly."""
+
+Cell = Tuple[int, int]
+CellBounds = Tuple[int, int, int, int]
+"""Occupied grid extent as (min row, min col, max row, max col)."""
+
+EARTH_RADIUS_KM = 6371.0088
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km on a spherical Earth."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def station_coordinates(station: Dict[str, Any]) -> Optional[LatLon]:
+    """
+    Returns a station's (lat, lon), accepting both API keys ('latitud'/'longitud')
+    and `fetch_station_list_by_location` keys ('lat'/'lon'). None if missing.
+    """
+    lat = station.get("latitud", station.get("lat"))
+    lon = station.get("longitud", station.get("lon"))
+    if isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and not (math.isnan(lat) or math.isnan(lon)):
+        return float(lat), float(lon)
+    return None
+
+
+def point_in_polygon(lat: float, lon: float, polygon: Polygon) -> bool:
+    """Ray-casting point-in-polygon test in (lat, lon) coordinates."""
+    inside = False
+    n = len(polygon)
+    j = n - 1
+    for i in range(n):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing_lon = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if lon < crossing_lon:
+                inside = not inside
+        j = i
+    return inside
+
+
+class StationGeoIndex:
+    """
+    Regular-grid index over station coordinates.
+
+    Attributes:
+        stations (List[Dict[str, Any]]): Indexed stations (those with valid coordinates).
+        cell_size (float): Grid cell size in degrees.
+    """
+    def __init__(self, stations: Iterable[Dict[str, Any]], cell_size: float = 0.1):
+        """
+        Args:
+            stations: Station dictionaries, e.g. from `fetch_all_stations` or `StationCatalog.stations()`.
+                      Stations without coordinates are ignored.
+            cell_size: Grid cell size in degrees (0.1° is roughly 11 km of latitude).
+        """
+        if cell_size <= 0:
+            raise InvalidInputError("cell_size must be positive.")
+        self.cell_size = cell_size
+        self.stations: List[Dict[str, Any]] = []
+        self._coords: List[LatLon] = []
+        self._grid: Dict[Cell, List[int]] = {}
+        self._type_grids: Dict[str, Dict[Cell, List[int]]] = {}
+        for station in stations:
+            coords = station_coordinates(station)
+            if coords is None:
+                continue
+            index = len(self.stations)
+            self.stations.append(station)
+            self._coords.append(coords)
+            cell = self._cell(*coords)
+            self._grid.setdefault(cell, []).append(index)
+            sensor_type = station.get("tipo")
+            if sensor_type is not None:
+                self._type_grids.setdefault(sensor_type, {}).setdefault(cell, []).append(index)
+        self._bounds: Dict[Optional[str], CellBounds] = {
+            sensor_type: (min(row for row, _ in grid), min(col for _, col in grid),
+                          max(row for row, _ in grid), max(col for _, col in grid))
+            for sensor_type, grid in [(None, self._grid), *self._type_grids.items()] if grid
+        }
+
+    @classmethod
+    def from_catalog(cls, catalog: StationCatalog, cell_size: float = 0.1) -> "StationGeoIndex":
+        """Builds an index over a `StationCatalog`."""
+        return cls(catalog.stations(), cell_size)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def _occupied_cells(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> Iterable[Cell]:
+        """Occupied grid cells overlapping a bounding box."""
+        row0, col0 = self._cell(min_lat, min_lon)
+        row1, col1 = self._cell(max_lat, max_lon)
+        if (row1 - row0 + 1) * (col1 - col0 + 1) <= len(self._grid):
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    if (row, col) in self._grid:
+                        yield (row, col)
+        else:
+            for row, col in self._grid:
+                if row0 <= row <= row1 and col0 <= col <= col1:
+                    yield (row, col)
+
+    def query_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Dict[str, Any]]:
+        """
+        Stations inside a latitude/longitude bounding box (edges included).
+
+        Raises:
+            InvalidInputError: If the minimum exceeds the maximum on either axis.
+        """
+        if min_lat > max_lat or min_lon > max_lon:
+            raise InvalidInputError("Invalid bounding box: minimum greater than maximum.")
+        found = []
+        for cell in self._occupied_cells(min_lat, min_lon, max_lat, max_lon):
+            for index in self._grid[cell]:
+                lat, lon = self._coords[index]
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    found.append(index)
+        found.sort()
+        return [self.stations[i] for i in found]
+
+    def _boundary_cells(self, polygon: Polygon) -> Set[Cell]:
+        """Cells the polygon outline may cross (conservative: includes neighbours of sampled cells)."""
+        cells: Set[Cell] = set()
+        step = self.cell_size / 2
+        n = len(polygon)
+        for i in range(n):
+            lat_a, lon_a = polygon[i]
+            lat_b, lon_b = polygon[(i + 1) % n]
+            samples = max(1, math.ceil(max(abs(lat_b - lat_a), abs(lon_b - lon_a)) / step))
+            for k in range(samples + 1):
+                t = k / samples
+                row, col = self._cell(lat_a + (lat_b - lat_a) * t, lon_a + (lon_b - lon_a) * t)
+                for d_row in (-1, 0, 1):
+                    for d_col in (-1, 0, 1):
+                        cells.add((row + d_row, col + d_col))
+        return cells
+
+    def _polygon_indices(self, polygon: Polygon) -> List[int]:
+        if len(polygon) < 3:
+            raise InvalidInputError("A polygon needs at least 3 vertices.")
+        lats = [p[0] for p in polygon]
+        lons = [p[1] for p in polygon]
+        boundary = self._boundary_cells(polygon)
+        found: List[int] = []
+        for cell in self._occupied_cells(min(lats), min(lons), max(lats), max(lons)):
+            members = self._grid[cell]
+            if cell in boundary:
+                found.extend(i for i in members if point_in_polygon(*self._coords[i], polygon))
+            else:
+                row, col = cell
+                if point_in_polygon((row + 0.5) * self.cell_size, (col + 0.5) * self.cell_size, polygon):
+                    found.extend(members)
+        found.sort()
+        return found
+
+    def query_polygon(self, polygon: Polygon) -> List[Dict[str, Any]]:
+        """
+        Stations inside a polygon given as (lat, lon) vertices.
+
+        Raises:
+            InvalidInputError: If the polygon has fewer than 3 vertices.
+        """
+        return [self.stations[i] for i in self._polygon_indices(polygon)]
+
+    def query_polygons(self, zones: Mapping[str, Polygon]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Batch polygon query.
+
+        Args:
+            zones: Mapping of zone name to polygon.
+
+        Returns:
+            Mapping of zone name to the stations inside it (a station may be in several zones).
+        """
+        return {name: self.query_polygon(polygon) for name, polygon in zones.items()}
+
+    def _ring(self, center: Cell, radius: int) -> Iterable[Cell]:
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for d_col in range(-radius, radius + 1):
+            yield (row - radius, col + d_col)
+            yield (row + radius, col + d_col)
+        for d_row in range(-radius + 1, radius):
+            yield (row + d_row, col - radius)
+            yield (row + d_row, col + radius)
+
+    def nearest_stations(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 1,
+        sensor_type: Optional[str] = None,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        The `k` stations closest to a point, optionally of one sensor type.
+
+        Args:
+            lat: Latitude of the query point.
+            lon: Longitude of the query point.
+            k: Number of stations to return.
+            sensor_type: Station type ('a', 't', 'e', 'p') to restrict to, matched against
+                         the station's 'tipo' (set by `fetch_station_catalog`). None for any type.
+
+        Returns:
+            Up to `k` `(station, distance_km)` tuples ordered by distance. Distances are
+            great-circle (`haversine_km`), within about 0.5% of the geodesic distances of
+            `fetch_station_list_by_location`.
+
+        Raises:
+            InvalidInputError: If `k` is not positive.
+        """
+        if k <= 0:
+            raise InvalidInputError("k must be a positive integer.")
+        grid = self._grid if sensor_type is None else self._type_grids.get(sensor_type, {})
+        if not grid:
+            return []
+        center = self._cell(lat, lon)
+        min_row, min_col, max_row, max_col = self._bounds[sensor_type]
+        max_radius = max(abs(min_row - center[0]), abs(max_row - center[0]),
+                         abs(min_col - center[1]), abs(max_col - center[1]))
+        best: List[Tuple[float, int]] = []  # max-heap of (-distance, index)
+        for radius in range(max_radius + 1):
+            for cell in self._ring(center, radius):
+                for index in grid.get(cell, ()):
+                    s_lat, s_lon = self._coords[index]
+                    distance = haversine_km(lat, lon, s_lat, s_lon)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, index))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, index))
+            if len(best) == k:
+                # Any station beyond this ring is at least `radius` whole cells away on one axis.
+                widest_lat = min(89.9, abs(lat) + (radius + 1) * self.cell_size)
+                min_degrees_km = _KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+                if radius * self.cell_size * min_degrees_km * 0.99 > -best[0][0]:
+                    break
+
+        best.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.stations[index], -negative_distance) for negative_distance, index in best]
+
+    def nearest_stations_batch(
+        self,
+        points: Sequence[LatLon],
+        k: int = 1,
+        sensor_type: Optional[str] = None,
+    ) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """Runs `nearest_stations` for many (lat, lon) points; results are in input order."""
+        return [self.nearest_stations(lat, lon, k, sensor_type) for lat, lon in points]
@@ -0,0 +1,260 @@
+"""
+Deadlines and hedged requests for tail latency.
+
+Under storm load a few `datosGrafico` requests hang for tens of seconds while the rest
+answer in milliseconds. `HedgedFetcher` tracks response times per endpoint and, when a
+request is slower than a chosen percentile of recent ones, sends a duplicate GET; the
+first response wins and the other request is cancelled. Every call can also carry a
+deadline, and `gather_with_deadline` bounds a whole batch so one slow variable cannot
+stall a poll cycle.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .config import API_URL, BASE_URL_STATION_LIST
+from .data_fetcher import get_json, SensorTypeLiteral
+from .exceptions import APIError, CHJSAIHError, DeadlineExceededError, InvalidInputError
+
+T = TypeVar("T")
+
+
+def endpoint_of(url: str) -> str:
+    """The endpoint a URL belongs to (its path), used to group latency samples."""
+    return urlsplit(url).path
+
+
+class LatencyTracker:
+    """
+    Sliding window of response times per endpoint.
+
+    Attributes:
+        window (int): Samples kept per endpoint.
+        min_samples (int): Samples needed before `percentile` returns a value.
+    """
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        if window <= 0 or min_samples <= 0:
+            raise InvalidInputError("window and min_samples must be positive.")
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            samples = self._samples[endpoint] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def count(self, endpoint: str) -> int:
+        return len(self._samples.get(endpoint, ()))
+
+    def percentile(self, endpoint: str, q: float) -> Optional[float]:
+        """
+        The `q` quantile (0 < q <= 1, nearest rank) of recent response times for an endpoint.
+
+        Returns:
+            Seconds, or None while fewer than `min_samples` samples have been recorded.
+        """
+        samples = self._samples.get(endpoint)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(1, min(len(ordered), int(q * len(ordered) + 0.999999)))
+        return ordered[rank - 1]
+
+
+async def gather_with_deadline(
+    aws: Iterable[Awaitable[T]],
+    deadline: Optional[float],
+) -> List[Union[T, CHJSAIHError]]:
+    """
+    Runs awaitables concurrently and stops waiting after `deadline` seconds.
+
+    Awaitables still running at the deadline are cancelled. None waits for all of them.
+
+    Returns:
+        One entry per awaitable, in input order: its result, the `CHJSAIHError` it raised
+        (other exceptions are wrapped in `APIError`), or a `DeadlineExceededError`.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    if not tasks:
+        return []
+    _, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending)
+
+    results: List[Union[T, CHJSAIHError]] = []
+    for task in tasks:
+        if task in pending:
+            results.append(DeadlineExceededError(f"Request did not complete within the {deadline}s batch deadline."))
+        elif task.exception() is not None:
+            error = task.exception()
+            results.append(error if isinstance(error, CHJSAIHError) else APIError(f"Request failed: {error}"))
+        else:
+            results.append(task.result())
+    return results
+
+
+class HedgedFetcher:
+    """
+    Issues GETs with optional deadlines and hedging driven by per-endpoint latency percentiles.
+
+    Every attempt is sampled: the winner with its response time, and attempts cancelled
+    (because another answered first or the deadline passed) with the time they had been
+    running, as a lower bound of their latency.
+
+    Attributes:
+        tracker (LatencyTracker): Latency samples used to pick the hedge delay.
+        hedges_sent (int): Duplicate requests issued.
+        hedges_won (int): Requests answered first by a duplicate.
+    """
+    def __init__(
+        self,
+        tracker: Optional[LatencyTracker] = None,
+        hedge_percentile: Optional[float] = 0.95,
+        min_hedge_delay: float = 0.05,
+        max_hedges: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            tracker: Shared `LatencyTracker`; a new one is created if omitted.
+            hedge_percentile: Latency quantile after which a duplicate request is sent.
+                              None disables hedging (deadlines and tracking still apply).
+            min_hedge_delay: Lower bound for the hedge delay, in seconds.
+            max_hedges: Maximum duplicate requests per call.
+            clock: Monotonic time source.
+        """
+        if hedge_percentile is not None and not 0 < hedge_percentile <= 1:
+            raise InvalidInputError("hedge_percentile must be in (0, 1].")
+        if max_hedges < 0:
+            raise InvalidInputError("max_hedges must not be negative.")
+        self.tracker = tracker if tracker is not None else LatencyTracker()
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedges = max_hedges
+        self.clock = clock
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Seconds to wait before hedging a request to `endpoint`, or None not to hedge."""
+        if self.hedge_percentile is None or self.max_hedges == 0:
+            return None
+        threshold = self.tracker.percentile(endpoint, self.hedge_percentile)
+        return None if threshold is None else max(threshold, self.min_hedge_delay)
+
+    async def _race(self, session: aiohttp.ClientSession, url: str) -> Any:
+        endpoint = endpoint_of(url)
+        delay = self.hedge_delay(endpoint)
+        start = self.clock()
+        tasks = [asyncio.ensure_future(get_json(session, url))]
+        sent = [start]
+        errors: List[BaseException] = []
+        try:
+            while True:
+                pending = [task for task in tasks if not task.done()]
+                if not pending:
+                    raise errors[0]
+                timeout = None
+                if delay is not None and len(tasks) <= self.max_hedges:
+                    timeout = max(0.0, start + delay * len(tasks) - self.clock())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    tasks.append(asyncio.ensure_future(get_json(session, url)))
+                    sent.append(self.clock())
+                    self.hedges_sent += 1
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        self.tracker.record(endpoint, self.clock() - sent[tasks.index(task)])
+                        if task is not tasks[0]:
+                            self.hedges_won += 1
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            now = self.clock()
+            for task, sent_at in zip(tasks, sent):
+                if not task.done():
+                    task.cancel()
+                    # The cancelled attempt took at least this long. Leaving it out would pull
+                    # the percentile down and make hedging fire more and more often.
+                    self.tracker.record(endpoint, now - sent_at)
+
+    async def get_json(self, session: aiohttp.ClientSession, url: str, timeout: Optional[float] = None) -> Any:
+        """
+        GETs `url` and decodes the JSON body, hedging slow requests.
+
+        Raises:
+            DeadlineExceededError: If no response arrives within `timeout` seconds.
+            APIError: If every attempt fails.
+        """
+        try:
+            if timeout is None:
+                return await self._race(session, url)
+            return await asyncio.wait_for(self._race(session, url), timeout)
+        except aiohttp.ClientResponseError as e:
+            raise APIError(f"Request to {url} failed. Status code: {e.status}, Message: {e.message}") from e
+        except aiohttp.ClientError as e:
+            raise APIError(f"Client error while requesting {url}: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceededError(f"Request to {url} exceeded the {timeout}s deadline.") from e
+        except Exception as e:
+            raise APIError(f"An unexpected error occurred while requesting {url}: {e}") from e
+
+    async def fetch_sensor_data(
+        self,
+        variable: str,
+        period_grouping: str = "ultimos5minutales",
+        num_values: int = 30,
+        session: aiohttp.ClientSession = None,
+        timeout: Optional[float] = None,
+    ) -> List[Any]:
+        """Hedged version of `fetch_sensor_data` (the session is required)."""
+        return await self.get_json(session, f"{API_URL}?v={variable}&t={period_grouping}&d={num_values}", timeout)
+
+    async def fetch_station_list(
+        self,
+        sensor_type: SensorTypeLiteral,
+        session: aiohttp.ClientSession,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Hedged version of `fetch_station_list`, sorted by name."""
+        stations: List[Dict[str, Any]] = await self.get_json(session, f"{BASE_URL_STATION_LIST}?t={sensor_type}&id=", timeout)
+        stations.sort(key=lambda station: station.get("nombre", ""))
+        return stations
+
+    async def fetch_sensor_data_many(
+        self,
+        requests: Sequence[Tuple[str, str, int]],
+        session: aiohttp.ClientSession,
+        deadline: Optional[float],
+        timeout: Optional[float] = None,
+        max_concurrency: int = 8,
+    ) -> List[Union[List[Any], CHJSAIHError]]:
+        """
+        Fetches many `(variable, period_grouping, num_values)` requests under one batch deadline.
+
+        Args:
+            requests: Requests to issue.
+            session: The aiohttp client session.
+            deadline: Seconds after which unfinished requests are cancelled; None for no batch deadline.
+            timeout: Optional per-request deadline.
+            max_concurrency: Maximum requests in flight.
+
+        Returns:
+            Raw data or a `CHJSAIHError` per request, in input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _one(variable: str, period_grouping: str, num_values: int) -> List[Any]:
+            async with semaphore:
+                return await self.fetch_sensor_data(variable, period_grouping, num_values, session, timeout)
+
+        return await gather_with_deadline((_one(*request) for request in requests), deadline)
@@ -0,0 +1,205 @@
+"""
+Derived metrics over the whole station catalog.
+
+Reservoir stations already report their current volume (`datoActual`) and capacity
+(`datoTotal`) in the station lists. `compute_catalog_metrics` derives, for every station
+of a `StationCatalog` at once, the fill ratio, the storage change since the previous
+catalog, and storage aggregated per `subcuenca`, working on the catalog columns rather
+than on each station dict.
+
+`CatalogMetricsCache` keeps the metrics of the current catalog and recomputes them only
+when a new catalog arrives, e.g. as a `StationCatalogStore` listener.
+"""
+import importlib.util
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .catalog import INT_NONE, StationCatalog, StationCatalogStore
+from .columns import require_optional
+
+RESERVOIR_UNITS = ("Hm³", "hm³", "hm3", "Hm3")
+"""Units identifying reservoir volume stations in catalogs without a `tipo` column value."""
+
+
+@dataclass
+class SubcuencaStorage:
+    """
+    Reservoir storage of one sub-basin (volumes in hm³).
+
+    `volume` and `capacity` only add up reservoirs that report both a volume and a positive
+    capacity, so `fill_ratio` compares like with like; `reservoirs` and `delta` cover all of them.
+    """
+    subcuenca: Optional[int]
+    reservoirs: int
+    volume: float
+    capacity: float
+    delta: float
+
+    @property
+    def fill_ratio(self) -> Optional[float]:
+        """Volume over capacity, or None without capacity data."""
+        return self.volume / self.capacity if self.capacity > 0 else None
+
+
+@dataclass
+class CatalogMetrics:
+    """
+    Metrics aligned with the rows of a catalog.
+
+    Attributes:
+        catalog: The catalog the metrics were computed from.
+        fill_ratio: `array('d')` of datoActual / datoTotal for reservoirs; NaN for other stations.
+        storage_delta: `array('d')` of the change of datoActual since the previous catalog, for
+                       reservoirs present in both; NaN otherwise.
+        by_subcuenca: Storage aggregated per sub-basin (reservoirs only).
+        previous_created_at: Creation time of the catalog the deltas are relative to, if any.
+    """
+    catalog: StationCatalog
+    fill_ratio: array
+    storage_delta: array
+    by_subcuenca: Dict[Optional[int], SubcuencaStorage]
+    previous_created_at: Optional[float] = None
+
+    def for_station(self, station_id: int) -> Optional[Dict[str, Any]]:
+        """Metrics of one station by id, or None if it is not in the catalog."""
+        ids = self.catalog.columns["id"]
+        for row, value in enumerate(ids):
+            if value == station_id:
+                ratio, delta = self.fill_ratio[row], self.storage_delta[row]
+                return {
+                    "fill_ratio": None if math.isnan(ratio) else ratio,
+                    "storage_delta": None if math.isnan(delta) else delta,
+                }
+        return None
+
+
+def _reservoir_mask(catalog: StationCatalog) -> List[bool]:
+    return [tipo == "e" or (tipo is None and unidades in RESERVOIR_UNITS)
+            for tipo, unidades in zip(catalog.columns["tipo"], catalog.columns["unidades"])]
+
+
+def _metrics_python(catalog: StationCatalog, previous: Optional[StationCatalog]) -> CatalogMetrics:
+    columns = catalog.columns
+    nan = math.nan
+    previous_volume: Dict[int, float] = {}
+    if previous is not None:
+        previous_volume = dict(zip(previous.columns["id"], previous.columns["datoActual"]))
+    fill_ratio = array('d', [nan]) * len(catalog)
+    storage_delta = array('d', [nan]) * len(catalog)
+    by_subcuenca: Dict[Optional[int], SubcuencaStorage] = {}
+    for row, is_reservoir in enumerate(_reservoir_mask(catalog)):
+        if not is_reservoir:
+            continue
+        volume, capacity = columns["datoActual"][row], columns["datoTotal"][row]
+        if capacity > 0:
+            fill_ratio[row] = volume / capacity
+        storage_delta[row] = volume - previous_volume.get(columns["id"][row], nan)
+        subcuenca = columns["subcuenca"][row]
+        key = None if subcuenca == INT_NONE else subcuenca
+        group = by_subcuenca.get(key)
+        if group is None:
+            group = by_subcuenca[key] = SubcuencaStorage(key, 0, 0.0, 0.0, 0.0)
+        group.reservoirs += 1
+        if capacity > 0 and not math.isnan(volume):
+            group.volume += volume
+            group.capacity += capacity
+        if not math.isnan(storage_delta[row]):
+            group.delta += storage_delta[row]
+    return CatalogMetrics(catalog, fill_ratio, storage_delta, by_subcuenca,
+                          previous.created_at if previous is not None else None)
+
+
+def _metrics_numpy(catalog: StationCatalog, previous: Optional[StationCatalog]) -> CatalogMetrics:
+    np = require_optional("numpy", "compute_catalog_metrics(use_numpy=True)")
+    columns = catalog.columns
+    reservoir = np.array(_reservoir_mask(catalog), dtype=bool)
+    volume = np.frombuffer(columns["datoActual"], dtype=np.float64)
+    capacity = np.frombuffer(columns["datoTotal"], dtype=np.float64)
+    ids = np.frombuffer(columns["id"], dtype=np.int64)
+    subcuenca = np.frombuffer(columns["subcuenca"], dtype=np.int64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fill_ratio = np.where(reservoir & (capacity > 0), volume / capacity, np.nan)
+    storage_delta = np.full(len(ids), np.nan)
+    if previous is not None and len(previous):
+        previous_ids = np.frombuffer(previous.columns["id"], dtype=np.int64)
+        previous_volume = np.frombuffer(previous.columns["datoActual"], dtype=np.float64)
+        order = np.argsort(previous_ids, kind="stable")
+        position = np.clip(np.searchsorted(previous_ids, ids, sorter=order), 0, len(order) - 1)
+        match = reservoir & (previous_ids[order[position]] == ids)
+        storage_delta[match] = volume[match] - previous_volume[order[position[match]]]
+
+    by_subcuenca: Dict[Optional[int], SubcuencaStorage] = {}
+    if reservoir.any():
+        keys, inverse = np.unique(subcuenca[reservoir], return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(keys))
+        known = (capacity > 0) & ~np.isnan(volume)
+        sums = [np.bincount(inverse, weights=np.nan_to_num(values[reservoir], nan=0.0), minlength=len(keys))
+                for values in (np.where(known, volume, 0.0), np.where(known, capacity, 0.0), storage_delta)]
+        for k, key in enumerate(keys.tolist()):
+            group_key = None if key == INT_NONE else key
+            by_subcuenca[group_key] = SubcuencaStorage(group_key, int(counts[k]), float(sums[0][k]),
+                                                       float(sums[1][k]), float(sums[2][k]))
+
+    def _to_array(values: Any) -> array:
+        result = array('d')
+        result.frombytes(values.astype(np.float64).tobytes())
+        return result
+
+    return CatalogMetrics(catalog, _to_array(fill_ratio), _to_array(storage_delta), by_subcuenca,
+                          previous.created_at if previous is not None else None)
+
+
+def compute_catalog_metrics(
+    catalog: StationCatalog,
+    previous: Optional[StationCatalog] = None,
+    use_numpy: Optional[bool] = None,
+) -> CatalogMetrics:
+    """
+    Computes fill ratios, storage deltas and per-subcuenca storage for a whole catalog.
+
+    Reservoirs are the stations with `tipo` 'e' (or, without `tipo`, volume units).
+
+    Args:
+        catalog: The current catalog.
+        previous: The catalog of the previous refresh, for storage deltas (matched by id).
+        use_numpy: Force (True) or avoid (False) NumPy. Defaults to NumPy if installed.
+
+    Returns:
+        The `CatalogMetrics`.
+    """
+    if use_numpy is None:
+        use_numpy = importlib.util.find_spec("numpy") is not None
+    return _metrics_numpy(catalog, previous) if use_numpy else _metrics_python(catalog, previous)
+
+
+class CatalogMetricsCache:
+    """
+    Metrics of the current catalog, recomputed only when the catalog changes.
+
+    Attributes:
+        metrics (Optional[CatalogMetrics]): Metrics of the latest catalog seen.
+    """
+    def __init__(self, use_numpy: Optional[bool] = None):
+        self.use_numpy = use_numpy
+        self.metrics: Optional[CatalogMetrics] = None
+
+    def update(self, catalog: StationCatalog) -> CatalogMetrics:
+        """
+        Returns the metrics for `catalog`, computing them if it is a new catalog.
+
+        Deltas are relative to the catalog seen before it.
+        """
+        if self.metrics is not None and self.metrics.catalog is catalog:
+            return self.metrics
+        previous = self.metrics.catalog if self.metrics is not None else None
+        self.metrics = compute_catalog_metrics(catalog, previous, self.use_numpy)
+        return self.metrics
+
+    def attach(self, store: StationCatalogStore) -> None:
+        """Recomputes on every refresh of `store`, starting with its current catalog if loaded."""
+        store.listeners.append(self.update)
+        if store.catalog is not None:
+            self.update(store.catalog)
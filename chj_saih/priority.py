@@ -0,0 +1,229 @@
+"""
+Priority-ordered fetch queue for bulk sensor polling under load.
+
+During an emergency the SAIH server is slow and the request budget is limited; fetching
+in arbitrary order lets red stations wait behind hundreds of green ones. In
+`PriorityFetchQueue`, submitted fetches wait in a bounded priority queue and a fixed
+number of workers always take the most urgent one. Urgency combines the station's risk
+level (`estadoInt`), how stale its last reading is and a user-assigned priority. When the
+queue is full, a more urgent submission preempts (cancels) the least urgent queued one.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .exceptions import InvalidInputError
+from .sensors import Sensor
+
+PRIORITY_MAX = 99.0
+"""Highest user-assigned priority; larger values are clamped to it (and negative ones to 0)."""
+STALENESS_WEIGHT = 50.0
+"""Score of a reading at least `stale_after` seconds old (or never fetched)."""
+RISK_WEIGHT = 200.0
+"""Score per `estadoInt` level; exceeds `PRIORITY_MAX + STALENESS_WEIGHT`, so risk always dominates."""
+
+FetchFunction = Callable[[Sensor], Awaitable[Any]]
+FetchKey = Tuple[str, str, int]
+
+
+class _QueuedFetch:
+    __slots__ = ("sensor", "score", "future", "seq")
+
+    def __init__(self, sensor: Sensor, score: float, future: "asyncio.Future[Any]", seq: int):
+        self.sensor = sensor
+        self.score = score
+        self.future = future
+        self.seq = seq
+
+    @property
+    def key(self) -> FetchKey:
+        return (self.sensor.variable, self.sensor.period_grouping, self.sensor.num_values)
+
+
+class PriorityFetchQueue:
+    """
+    Bounded priority queue of sensor fetches served by a fixed pool of workers.
+
+    `submit` returns a future for the parsed data. The future fails with the exception
+    raised by the fetch (a `CHJSAIHError` for the default fetch), or is cancelled if the
+    request was preempted, rejected because the queue was full of more urgent work, or
+    still pending when the queue stopped.
+
+    Attributes:
+        completed (int): Fetches finished (successfully or not).
+        preempted (int): Queued fetches cancelled to make room for more urgent ones.
+        rejected (int): Submissions refused because the queue was full of more urgent work.
+    """
+    def __init__(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_workers: int = 4,
+        max_queued: int = 100,
+        stale_after: float = 3600.0,
+        fetch: Optional[FetchFunction] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            session: Session used by the default fetch (`sensor.get_data(session)`).
+            max_workers: Maximum simultaneous fetches.
+            max_queued: Maximum fetches waiting for a worker.
+            stale_after: Age in seconds at which a reading earns the full staleness score.
+            fetch: Coroutine function `fetch(sensor)` replacing the default fetch.
+            clock: Wall-clock function returning epoch seconds. Replaceable for testing.
+
+        Raises:
+            InvalidInputError: If limits are not positive or no way to fetch is given.
+        """
+        if max_workers <= 0 or max_queued <= 0 or stale_after <= 0:
+            raise InvalidInputError("max_workers, max_queued and stale_after must be positive.")
+        if fetch is None and session is None:
+            raise InvalidInputError("PriorityFetchQueue needs a session or a fetch function.")
+        self.session = session
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.stale_after = stale_after
+        self.fetch: FetchFunction = fetch if fetch is not None else self._default_fetch
+        self.clock = clock
+        self.completed = 0
+        self.preempted = 0
+        self.rejected = 0
+        self._heap: List[Tuple[float, int, _QueuedFetch]] = []
+        self._queued: Dict[FetchKey, _QueuedFetch] = {}
+        self._seq = itertools.count()
+        self._workers: List["asyncio.Task[None]"] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def _default_fetch(self, sensor: Sensor) -> Any:
+        return await sensor.get_data(self.session)
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def score(self, risk: int = 0, priority: float = 0.0, last_fetched: Optional[float] = None) -> float:
+        """Urgency of a fetch: risk first, then user priority (clamped to 0-`PRIORITY_MAX`) plus staleness."""
+        priority = min(PRIORITY_MAX, max(0.0, priority))
+        if last_fetched is None:
+            staleness = 1.0
+        else:
+            staleness = min(1.0, max(0.0, self.clock() - last_fetched) / self.stale_after)
+        return risk * RISK_WEIGHT + priority + staleness * STALENESS_WEIGHT
+
+    def submit(
+        self,
+        sensor: Sensor,
+        risk: int = 0,
+        priority: float = 0.0,
+        last_fetched: Optional[float] = None,
+    ) -> "asyncio.Future[Any]":
+        """
+        Queues a fetch.
+
+        Submitting a sensor that is already queued raises its score if the new one is
+        higher and returns the existing future.
+
+        Args:
+            sensor: The sensor to fetch.
+            risk: `estadoInt` of its station (0-3).
+            priority: User-assigned priority added to the score (0-99, clamped).
+            last_fetched: Epoch seconds of the last successful fetch, if any.
+
+        Returns:
+            A future resolved with the parsed data.
+        """
+        loop = asyncio.get_running_loop()
+        score = self.score(risk, priority, last_fetched)
+        key = (sensor.variable, sensor.period_grouping, sensor.num_values)
+        existing = self._queued.get(key)
+        if existing is not None and not existing.future.done():
+            if score > existing.score:
+                existing.score = score
+                heapq.heappush(self._heap, (-score, existing.seq, existing))  # Old entry is skipped later.
+            return existing.future
+
+        future: "asyncio.Future[Any]" = loop.create_future()
+        if len(self._queued) >= self.max_queued:
+            victim = min(self._queued.values(), key=lambda item: (item.score, -item.seq))
+            if victim.score >= score:
+                self.rejected += 1
+                future.cancel()
+                return future
+            del self._queued[victim.key]
+            victim.future.cancel()
+            self.preempted += 1
+
+        item = _QueuedFetch(sensor, score, future, next(self._seq))
+        self._queued[key] = item
+        heapq.heappush(self._heap, (-score, item.seq, item))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return future
+
+    def _pop(self) -> Optional[_QueuedFetch]:
+        while self._heap:
+            neg_score, _, item = heapq.heappop(self._heap)
+            if self._queued.get(item.key) is not item or -neg_score != item.score:
+                continue  # Preempted, superseded or re-scored entry.
+            del self._queued[item.key]
+            if item.future.done():
+                continue  # Cancelled by the caller while queued.
+            return item
+        return None
+
+    async def _worker(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            item = self._pop()
+            if item is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            try:
+                result = await self.fetch(item.sensor)
+            except asyncio.CancelledError:
+                item.future.cancel()
+                raise
+            except Exception as e:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            else:
+                if not item.future.done():
+                    item.future.set_result(result)
+            self.completed += 1
+
+    def start(self) -> None:
+        """Starts the workers on the running event loop."""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        if self._queued:
+            self._wakeup.set()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+
+    async def stop(self, cancel_pending: bool = True) -> None:
+        """
+        Stops the workers. In-flight fetches are cancelled.
+
+        Args:
+            cancel_pending: Also cancel the futures of fetches still queued.
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if cancel_pending:
+            for item in self._queued.values():
+                item.future.cancel()
+            self._queued.clear()
+            self._heap.clear()
+
+    async def __aenter__(self) -> "PriorityFetchQueue":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
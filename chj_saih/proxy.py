@@ -0,0 +1,236 @@
+"""
+Local caching proxy for the CHJ-SAIH API.
+
+When several consumers (Home Assistant instances, internal tools...) poll saih.chj.es
+on their own, upstream load grows with the number of consumers. `CachingProxy` polls
+`listaEstaciones` and every `datosGrafico` query that consumers have asked for once per
+interval, and serves the cached payloads over a local HTTP API with the same URL paths.
+Point the library at it with the `CHJ_SAIH_PROXY_URL` environment variable
+(see `chj_saih.config`), and upstream load stays constant however many consumers there are.
+
+Run it with the `chj_saih-proxy` console script.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from .config import API_PATH, STATION_LIST_PATH, UPSTREAM_API_URL, UPSTREAM_BASE_URL_STATION_LIST
+from .data_fetcher import SensorTypeLiteral
+from .exceptions import APIError
+
+_LOGGER = logging.getLogger(__name__)
+
+STATION_LIST_TYPES: Tuple[SensorTypeLiteral, ...] = ('a', 't', 'e', 'p')
+
+
+@dataclass
+class _CacheEntry:
+    body: bytes
+    fetched_at: float
+    last_requested: float
+
+
+class CachingProxy:
+    """
+    Polls the upstream API on a schedule and serves cached payloads to local consumers.
+
+    Station lists for all sensor types are always kept warm. A `datosGrafico` query
+    (variable, period grouping, number of values) is fetched upstream on its first
+    request and then refreshed on every poll until no consumer has requested it for
+    `idle_expiry` seconds. Concurrent misses for the same query share one upstream request.
+    """
+    def __init__(
+        self,
+        poll_interval: float = 300.0,
+        idle_expiry: float = 3600.0,
+        max_concurrency: int = 8,
+        upstream_api_url: str = UPSTREAM_API_URL,
+        upstream_station_list_url: str = UPSTREAM_BASE_URL_STATION_LIST,
+    ):
+        """
+        Args:
+            poll_interval: Seconds between upstream refreshes of every cached payload.
+            idle_expiry: Seconds after the last consumer request before a data query stops being polled.
+            max_concurrency: Maximum simultaneous upstream requests during a refresh.
+            upstream_api_url: Upstream `datosGrafico` URL.
+            upstream_station_list_url: Upstream `listaEstaciones` URL.
+        """
+        self.poll_interval = poll_interval
+        self.idle_expiry = idle_expiry
+        self.upstream_api_url = upstream_api_url
+        self.upstream_station_list_url = upstream_station_list_url
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._cache: Dict[str, _CacheEntry] = {}
+        self._inflight: Dict[str, "asyncio.Task[bytes]"] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._owns_session = False
+        self._poll_task: Optional["asyncio.Task[None]"] = None
+
+    def station_list_url(self, sensor_type: str) -> str:
+        """Upstream URL for the station list of a sensor type."""
+        return f"{self.upstream_station_list_url}?t={sensor_type}&id="
+
+    def sensor_data_url(self, variable: str, period_grouping: str, num_values: str) -> str:
+        """Upstream URL for a sensor data query, in the same shape as `fetch_sensor_data`."""
+        return f"{self.upstream_api_url}?v={variable}&t={period_grouping}&d={num_values}"
+
+    async def _fetch_upstream(self, url: str) -> bytes:
+        assert self._session is not None and self._semaphore is not None, "CachingProxy must be started before fetching."
+        async with self._semaphore:
+            try:
+                async with self._session.get(url) as response:
+                    response.raise_for_status()
+                    return await response.read()
+            except aiohttp.ClientResponseError as e:
+                raise APIError(f"Upstream request to '{url}' failed. Status code: {e.status}, Message: {e.message}") from e
+            except aiohttp.ClientError as e:
+                raise APIError(f"Client error while requesting '{url}' upstream: {e}") from e
+            except asyncio.TimeoutError as e:
+                raise APIError(f"Upstream request to '{url}' timed out.") from e
+
+    async def _fetch_and_store(self, url: str) -> bytes:
+        try:
+            body = await self._fetch_upstream(url)
+            now = time.monotonic()
+            entry = self._cache.get(url)
+            self._cache[url] = _CacheEntry(body, now, entry.last_requested if entry else now)
+            return body
+        finally:
+            self._inflight.pop(url, None)
+
+    @staticmethod
+    def _retrieve(task: "asyncio.Task[bytes]") -> None:
+        if not task.cancelled():
+            task.exception()  # Mark retrieved so lone failures are not logged as unhandled.
+
+    async def _refresh(self, url: str) -> bytes:
+        """
+        Fetches `url` upstream, sharing the request with concurrent callers, and stores it.
+
+        The request runs as its own task, so cancelling one caller (e.g. a disconnected
+        client) neither aborts it nor leaves the other callers waiting forever.
+        """
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(url))
+            task.add_done_callback(self._retrieve)
+            self._inflight[url] = task
+        return await asyncio.shield(task)
+
+    async def get(self, url: str) -> bytes:
+        """
+        Returns the cached payload for an upstream URL, fetching it on a cache miss.
+
+        Raises:
+            APIError: If the payload is not cached and the upstream request fails.
+        """
+        entry = self._cache.get(url)
+        if entry is not None:
+            entry.last_requested = time.monotonic()
+            return entry.body
+        return await self._refresh(url)
+
+    async def poll_once(self) -> None:
+        """Refreshes the station lists and every recently requested data query."""
+        now = time.monotonic()
+        for url in [url for url, entry in self._cache.items()
+                    if url.startswith(self.upstream_api_url) and now - entry.last_requested > self.idle_expiry]:
+            del self._cache[url]
+
+        urls = [self.station_list_url(t) for t in STATION_LIST_TYPES]
+        urls.extend(url for url in self._cache if url.startswith(self.upstream_api_url))
+        results = await asyncio.gather(*(self._refresh(url) for url in urls), return_exceptions=True)
+        for url, res in zip(urls, results):
+            if isinstance(res, Exception):
+                # Keep serving the previous payload; the next poll will try again.
+                _LOGGER.warning("Refresh of %s failed: %s", url, res)
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self, session: Optional[aiohttp.ClientSession] = None) -> None:
+        """Opens the upstream session (unless one is given) and starts the polling task."""
+        self._owns_session = session is None
+        self._session = session or aiohttp.ClientSession()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._poll_task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        """Stops polling and closes the upstream session if the proxy opened it."""
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        inflight = list(self._inflight.values())
+        for task in inflight:
+            task.cancel()
+        await asyncio.gather(*inflight, return_exceptions=True)
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    async def _serve(self, url: str) -> web.Response:
+        try:
+            body = await self.get(url)
+        except APIError as e:
+            return web.Response(status=502, text=str(e))
+        return web.Response(body=body, content_type="application/json")
+
+    async def handle_station_list(self, request: web.Request) -> web.Response:
+        sensor_type = request.query.get("t", "")
+        if sensor_type not in STATION_LIST_TYPES:
+            return web.Response(status=400, text=f"Invalid sensor type '{sensor_type}'.")
+        return await self._serve(self.station_list_url(sensor_type))
+
+    async def handle_sensor_data(self, request: web.Request) -> web.Response:
+        variable = request.query.get("v")
+        if not variable:
+            return web.Response(status=400, text="Missing variable 'v'.")
+        period_grouping = request.query.get("t", "ultimos5minutales")
+        num_values = request.query.get("d", "30")
+        return await self._serve(self.sensor_data_url(variable, period_grouping, num_values))
+
+    def make_app(self) -> web.Application:
+        """Builds the aiohttp application serving the proxy endpoints."""
+        app = web.Application()
+        app.router.add_get(STATION_LIST_PATH, self.handle_station_list)
+        app.router.add_get(API_PATH, self.handle_sensor_data)
+
+        async def _lifecycle(app: web.Application):
+            await self.start()
+            yield
+            await self.stop()
+
+        app.cleanup_ctx.append(_lifecycle)
+        return app
+
+
+def main() -> None:
+    """Entry point for the `chj_saih-proxy` console script."""
+    parser = argparse.ArgumentParser(description="Proxy local con caché para la API del SAIH CHJ")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto en el que escuchar")
+    parser.add_argument("--interval", type=float, default=300.0, help="Segundos entre consultas a saih.chj.es")
+    parser.add_argument("--idle-expiry", type=float, default=3600.0,
+                        help="Segundos sin peticiones tras los que se deja de refrescar una variable")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    proxy = CachingProxy(poll_interval=args.interval, idle_expiry=args.idle_expiry)
+    web.run_app(proxy.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Push endpoints (Server-Sent Events and WebSocket) for live readings and risk changes.
+
+Dashboards that poll an application which in turn polls SAIH see twice the latency.
+`PushHub` lets the library push what it fetches as soon as it has it: sensor readings
+(e.g. from `AdaptivePollScheduler` via `scheduler_callback`) and `estadoInt` transitions
+(e.g. from `StationChangeFeed` via `publish_diff`). `PushServer` exposes the hub over
+`/events` (SSE) and `/ws` (WebSocket) with aiohttp.
+
+Every client has its own bounded queue. Publishing never waits: when a slow client's
+queue is full its oldest event is dropped, so one slow client cannot stall the fetch loop.
+"""
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from aiohttp import web, WSMsgType
+
+from .changes import StationListDiff
+from .exceptions import CHJSAIHError
+
+HEARTBEAT_SECONDS = 15.0
+
+
+class Subscription:
+    """
+    A client's subscription: its filters and its bounded event queue.
+
+    Attributes:
+        variables (Optional[Set[str]]): Variables whose readings are delivered; None for all.
+        risk (bool): Whether `estadoInt` transitions are delivered.
+        dropped (int): Events discarded because the client was not keeping up.
+    """
+    def __init__(self, variables: Optional[Iterable[str]], risk: bool, queue_size: int):
+        self.variables: Optional[Set[str]] = set(variables) if variables is not None else None
+        self.risk = risk
+        self.dropped = 0
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=queue_size)
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        if event["type"] == "risk":
+            return self.risk
+        return self.variables is None or event["variable"] in self.variables
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Enqueues without waiting, dropping the oldest event if the queue is full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class PushHub:
+    """Fans out readings and risk transitions to subscribed clients."""
+    def __init__(self, queue_size: int = 100):
+        """
+        Args:
+            queue_size: Maximum pending events per client before the oldest are dropped.
+        """
+        self.queue_size = queue_size
+        self.subscriptions: Set[Subscription] = set()
+        self._last_published: Dict[Tuple[str, str], datetime] = {}
+
+    def subscribe(self, variables: Optional[Iterable[str]] = None, risk: bool = False) -> Subscription:
+        """Registers a client. `variables=None` subscribes to readings of every variable."""
+        subscription = Subscription(variables, risk, self.queue_size)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        for subscription in self.subscriptions:
+            if subscription.wants(event):
+                subscription.offer(event)
+
+    def publish_readings(
+        self,
+        variable: str,
+        readings: List[Tuple[datetime, Optional[float]]],
+        period_grouping: Optional[str] = None
+    ) -> None:
+        """Publishes parsed `(datetime, value)` readings of a variable at a period grouping."""
+        self.publish({
+            "type": "reading",
+            "variable": variable,
+            "period_grouping": period_grouping,
+            "readings": [[dt.isoformat(), value] for dt, value in readings],
+        })
+
+    def publish_risk_change(self, station_id: Any, variable: Optional[str], old: Optional[int], new: Optional[int]) -> None:
+        """Publishes an `estadoInt` transition of a station."""
+        self.publish({"type": "risk", "id": station_id, "variable": variable, "old": old, "new": new})
+
+    def publish_diff(self, diff: StationListDiff) -> None:
+        """Publishes the `estadoInt` transitions contained in a `StationListDiff`."""
+        for station_id, fields in diff.changed.items():
+            if "estadoInt" in fields:
+                old, new = fields["estadoInt"]
+                self.publish_risk_change(station_id, diff.stations[station_id].get("variable"), old, new)
+
+    def scheduler_callback(self, job: Any, result: Any) -> None:
+        """
+        `AdaptivePollScheduler` callback that publishes the new readings of each successful poll.
+
+        Every poll returns the job's whole window; only readings newer than the last one
+        published for the job's (variable, period_grouping) are pushed, and nothing is
+        published if there are none. A variable polled at two cadences is tracked per cadence.
+        """
+        if isinstance(result, CHJSAIHError):
+            return
+        key = (job.sensor.variable, job.sensor.period_grouping)
+        last = self._last_published.get(key)
+        for readings in result.values():
+            fresh = [(dt, value) for dt, value in readings if last is None or dt > last]
+            if fresh:
+                self.publish_readings(key[0], fresh, key[1])
+                newest = max(dt for dt, _ in fresh)
+                if self._last_published.get(key, newest) <= newest:
+                    self._last_published[key] = newest
+
+
+def _subscription_args(request: web.Request) -> Tuple[Optional[List[str]], bool]:
+    variables = request.query.get("variables")
+    risk = request.query.get("risk", "0").lower() in ("1", "true", "yes")
+    return ([v for v in variables.split(",") if v] if variables else None), risk
+
+
+class PushServer:
+    """
+    aiohttp application exposing a `PushHub`.
+
+    Endpoints:
+        GET /events?variables=V1,V2&risk=1   Server-Sent Events stream.
+        GET /ws?variables=V1,V2&risk=1       WebSocket; the client may send
+                                             {"variables": ["V1", ...] or null, "risk": true} to
+                                             change filters; other messages get an error event.
+    """
+    def __init__(self, hub: PushHub):
+        self.hub = hub
+
+    async def handle_events(self, request: web.Request) -> web.StreamResponse:
+        variables, risk = _subscription_args(request)
+        subscription = self.hub.subscribe(variables, risk)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    await response.write(b": keepalive\n\n")
+                    continue
+                payload = json.dumps(event, ensure_ascii=False)
+                await response.write(f"event: {event['type']}\ndata: {payload}\n\n".encode("utf-8"))
+        except ConnectionResetError:
+            pass
+        finally:
+            self.hub.unsubscribe(subscription)
+        return response
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        variables, risk = _subscription_args(request)
+        subscription = self.hub.subscribe(variables, risk)
+        ws = web.WebSocketResponse(heartbeat=HEARTBEAT_SECONDS)
+        await ws.prepare(request)
+
+        async def _read() -> None:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    update = json.loads(message.data)
+                except ValueError:
+                    update = None
+                variables = update.get("variables") if isinstance(update, dict) else None
+                if not isinstance(update, dict) or not (
+                    variables is None or (isinstance(variables, list) and all(isinstance(v, str) for v in variables))
+                ):
+                    await ws.send_json({"type": "error", "message": 'expected {"variables": [str, ...], "risk": bool}'})
+                    continue
+                if "variables" in update:
+                    subscription.variables = set(update["variables"]) if update["variables"] is not None else None
+                if "risk" in update:
+                    subscription.risk = bool(update["risk"])
+
+        reader = asyncio.create_task(_read())
+        getter: Optional["asyncio.Future[Dict[str, Any]]"] = None
+        try:
+            while not ws.closed:
+                getter = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait({getter, reader}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    break
+                await ws.send_json(getter.result())
+        except ConnectionResetError:
+            pass
+        finally:
+            if getter is not None:
+                getter.cancel()
+            reader.cancel()
+            self.hub.unsubscribe(subscription)
+        return ws
+
+    def make_app(self) -> web.Application:
+        """Builds the aiohttp application serving the push endpoints."""
+        app = web.Application()
+        app.router.add_get("/events", self.handle_events)
+        app.router.add_get("/ws", self.handle_ws)
+        return app
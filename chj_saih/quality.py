@@ -0,0 +1,186 @@
+"""
+Data-quality checks for sensor series.
+
+SAIH series sometimes contain spikes, flatlines from stations that went offline, and
+impossible values such as negative flow or rainfall. `quality_flags` checks a
+`SeriesColumns` against a `QCConfig` and returns one bitmask of `QualityFlag`s per
+sample in an `array('B')`; the series itself is never copied or modified.
+"""
+import importlib.util
+import math
+from array import array
+from dataclasses import dataclass
+from enum import IntFlag
+from typing import Dict, Optional, Tuple, Type
+
+from .columns import SeriesColumns, require_optional
+from .exceptions import InvalidInputError
+from .sensors import FlowSensor, RainGaugeSensor, ReservoirSensor, Sensor, TemperatureSensor
+
+
+class QualityFlag(IntFlag):
+    """Per-sample quality flags; a sample may carry several."""
+    OK = 0
+    MISSING = 1
+    BELOW_MIN = 2
+    ABOVE_MAX = 4
+    SPIKE = 8
+    STUCK = 16
+    RATE = 32
+
+
+@dataclass(frozen=True)
+class QCConfig:
+    """
+    Quality-control limits. Any check whose parameter is None is skipped.
+
+    Attributes:
+        min_value: Values below this are flagged `BELOW_MIN`.
+        max_value: Values above this are flagged `ABOVE_MAX`.
+        spike_threshold: A sample that differs from both neighbours by more than this,
+                         in the same direction, is flagged `SPIKE`.
+        stuck_count: Runs of at least this many identical consecutive values are flagged `STUCK`.
+        stuck_ignore: Values exempt from the stuck check (e.g. 0 mm of rain for days).
+        max_rate: Maximum change per hour between consecutive samples; the later sample
+                  of a faster change is flagged `RATE`.
+    """
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    spike_threshold: Optional[float] = None
+    stuck_count: Optional[int] = None
+    stuck_ignore: Tuple[float, ...] = ()
+    max_rate: Optional[float] = None
+
+
+QC_CONFIG_BY_SENSOR: Dict[Type[Sensor], QCConfig] = {
+    RainGaugeSensor: QCConfig(min_value=0.0, max_value=500.0, stuck_count=12, stuck_ignore=(0.0,)),
+    FlowSensor: QCConfig(min_value=0.0, max_value=20000.0, stuck_count=24, stuck_ignore=(0.0,)),
+    ReservoirSensor: QCConfig(min_value=0.0, max_value=5000.0, spike_threshold=50.0),
+    TemperatureSensor: QCConfig(min_value=-30.0, max_value=50.0, spike_threshold=10.0, stuck_count=12, max_rate=10.0),
+}
+"""Default limits per sensor class (rain mm, flow m³/s, reservoir hm³ or m, temperature °C)."""
+
+
+def config_for(sensor: Sensor) -> QCConfig:
+    """The default `QCConfig` for a sensor's class (no checks for unknown classes)."""
+    for cls in type(sensor).__mro__:
+        if cls in QC_CONFIG_BY_SENSOR:
+            return QC_CONFIG_BY_SENSOR[cls]
+    return QCConfig()
+
+
+def _flags_python(columns: SeriesColumns, config: QCConfig) -> array:
+    ts, values = columns.timestamps, columns.values
+    n = len(values)
+    flags = array('B', bytes(n))
+    for i, v in enumerate(values):
+        if math.isnan(v):
+            flags[i] |= QualityFlag.MISSING
+            continue
+        if config.min_value is not None and v < config.min_value:
+            flags[i] |= QualityFlag.BELOW_MIN
+        if config.max_value is not None and v > config.max_value:
+            flags[i] |= QualityFlag.ABOVE_MAX
+        if i > 0 and config.max_rate is not None:
+            dt = ts[i] - ts[i - 1]
+            if dt > 0 and abs(v - values[i - 1]) * 3600.0 / dt > config.max_rate:
+                flags[i] |= QualityFlag.RATE
+        if config.spike_threshold is not None and 0 < i < n - 1:
+            up, down = v - values[i - 1], v - values[i + 1]
+            t = config.spike_threshold
+            if (up > t and down > t) or (up < -t and down < -t):
+                flags[i] |= QualityFlag.SPIKE
+
+    if config.stuck_count is not None:
+        start = 0
+        for i in range(1, n + 1):
+            if i == n or values[i] != values[start]:
+                if i - start >= config.stuck_count and values[start] not in config.stuck_ignore:
+                    for k in range(start, i):
+                        flags[k] |= QualityFlag.STUCK
+                start = i
+    return flags
+
+
+def _flags_numpy(columns: SeriesColumns, config: QCConfig) -> array:
+    np = require_optional("numpy", "quality_flags(use_numpy=True)")
+    values = np.frombuffer(columns.values, dtype=np.float64)
+    n = len(values)
+    flags = np.zeros(n, dtype=np.uint8)
+    missing = np.isnan(values)
+    flags[missing] |= np.uint8(QualityFlag.MISSING)
+    with np.errstate(invalid="ignore"):
+        if config.min_value is not None:
+            flags[values < config.min_value] |= np.uint8(QualityFlag.BELOW_MIN)
+        if config.max_value is not None:
+            flags[values > config.max_value] |= np.uint8(QualityFlag.ABOVE_MAX)
+        if config.max_rate is not None and n > 1:
+            timestamps = np.frombuffer(columns.timestamps, dtype=np.int64)
+            dt = np.diff(timestamps).astype(np.float64)
+            dv = np.abs(np.diff(values))
+            fast = (dt > 0) & (dv * 3600.0 > config.max_rate * dt)
+            flags[1:][fast & ~missing[1:]] |= np.uint8(QualityFlag.RATE)
+        if config.spike_threshold is not None and n > 2:
+            t = config.spike_threshold
+            mid = values[1:-1]
+            up, down = mid - values[:-2], mid - values[2:]
+            spike = ((up > t) & (down > t)) | ((up < -t) & (down < -t))
+            flags[1:-1][spike] |= np.uint8(QualityFlag.SPIKE)
+    if config.stuck_count is not None and n:
+        boundaries = np.flatnonzero(values[1:] != values[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        lengths = np.diff(np.concatenate((starts, [n])))
+        stuck_runs = lengths >= config.stuck_count
+        if config.stuck_ignore:
+            stuck_runs &= ~np.isin(values[starts], np.asarray(config.stuck_ignore, dtype=np.float64))
+        flags[np.repeat(stuck_runs, lengths)] |= np.uint8(QualityFlag.STUCK)
+    result = array('B')
+    result.frombytes(flags.tobytes())
+    return result
+
+
+def quality_flags(columns: SeriesColumns, config: QCConfig, use_numpy: Optional[bool] = None) -> array:
+    """
+    Flags every sample of a series.
+
+    Args:
+        columns: The series, e.g. from `Sensor.parse_columns` or `SensorSeries.to_columns`.
+        config: Limits to apply, e.g. `config_for(sensor)`.
+        use_numpy: Force (True) or avoid (False) the NumPy path. Defaults to NumPy if installed.
+
+    Returns:
+        An `array('B')` aligned with the series; 0 means the sample passed every check.
+
+    Raises:
+        InvalidInputError: If `stuck_count` is smaller than 2.
+        ImportError: If `use_numpy` is True and NumPy is not installed.
+    """
+    if config.stuck_count is not None and config.stuck_count < 2:
+        raise InvalidInputError("stuck_count must be at least 2.")
+    if not len(columns):
+        return array('B')
+    if use_numpy is None:
+        use_numpy = importlib.util.find_spec("numpy") is not None
+    if use_numpy:
+        return _flags_numpy(columns, config)
+    return _flags_python(columns, config)
+
+
+def check_sensor(sensor: Sensor, columns: SeriesColumns, config: Optional[QCConfig] = None) -> array:
+    """Flags a sensor's series with its class defaults, or with `config` if given."""
+    return quality_flags(columns, config if config is not None else config_for(sensor))
+
+
+def flag_counts(flags: array) -> Dict[str, int]:
+    """Number of samples carrying each flag, by flag name (flags with no samples omitted)."""
+    counts: Dict[str, int] = {}
+    totals = [0] * 256
+    for value in flags:
+        totals[value] += 1
+    for flag in QualityFlag:
+        if flag is QualityFlag.OK:
+            continue
+        count = sum(total for value, total in enumerate(totals) if value & flag)
+        if count:
+            counts[flag.name] = count
+    return counts
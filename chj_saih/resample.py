@@ -0,0 +1,245 @@
+"""
+Gap detection and regular-grid resampling of sensor series.
+
+Series parsed by `SensorDataParser` skip the timestamps of periods when a station was
+offline. The functions here put one or many series on a regular grid whose step is the
+expected cadence of a `period_grouping` (`PERIOD_CADENCE_SECONDS`), fill the missing
+slots with NaN, the last known value or a linear interpolation, and report every gap.
+
+Grid points are multiples of the cadence in the same local wall-clock epoch seconds as
+`SeriesColumns`, so hourly grids fall on the hour and daily grids on midnight. A grid
+point counts as present only if a sample falls exactly on it; NaN samples count as missing.
+"""
+import importlib.util
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Mapping, Optional, Tuple, Union
+
+from .columns import SeriesColumns, require_optional
+from .exceptions import InvalidInputError
+from .sensors import PERIOD_CADENCE_SECONDS
+
+FillMethodLiteral = Literal["nan", "ffill", "linear"]
+CadenceType = Union[int, str]
+
+
+@dataclass(frozen=True)
+class Gap:
+    """A run of consecutive missing grid slots, given by its first and last slot (epoch seconds)."""
+    start: int
+    end: int
+    slots: int
+
+
+@dataclass
+class GapReport:
+    """
+    Grid coverage of one variable.
+
+    Attributes:
+        variable: Variable name.
+        cadence: Grid step in seconds.
+        expected: Grid slots in the requested range.
+        present: Slots holding a real (non-NaN) sample.
+        gaps: Runs of missing slots, in time order.
+    """
+    variable: str
+    cadence: int
+    expected: int
+    present: int
+    gaps: List[Gap] = field(default_factory=list)
+
+    @property
+    def missing(self) -> int:
+        return self.expected - self.present
+
+    @property
+    def coverage(self) -> float:
+        """Fraction of slots with a real sample (1.0 for an empty grid)."""
+        return self.present / self.expected if self.expected else 1.0
+
+    @property
+    def longest_gap(self) -> int:
+        """Slots in the longest gap (0 if none)."""
+        return max((gap.slots for gap in self.gaps), default=0)
+
+
+def resolve_cadence(cadence: CadenceType) -> int:
+    """
+    Grid step in seconds for a cadence given in seconds or as a `period_grouping`.
+
+    Raises:
+        InvalidInputError: If the period grouping is unknown or the step is not positive.
+    """
+    if isinstance(cadence, str):
+        if cadence not in PERIOD_CADENCE_SECONDS:
+            raise InvalidInputError(f"Unknown period_grouping '{cadence}'. Valid values are: {list(PERIOD_CADENCE_SECONDS)}")
+        return PERIOD_CADENCE_SECONDS[cadence]
+    if cadence <= 0:
+        raise InvalidInputError("cadence must be a positive number of seconds.")
+    return int(cadence)
+
+
+def make_grid(start: int, end: int, cadence: int) -> array:
+    """Grid points from the first multiple of `cadence` at or after `start` up to `end`."""
+    first = -(-start // cadence) * cadence
+    if first > end:
+        return array('q')
+    return array('q', range(first, end + 1, cadence))
+
+
+def _valid(columns: SeriesColumns) -> Tuple[array, array]:
+    if not any(math.isnan(v) for v in columns.values):
+        return columns.timestamps, columns.values
+    pairs = [(t, v) for t, v in zip(columns.timestamps, columns.values) if not math.isnan(v)]
+    return array('q', [t for t, _ in pairs]), array('d', [v for _, v in pairs])
+
+
+def _gaps(grid: array, present: List[bool]) -> List[Gap]:
+    gaps: List[Gap] = []
+    run_start = None
+    for k, is_present in enumerate(present):
+        if not is_present and run_start is None:
+            run_start = k
+        elif is_present and run_start is not None:
+            gaps.append(Gap(grid[run_start], grid[k - 1], k - run_start))
+            run_start = None
+    if run_start is not None:
+        gaps.append(Gap(grid[run_start], grid[-1], len(grid) - run_start))
+    return gaps
+
+
+def _fill_python(ts: array, values: array, grid: array, cadence: int, method: str,
+                 max_gap: Optional[int]) -> Tuple[array, List[bool]]:
+    nan = math.nan
+    out = array('d', [nan]) * len(grid)
+    present = [False] * len(grid)
+    n = len(ts)
+    j = 0
+    for k, g in enumerate(grid):
+        while j < n and ts[j] <= g:
+            j += 1
+        # Now ts[j - 1] <= g < ts[j].
+        if j > 0 and ts[j - 1] == g:
+            out[k] = values[j - 1]
+            present[k] = True
+        elif method == "ffill" and j > 0:
+            # A trailing gap runs to the end of the grid.
+            following = ts[j] if j < n else grid[-1] + cadence
+            if max_gap is None or following - ts[j - 1] <= (max_gap + 1) * cadence:
+                out[k] = values[j - 1]
+        elif method == "linear" and 0 < j < n:
+            t0, t1 = ts[j - 1], ts[j]
+            if max_gap is None or t1 - t0 <= (max_gap + 1) * cadence:
+                out[k] = values[j - 1] + (values[j] - values[j - 1]) * (g - t0) / (t1 - t0)
+    return out, present
+
+
+def _fill_numpy(ts: array, values: array, grid: array, cadence: int, method: str,
+                max_gap: Optional[int]) -> Tuple[array, List[bool]]:
+    np = require_optional("numpy", "resample(use_numpy=True)")
+    ts_np = np.frombuffer(ts, dtype=np.int64) if len(ts) else np.zeros(0, dtype=np.int64)
+    values_np = np.frombuffer(values, dtype=np.float64) if len(values) else np.zeros(0)
+    grid_np = np.frombuffer(grid, dtype=np.int64)
+    out = np.full(len(grid_np), np.nan)
+    after = np.searchsorted(ts_np, grid_np, side="right")
+    before = after - 1
+    has_before = before >= 0
+    safe_before = np.clip(before, 0, None)
+    exact = np.zeros(len(grid_np), dtype=bool)
+    if len(ts_np) and len(grid_np):
+        exact = has_before & (ts_np[safe_before] == grid_np)
+        out[exact] = values_np[before[exact]]
+        if method == "ffill":
+            fill = has_before & ~exact
+            if max_gap is not None:
+                # A trailing gap runs to the end of the grid.
+                following = np.append(ts_np, grid_np[-1] + cadence)[after]
+                fill &= following - ts_np[safe_before] <= (max_gap + 1) * cadence
+            out[fill] = values_np[before[fill]]
+        elif method == "linear":
+            fill = has_before & ~exact & (after < len(ts_np))
+            if max_gap is not None:
+                safe_after = np.clip(after, 0, len(ts_np) - 1)
+                fill &= ts_np[safe_after] - ts_np[safe_before] <= (max_gap + 1) * cadence
+            out[fill] = np.interp(grid_np[fill], ts_np, values_np)
+    result = array('d')
+    result.frombytes(out.tobytes())
+    return result, exact.tolist()
+
+
+def align_to_grid(
+    series: Mapping[str, SeriesColumns],
+    cadence: CadenceType,
+    method: FillMethodLiteral = "nan",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    max_gap: Optional[int] = None,
+    use_numpy: Optional[bool] = None,
+) -> Tuple[array, Dict[str, array], Dict[str, GapReport]]:
+    """
+    Resamples many variables onto one shared regular grid.
+
+    Args:
+        series: Mapping of variable name to its series.
+        cadence: Grid step in seconds, or a `period_grouping` whose cadence is used.
+        method: "nan" leaves missing slots as NaN; "ffill" repeats the last sample;
+                "linear" interpolates between the surrounding samples.
+        start: First grid time (epoch seconds). Defaults to the earliest sample.
+        end: Last grid time (epoch seconds). Defaults to the latest sample.
+        max_gap: With "ffill"/"linear", gaps longer than this many slots stay entirely NaN;
+                 shorter ones are filled completely.
+        use_numpy: Force (True) or avoid (False) NumPy. Defaults to NumPy if installed.
+
+    Returns:
+        `(grid, values_by_name, reports_by_name)`: the grid as `array('q')`, an `array('d')`
+        per variable aligned with it, and a `GapReport` per variable.
+
+    Raises:
+        InvalidInputError: If the cadence or method is invalid.
+    """
+    step = resolve_cadence(cadence)
+    if method not in ("nan", "ffill", "linear"):
+        raise InvalidInputError(f"Invalid fill method '{method}'. Use 'nan', 'ffill' or 'linear'.")
+    if max_gap is not None and max_gap < 0:
+        raise InvalidInputError("max_gap must not be negative.")
+    valid = {name: _valid(columns) for name, columns in series.items()}
+    firsts = [ts[0] for ts, _ in valid.values() if ts]
+    lasts = [ts[-1] for ts, _ in valid.values() if ts]
+    if start is None:
+        start = min(firsts) if firsts else 0
+    if end is None:
+        end = max(lasts) if lasts else -1
+    grid = make_grid(start, end, step)
+    if use_numpy is None:
+        use_numpy = importlib.util.find_spec("numpy") is not None
+    fill = _fill_numpy if use_numpy else _fill_python
+
+    aligned: Dict[str, array] = {}
+    reports: Dict[str, GapReport] = {}
+    for name, (ts, values) in valid.items():
+        column, present = fill(ts, values, grid, step, method, max_gap)
+        aligned[name] = column
+        reports[name] = GapReport(name, step, len(grid), sum(present), _gaps(grid, present))
+    return grid, aligned, reports
+
+
+def resample(
+    columns: SeriesColumns,
+    cadence: CadenceType,
+    method: FillMethodLiteral = "nan",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    max_gap: Optional[int] = None,
+    use_numpy: Optional[bool] = None,
+) -> Tuple[SeriesColumns, GapReport]:
+    """Resamples one series onto a regular grid; see `align_to_grid` for the arguments."""
+    grid, aligned, reports = align_to_grid({"": columns}, cadence, method, start, end, max_gap, use_numpy)
+    return SeriesColumns(grid, aligned[""]), reports[""]
+
+
+def detect_gaps(columns: SeriesColumns, cadence: CadenceType, variable: str = "") -> GapReport:
+    """Gap report of a series against its expected cadence, between its first and last sample."""
+    _, _, reports = align_to_grid({variable: columns}, cadence)
+    return reports[variable]
@@ -0,0 +1,283 @@
+"""
+Adaptive polling scheduler for sensor data.
+
+Polling every variable at one fixed interval wastes requests on green stations and is
+too slow for red ones. `AdaptivePollScheduler` gives each sensor its own poll interval,
+derived from the cadence of its period grouping (see `PERIOD_CADENCE_SECONDS`) and the
+risk level (`estadoInt`) of its station. Polls are aligned just after the moment the
+upstream is expected to publish a new sample (daily cadences on Madrid local midnight),
+and all sensors share one request budget.
+Due sensors wait in a priority queue, so under a tight budget red stations go first.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import aiohttp
+
+from .exceptions import CHJSAIHError
+from .sensors import Sensor, PERIOD_CADENCE_SECONDS
+from .timezone import MADRID
+
+_LOGGER = logging.getLogger(__name__)
+
+RISK_INTERVAL_FACTORS: Dict[int, int] = {
+    3: 1,  # red: every upstream update
+    2: 1,  # yellow: every upstream update
+    1: 3,  # green: every third update
+    0: 6,  # unknown / offline
+}
+"""Multiplier applied to the period cadence for each `estadoInt` risk level."""
+
+PollResult = Union[Dict[str, Any], CHJSAIHError]
+PollCallback = Callable[["PollJob", PollResult], Optional[Awaitable[None]]]
+JobKey = Tuple[str, str]
+
+
+@dataclass
+class PollJob:
+    """A sensor registered in the scheduler, with its current risk and timing."""
+    sensor: Sensor
+    risk: int = 0
+    interval: float = 0.0
+    due: float = 0.0
+    last_polled: Optional[float] = None
+    version: int = field(default=0, repr=False)
+
+    @property
+    def key(self) -> JobKey:
+        return (self.sensor.variable, self.sensor.period_grouping)
+
+
+class AdaptivePollScheduler:
+    """
+    Polls many sensors as an asyncio task under a fixed request budget.
+
+    Each job becomes due at `interval_for(period_grouping, risk)` seconds, aligned to the
+    upstream cadence plus `settle_delay`. Due jobs enter a ready queue ordered by risk
+    (highest first) and then by how overdue they are; they are fetched at no more than
+    `max_requests_per_minute` and `max_concurrency`. Results (parsed data, or the
+    `CHJSAIHError` raised) are handed to `callback`, which may be a coroutine function.
+    Unexpected errors of a fetch are wrapped in a `CHJSAIHError`; errors raised by the
+    callback are logged. Either way the job keeps its next slot.
+    """
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        callback: PollCallback,
+        max_requests_per_minute: float = 60.0,
+        max_concurrency: int = 4,
+        settle_delay: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            session: The aiohttp client session used for every fetch.
+            callback: Called with `(job, result)` after each poll.
+            max_requests_per_minute: Request budget shared by all jobs.
+            max_concurrency: Maximum simultaneous requests.
+            settle_delay: Seconds after an expected upstream update before polling, so the
+                          new sample is already published.
+            clock: Wall-clock function returning epoch seconds. Replaceable for testing.
+        """
+        if max_requests_per_minute <= 0 or max_concurrency <= 0:
+            raise ValueError("max_requests_per_minute and max_concurrency must be positive.")
+        self.session = session
+        self.callback = callback
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.settle_delay = settle_delay
+        self.clock = clock
+        self._jobs: Dict[JobKey, PollJob] = {}
+        self._waiting: List[Tuple[float, int, JobKey, int]] = []  # (due, seq, key, version)
+        self._ready: List[Tuple[int, float, int, JobKey, int]] = []  # (-risk, due, seq, key, version)
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._polls: Set["asyncio.Task[None]"] = set()
+
+    @staticmethod
+    def interval_for(period_grouping: str, risk: int) -> float:
+        """Poll interval in seconds for a period grouping at a given risk level."""
+        cadence = PERIOD_CADENCE_SECONDS.get(period_grouping, 300)
+        return float(cadence * RISK_INTERVAL_FACTORS.get(risk, RISK_INTERVAL_FACTORS[0]))
+
+    def next_due(self, interval: float, now: float) -> float:
+        """
+        Next poll time after `now`: the next interval boundary plus `settle_delay`.
+
+        Intervals of whole days are aligned to Madrid local midnight, when the upstream
+        closes its daily values, rather than to UTC midnight.
+        """
+        if interval >= 86400 and interval % 86400 == 0:
+            local = MADRID.utc_to_local(now - self.settle_delay)
+            boundary = math.floor(local / interval) * interval + interval
+            return MADRID.local_to_utc(boundary) + self.settle_delay
+        boundary = math.floor((now - self.settle_delay) / interval) * interval + self.settle_delay
+        return boundary + interval
+
+    @property
+    def jobs(self) -> List[PollJob]:
+        """The registered jobs."""
+        return list(self._jobs.values())
+
+    def add(self, sensor: Sensor, risk: int = 0, poll_now: bool = True) -> PollJob:
+        """
+        Registers a sensor, replacing any job for the same variable and period grouping.
+
+        Args:
+            sensor: The sensor to poll.
+            risk: Current `estadoInt` of its station (0 to 3).
+            poll_now: Whether to poll immediately instead of waiting for the next aligned slot.
+        """
+        job = PollJob(sensor=sensor, risk=risk, interval=self.interval_for(sensor.period_grouping, risk))
+        old = self._jobs.get(job.key)
+        if old is not None:
+            job.version = old.version + 1
+        now = self.clock()
+        self._jobs[job.key] = job
+        self._schedule(job, now if poll_now else self.next_due(job.interval, now))
+        return job
+
+    def remove(self, variable: str, period_grouping: str) -> None:
+        """Unregisters a job. Queue entries for it are discarded lazily."""
+        self._jobs.pop((variable, period_grouping), None)
+
+    def update_risk(self, stations: Iterable[Dict[str, Any]]) -> List[PollJob]:
+        """
+        Applies `estadoInt` values from station lists (e.g. `fetch_all_stations`) to the jobs.
+
+        Jobs whose risk rises are promoted: their interval shrinks and they are polled
+        right away. Jobs whose risk falls keep their current slot and use the longer
+        interval from the next poll on.
+
+        Returns:
+            The promoted jobs.
+        """
+        risk_by_variable = {
+            station.get("variable"): station.get("estadoInt")
+            for station in stations
+            if isinstance(station.get("estadoInt"), int)
+        }
+        promoted: List[PollJob] = []
+        now = self.clock()
+        for job in self._jobs.values():
+            new_risk = risk_by_variable.get(job.sensor.variable)
+            if new_risk is None or new_risk == job.risk:
+                continue
+            raised = new_risk > job.risk
+            job.risk = new_risk
+            job.interval = self.interval_for(job.sensor.period_grouping, new_risk)
+            if raised:
+                job.version += 1
+                self._schedule(job, now)
+                promoted.append(job)
+        return promoted
+
+    def _schedule(self, job: PollJob, due: float) -> None:
+        job.due = due
+        heapq.heappush(self._waiting, (due, next(self._seq), job.key, job.version))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _current(self, key: JobKey, version: int) -> Optional[PollJob]:
+        job = self._jobs.get(key)
+        return job if job is not None and job.version == version else None
+
+    def _promote_due(self, now: float) -> None:
+        """Moves due entries from the waiting heap to the risk-ordered ready heap."""
+        while self._waiting and self._waiting[0][0] <= now:
+            due, seq, key, version = heapq.heappop(self._waiting)
+            job = self._current(key, version)
+            if job is not None:
+                heapq.heappush(self._ready, (-job.risk, due, seq, key, version))
+
+    def _pop_ready(self) -> Optional[PollJob]:
+        while self._ready:
+            _, _, _, key, version = heapq.heappop(self._ready)
+            job = self._current(key, version)
+            if job is not None:
+                return job
+        return None
+
+    async def _poll(self, job: PollJob, semaphore: asyncio.Semaphore) -> None:
+        version = job.version
+        try:
+            result: PollResult = await job.sensor.get_data(self.session)
+        except CHJSAIHError as e:
+            result = e
+        except Exception as e:
+            _LOGGER.exception("Polling %s (%s) failed", job.sensor.variable, job.sensor.period_grouping)
+            result = CHJSAIHError(f"Unexpected error polling {job.sensor.variable}: {type(e).__name__}: {e}")
+        finally:
+            semaphore.release()
+        now = self.clock()
+        job.last_polled = now
+        # A promotion while in flight has already queued the job again.
+        if self._current(job.key, version) is job:
+            self._schedule(job, self.next_due(job.interval, now))
+        try:
+            outcome = self.callback(job, result)
+            if asyncio.iscoroutine(outcome):
+                await outcome
+        except Exception:
+            _LOGGER.exception("Poll callback failed for %s (%s)", job.sensor.variable, job.sensor.period_grouping)
+
+    async def run(self) -> None:
+        """Runs the scheduling loop until cancelled."""
+        self._wakeup = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        spacing = 60.0 / self.max_requests_per_minute
+        next_slot = self.clock()
+        try:
+            while True:
+                now = self.clock()
+                self._promote_due(now)
+                if self._ready and now >= next_slot:
+                    job = self._pop_ready()
+                    if job is not None:
+                        await semaphore.acquire()
+                        task = asyncio.create_task(self._poll(job, semaphore))
+                        self._polls.add(task)
+                        task.add_done_callback(self._polls.discard)
+                        next_slot = max(next_slot, self.clock()) + spacing
+                    continue
+
+                if self._ready:
+                    timeout = next_slot - now
+                elif self._waiting:
+                    timeout = max(0.0, self._waiting[0][0] - now)
+                else:
+                    timeout = None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            polls = list(self._polls)
+            for task in polls:
+                task.cancel()
+            await asyncio.gather(*polls, return_exceptions=True)
+            self._wakeup = None
+
+    def start(self) -> "asyncio.Task[None]":
+        """Starts `run()` as a background task on the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancels the background task and any in-flight polls."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
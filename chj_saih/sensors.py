@@ -6,15 +6,85 @@ different types of hydrological sensors like rain gauges, flow meters, etc.
 It uses `SensorDataParser` to handle the common structure of the API's JSON response
 and extract time-series data.
 """
-from datetime import datetime
-from typing import List, Tuple, Dict, Any, Union, Optional # Added Optional
+import asyncio
+from array import array
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterator, List, Tuple, Dict, Any, Sequence, Union, Optional, TYPE_CHECKING # Added Optional
 import aiohttp
 
 from chj_saih.data_fetcher import fetch_sensor_data
-from .exceptions import DataParseError, APIError
+from .columns import SeriesColumns, EPOCH
+from .exceptions import CHJSAIHError, DataParseError, APIError
+from .timezone import AmbiguousLiteral, MADRID, NonexistentLiteral, columns_to_utc, utc_datetime
+
+if TYPE_CHECKING:
+    from .executors import ParseExecutor
 
 RawSensorDataType = List[Union[Dict[str, Any], List[List[Any]], Dict[str, Any]]] # More precise for inner list
 
+PERIOD_CADENCE_SECONDS: Dict[str, int] = {
+    "ultimos5minutales": 300,
+    "ultimashoras": 3600,
+    "ultimashorasaforo": 3600,
+    "ultimodia": 3600,
+    "ultimasemana": 3600,
+    "ultimomes": 86400,
+    "ultimoanno": 86400
+}
+"""Expected spacing in seconds between consecutive samples for each period grouping."""
+
+_ONE_SECOND = timedelta(seconds=1)
+_DAYS_IN_MONTH = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """Days since 1970-01-01 for a proleptic Gregorian date (H. Hinnant's algorithm)."""
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _fixed_digits(text: str, width: int) -> Optional[int]:
+    """`text` as an int if it is exactly `width` ASCII digits, else None."""
+    if len(text) != width or not (text.isascii() and text.isdigit()):
+        return None
+    return int(text)
+
+
+def _split_date(date_str: str, date_format: str) -> Optional[Tuple[int, int, int, int, int]]:
+    """
+    (year, month, day, hour, minute) of a zero-padded date in a `get_date_format` format.
+
+    Returns None when the fast path cannot vouch for the string; callers then use `strptime`.
+    """
+    if date_format == "%d/%m/%Y %H:%M":
+        date_part, _, time_part = date_str.partition(" ")
+        hour_str, _, minute_str = time_part.partition(":")
+    elif date_format == "%d/%m/%Y %Hh.":
+        date_part, _, time_part = date_str.partition(" ")
+        if not time_part.endswith("h."):
+            return None
+        hour_str, minute_str = time_part[:-2], "00"
+    elif date_format == "%d/%m/%Y":
+        date_part, hour_str, minute_str = date_str, "00", "00"
+    else:
+        return None
+    date_fields = date_part.split("/")
+    if len(date_fields) != 3:
+        return None
+    day, month, year = (_fixed_digits(date_fields[0], 2), _fixed_digits(date_fields[1], 2), _fixed_digits(date_fields[2], 4))
+    hour, minute = _fixed_digits(hour_str, 2), _fixed_digits(minute_str, 2)
+    if day is None or month is None or year is None or hour is None or minute is None:
+        return None
+    if not (1 <= month <= 12 and 1 <= day <= _DAYS_IN_MONTH[month - 1] and hour < 24 and minute < 60):
+        return None
+    if month == 2 and day == 29 and not (year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)):
+        return None
+    return year, month, day, hour, minute
+
 class SensorDataParser:
     """
     Parses the raw JSON data structure returned by the CHJ-SAIH API for sensor readings.
@@ -63,6 +133,18 @@ class SensorDataParser:
         }
         return date_format_mapping.get(period_grouping, "%d/%m/%Y %H:%M") # Default format
 
+    def get_cadence(self, period_grouping: str) -> int:
+        """
+        Returns the expected spacing between samples for a 'period_grouping'.
+
+        Args:
+            period_grouping: The time period grouping string (e.g., "ultimos5minutales").
+
+        Returns:
+            The cadence in seconds. Unknown groupings default to 5 minutes, like `get_date_format`.
+        """
+        return PERIOD_CADENCE_SECONDS.get(period_grouping, 300)
+
     def parse_date(self, date_str: str, date_format: str) -> datetime:
         """
         Converts a date string to a datetime object using the specified format.
@@ -82,33 +164,98 @@ class SensorDataParser:
         except ValueError as e:
             raise DataParseError(f"Error parsing date string '{date_str}' with format '{date_format}'. Original error: {e}") from e
 
-    def extract_data(self, period_grouping: Optional[str] = None) -> List[Tuple[datetime, Optional[float]]]:
+    def to_epoch_seconds(self, date_str: str, date_format: str) -> int:
         """
-        Extracts and transforms sensor values into a list of (datetime, value) tuples.
-        Values are sorted by datetime.
+        Converts a date string to seconds since 1970-01-01, without building a datetime.
+
+        Strings in one of the formats returned by `get_date_format`, with zero-padded
+        fields, are decoded by splitting the string; anything else (other formats, unpadded
+        or malformed fields, out-of-range dates) goes through `parse_date`, so the result and
+        the accepted inputs are those of `strptime`. No timezone conversion is applied.
 
         Args:
-            period_grouping: The time period grouping string, used to determine date format.
-                             If None, uses a default format.
+            date_str: The date string to parse.
+            date_format: The strptime format string.
 
         Returns:
-            A list of (datetime, value) tuples. Value can be None if unparseable.
-            Filters out entries where date parsing failed or value was originally None.
+            The wall-clock time as integer seconds since the epoch.
 
         Raises:
-            DataParseError: Propagated from `parse_date` if date parsing fails.
+            DataParseError: If the date string does not match the format.
         """
-        # Determine date_format. If period_grouping is not available (e.g. from metadata), use a default.
+        fields = _split_date(date_str, date_format)
+        if fields is None:
+            return int((self.parse_date(date_str, date_format) - EPOCH).total_seconds())
+        year, month, day, hour, minute = fields
+        return _days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60
+
+    def _resolve_period_grouping(self, period_grouping: Optional[str]) -> str:
+        """Returns `period_grouping`, else the one in the metadata's 'paramVisual', else the default."""
         # self.metadata might be like {'paramVisual': [{'nombre': 'ultimos5minutales', ...}]}
         actual_period_grouping = period_grouping
         if not actual_period_grouping and isinstance(self.metadata, dict):
             param_visual = self.metadata.get('paramVisual')
             if isinstance(param_visual, list) and len(param_visual) > 0 and isinstance(param_visual[0], dict):
                 actual_period_grouping = param_visual[0].get('nombre')
+        return actual_period_grouping or "ultimos5minutales" # Default if still None
 
-        date_format = self.get_date_format(actual_period_grouping or "ultimos5minutales") # Default if still None
+    def extract_columns(self, period_grouping: Optional[str] = None) -> SeriesColumns:
+        """
+        Extracts sensor values into columnar buffers, sorted by timestamp.
+
+        Applies the same filtering as `extract_data`, but writes straight into an
+        `array('q')` of epoch seconds and an `array('d')` of values (NaN where the value
+        is not numeric), so no per-sample datetime or tuple objects are created.
+
+        Args:
+            period_grouping: The time period grouping string, used to determine date format.
+                             If None, it is taken from the metadata or defaults.
 
-        parsed_data: List[Tuple[datetime, Optional[float]]] = []
+        Returns:
+            A `SeriesColumns` with the parsed series.
+        """
+        date_format = self.get_date_format(self._resolve_period_grouping(period_grouping))
+        nan = float("nan")
+        timestamps = array('q')
+        values = array('d')
+        in_order = True
+        previous = None
+        for item in self.values:
+            if isinstance(item, list) and len(item) == 2:
+                date_str, value = item
+                if value is not None and isinstance(date_str, str):
+                    try:
+                        ts = self.to_epoch_seconds(date_str, date_format)
+                    except DataParseError:
+                        continue # Skip this entry, as extract_data does
+                    try:
+                        numeric_value = float(value)
+                    except (ValueError, TypeError):
+                        numeric_value = nan
+                    if previous is not None and ts < previous:
+                        in_order = False
+                    previous = ts
+                    timestamps.append(ts)
+                    values.append(numeric_value)
+
+        if not in_order:
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            timestamps = array('q', [timestamps[i] for i in order])
+            values = array('d', [values[i] for i in order])
+        return SeriesColumns(timestamps, values)
+
+    def iter_data(self, period_grouping: Optional[str] = None) -> Iterator[Tuple[datetime, Optional[float]]]:
+        """
+        Yields (datetime, value) tuples one at a time, in the order the API returned them.
+
+        Same filtering as `extract_data`, but without the final sort, so nothing is
+        materialized. The API returns values in ascending time order.
+
+        Args:
+            period_grouping: The time period grouping string, used to determine date format.
+                             If None, uses a default format.
+        """
+        date_format = self.get_date_format(self._resolve_period_grouping(period_grouping))
         for item in self.values:
             if isinstance(item, list) and len(item) == 2:
                 date_str, value = item
@@ -125,16 +272,66 @@ class SensorDataParser:
                             pass
 
                         dt = self.parse_date(date_str, date_format)
-                        parsed_data.append((dt, numeric_value))
                     except DataParseError: # Propagate if date parsing fails critically
                         # Optionally log here or decide to skip the problematic entry
                         # print(f"Skipping entry due to date parse error for '{date_str}'")
-                        pass # Skip this entry
+                        continue # Skip this entry
+                    yield (dt, numeric_value)
+
+    def extract_data(self, period_grouping: Optional[str] = None) -> List[Tuple[datetime, Optional[float]]]:
+        """
+        Extracts and transforms sensor values into a list of (datetime, value) tuples.
+        Values are sorted by datetime.
+
+        Args:
+            period_grouping: The time period grouping string, used to determine date format.
+                             If None, uses a default format.
+
+        Returns:
+            A list of (datetime, value) tuples. Value can be None if unparseable.
+            Filters out entries where date parsing failed or value was originally None.
 
+        Raises:
+            DataParseError: Propagated from `parse_date` if date parsing fails.
+        """
+        parsed_data = list(self.iter_data(period_grouping))
         # Sort by datetime before returning
         parsed_data.sort(key=lambda x: x[0])
         return parsed_data
 
+    def extract_data_utc(
+        self,
+        period_grouping: Optional[str] = None,
+        ambiguous: AmbiguousLiteral = "infer",
+        nonexistent: NonexistentLiteral = "shift_forward"
+    ) -> List[Tuple[datetime, Optional[float]]]:
+        """
+        Like `extract_data`, but with aware UTC datetimes instead of naive Madrid local time.
+
+        Args:
+            period_grouping: The time period grouping string, used to determine date format.
+            ambiguous: Policy for the repeated autumn hour (see `chj_saih.timezone`).
+            nonexistent: Policy for the skipped spring hour (see `chj_saih.timezone`).
+
+        Raises:
+            DataParseError: For ambiguous or nonexistent times when a policy is "raise".
+        """
+        readings = list(self.iter_data(period_grouping)) # API order, so "infer" sees first occurrences first
+        local = array('q', [(dt - EPOCH) // _ONE_SECOND for dt, _ in readings])
+        utc = MADRID.local_to_utc_many(local, ambiguous, nonexistent)
+        parsed_data = [(utc_datetime(ts), value) for ts, (_, value) in zip(utc, readings)]
+        parsed_data.sort(key=lambda x: x[0])
+        return parsed_data
+
+    def extract_columns_utc(
+        self,
+        period_grouping: Optional[str] = None,
+        ambiguous: AmbiguousLiteral = "infer",
+        nonexistent: NonexistentLiteral = "shift_forward"
+    ) -> SeriesColumns:
+        """Like `extract_columns`, but with timestamps in UTC epoch seconds."""
+        return columns_to_utc(self.extract_columns(period_grouping), ambiguous, nonexistent)
+
 class Sensor:
     """
     Base class for different types of hydrological sensors.
@@ -157,26 +354,107 @@ class Sensor:
         self.period_grouping = period_grouping
         self.num_values = num_values
 
-    async def get_data(self, session: aiohttp.ClientSession) -> Dict[str, Any]:
+    async def get_data(
+        self,
+        session: aiohttp.ClientSession,
+        executor: Optional["ParseExecutor"] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Fetches and parses sensor data.
 
         Args:
             session: The aiohttp client session to use for the request.
+            executor: Optional `ParseExecutor` to parse off the event loop. Parsed inline if None.
+            timeout: Seconds after which the request is cancelled. None waits indefinitely.
 
         Returns:
             A dictionary containing parsed sensor data, specific to the sensor type.
 
         Raises:
+            DeadlineExceededError: If the request does not complete within `timeout`.
             APIError: If `fetch_sensor_data` encounters an API or client error.
             DataParseError: If `parse_data` (or `SensorDataParser`) fails to parse
                             the raw data due to format issues or unparseable values.
         """
-        raw_data = await fetch_sensor_data(self.variable, self.period_grouping, self.num_values, session)
+        raw_data = await fetch_sensor_data(self.variable, self.period_grouping, self.num_values, session, timeout)
         if raw_data is None: # Should not happen if fetch_sensor_data raises APIError
             raise DataParseError("Received no raw data from fetch_sensor_data.")
+        if executor is not None:
+            return await executor.parse_data(self, raw_data)
         return self.parse_data(raw_data)
 
+    async def get_columns(
+        self,
+        session: aiohttp.ClientSession,
+        executor: Optional["ParseExecutor"] = None,
+        timeout: Optional[float] = None
+    ) -> SeriesColumns:
+        """
+        Fetches sensor data and parses it into columnar buffers.
+
+        Args:
+            session: The aiohttp client session to use for the request.
+            executor: Optional `ParseExecutor` to parse off the event loop. Parsed inline if None.
+            timeout: Seconds after which the request is cancelled. None waits indefinitely.
+
+        Returns:
+            A `SeriesColumns`, ready for `to_numpy()`, `to_arrow()` or `to_pandas()`.
+
+        Raises:
+            DeadlineExceededError: If the request does not complete within `timeout`.
+            APIError: If `fetch_sensor_data` encounters an API or client error.
+            DataParseError: If the raw data is malformed.
+        """
+        raw_data = await fetch_sensor_data(self.variable, self.period_grouping, self.num_values, session, timeout)
+        if raw_data is None:
+            raise DataParseError("Received no raw data from fetch_sensor_data.")
+        if executor is not None:
+            return await executor.parse_columns(self, raw_data)
+        return self.parse_columns(raw_data)
+
+    async def iter_data(
+        self,
+        session: aiohttp.ClientSession,
+        chunk_size: Optional[int] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Fetches sensor data and yields readings as they are parsed.
+
+        Readings come in API order (ascending time) with the same filtering as `parse_data`.
+        Control returns to the event loop between chunks, so other coroutines keep running
+        while a large payload is consumed.
+
+        Args:
+            session: The aiohttp client session to use for the request.
+            chunk_size: If None, yields single `(datetime, value)` tuples; otherwise yields
+                        lists of up to `chunk_size` tuples.
+
+        Raises:
+            APIError: If `fetch_sensor_data` encounters an API or client error.
+            DataParseError: If the raw data is malformed.
+        """
+        raw_data = await fetch_sensor_data(self.variable, self.period_grouping, self.num_values, session)
+        if raw_data is None:
+            raise DataParseError("Received no raw data from fetch_sensor_data.")
+        async for item in _iter_parsed(SensorDataParser(raw_data), self.period_grouping, chunk_size):
+            yield item
+
+    def parse_columns(self, raw_data: RawSensorDataType) -> SeriesColumns:
+        """
+        Parses raw sensor data into columnar buffers. Same filtering as `parse_data`.
+
+        Args:
+            raw_data: The raw data list from the API.
+
+        Returns:
+            A `SeriesColumns` with the parsed series.
+
+        Raises:
+            DataParseError: If raw_data is malformed.
+        """
+        return SensorDataParser(raw_data).extract_columns(self.period_grouping)
+
     def parse_data(self, raw_data: RawSensorDataType) -> Dict[str, Any]:
         """
         Abstract method to parse raw sensor data into a structured format.
@@ -278,3 +556,92 @@ class TemperatureSensor(Sensor):
         parser = SensorDataParser(raw_data)
         values = parser.extract_data(self.period_grouping)
         return {"temperature_data": values}
+
+SENSOR_CLASS_BY_TYPE: Dict[str, type] = {
+    'p': RainGaugeSensor,
+    'a': FlowSensor,
+    'e': ReservoirSensor,
+    't': TemperatureSensor
+}
+"""Sensor class for each station list type ('p' rain, 'a' flow, 'e' reservoir, 't' temperature)."""
+
+
+async def _iter_parsed(parser: SensorDataParser, period_grouping: str, chunk_size: Optional[int]) -> AsyncIterator[Any]:
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    chunk: List[Tuple[datetime, Optional[float]]] = []
+    for reading in parser.iter_data(period_grouping):
+        if chunk_size is None:
+            yield reading
+            await asyncio.sleep(0)
+            continue
+        chunk.append(reading)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+            await asyncio.sleep(0)
+    if chunk:
+        yield chunk
+
+
+async def iter_sensors_data(
+    sensors: Sequence[Sensor],
+    session: aiohttp.ClientSession,
+    chunk_size: int = 100,
+    max_concurrency: int = 8
+) -> AsyncIterator[Tuple[Sensor, Union[List[Tuple[datetime, Optional[float]]], CHJSAIHError]]]:
+    """
+    Fetches many sensors concurrently and yields their readings as responses arrive.
+
+    Sensors are interleaved in completion order, not input order. At most `max_concurrency`
+    responses are in flight or waiting to be consumed, so memory stays bounded however many
+    sensors are requested and however slowly the caller consumes.
+
+    Args:
+        sensors: Sensor instances to fetch.
+        session: The aiohttp client session.
+        chunk_size: Maximum readings per yielded chunk.
+        max_concurrency: Maximum responses fetched ahead of the consumer.
+
+    Yields:
+        `(sensor, chunk)` tuples, where chunk is a list of `(datetime, value)` readings, or
+        `(sensor, error)` with the `CHJSAIHError` raised for a sensor whose fetch or parse failed.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    semaphore = asyncio.Semaphore(max_concurrency)
+    ready: "asyncio.Queue[Tuple[Sensor, Any]]" = asyncio.Queue()
+
+    async def _fetch(sensor: Sensor) -> None:
+        await semaphore.acquire()  # Released by the consumer once the payload is parsed.
+        try:
+            raw_data = await fetch_sensor_data(sensor.variable, sensor.period_grouping, sensor.num_values, session)
+            if raw_data is None:
+                raise DataParseError("Received no raw data from fetch_sensor_data.")
+            await ready.put((sensor, raw_data))
+        except CHJSAIHError as e:
+            await ready.put((sensor, e))
+        except Exception as e:
+            error = APIError(f"Unexpected error while fetching sensor data for variable '{sensor.variable}': {e}")
+            await ready.put((sensor, error))
+
+    tasks = [asyncio.create_task(_fetch(sensor)) for sensor in sensors]
+    try:
+        for _ in range(len(tasks)):
+            sensor, raw_data = await ready.get()
+            try:
+                if isinstance(raw_data, CHJSAIHError):
+                    yield sensor, raw_data
+                    continue
+                try:
+                    parser = SensorDataParser(raw_data)
+                except DataParseError as e:
+                    yield sensor, e
+                    continue
+                async for chunk in _iter_parsed(parser, sensor.period_grouping, chunk_size):
+                    yield sensor, chunk
+            finally:
+                semaphore.release()
+    finally:
+        for task in tasks:
+            task.cancel()
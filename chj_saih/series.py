@@ -0,0 +1,133 @@
+"""
+Incrementally merged sensor series.
+
+Polling a sensor every few minutes with a window of `num_values` samples returns
+windows that mostly overlap the data already held. `SensorSeries` keeps one sorted,
+deduplicated series and merges each new window with a linear merge over the overlapping
+tail only, instead of concatenating and re-sorting everything.
+"""
+import bisect
+from array import array
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, Union
+
+from .columns import SeriesColumns
+
+WindowType = Union[SeriesColumns, Sequence[Tuple[datetime, Optional[float]]]]
+
+
+def _window_columns(window: WindowType) -> SeriesColumns:
+    if isinstance(window, SeriesColumns):
+        return window
+    return SeriesColumns.from_list(list(window))
+
+
+class SensorSeries:
+    """
+    A sorted, deduplicated series that absorbs overlapping windows.
+
+    Merging is linear in the size of the overlap plus the window. When a window
+    contains a timestamp that is already stored, the window's value replaces the stored
+    one (last write wins), which picks up upstream revisions of recent values.
+
+    Attributes:
+        max_length (Optional[int]): Keep at most this many newest samples.
+        max_age (Optional[float]): Drop samples older than this many seconds before the newest one.
+    """
+    def __init__(self, max_length: Optional[int] = None, max_age: Optional[float] = None):
+        if max_length is not None and max_length <= 0:
+            raise ValueError("max_length must be positive.")
+        self.max_length = max_length
+        self.max_age = max_age
+        self._timestamps = array('q')
+        self._values = array('d')
+        self._start = 0  # Samples before this index have been evicted; compacted lazily.
+
+    def __len__(self) -> int:
+        return len(self._timestamps) - self._start
+
+    def merge(self, window: WindowType) -> int:
+        """
+        Merges a parsed window into the series.
+
+        Args:
+            window: A `SeriesColumns` or a list of `(datetime, value)` tuples, as returned by
+                    `parse_columns` or `parse_data`. Expected sorted by time; unsorted windows
+                    are sorted first.
+
+        Returns:
+            The number of timestamps that were not in the series before.
+        """
+        columns = _window_columns(window)
+        w_ts, w_values = columns.timestamps, columns.values
+        if not w_ts:
+            return 0
+        if any(w_ts[k] > w_ts[k + 1] for k in range(len(w_ts) - 1)):
+            order = sorted(range(len(w_ts)), key=w_ts.__getitem__)
+            w_ts = array('q', [w_ts[k] for k in order])
+            w_values = array('d', [w_values[k] for k in order])
+
+        ts, values = self._timestamps, self._values
+        tail_start = bisect.bisect_left(ts, w_ts[0], self._start)
+        i, j = tail_start, 0
+        n, m = len(ts), len(w_ts)
+        merged_ts = array('q')
+        merged_values = array('d')
+        added = 0
+        while i < n or j < m:
+            if j >= m or (i < n and ts[i] < w_ts[j]):
+                t, v = ts[i], values[i]
+                i += 1
+            else:
+                t, v = w_ts[j], w_values[j]
+                if i < n and ts[i] == t:
+                    i += 1  # Stored sample is superseded by the window.
+                elif not merged_ts or merged_ts[-1] != t:
+                    added += 1
+                j += 1
+            if merged_ts and merged_ts[-1] == t:
+                merged_values[-1] = v  # Duplicate timestamp inside the window: keep the last.
+            else:
+                merged_ts.append(t)
+                merged_values.append(v)
+
+        del ts[tail_start:]
+        del values[tail_start:]
+        ts.extend(merged_ts)
+        values.extend(merged_values)
+        self._evict()
+        return added
+
+    def _evict(self) -> None:
+        ts = self._timestamps
+        start = self._start
+        if self.max_length is not None and len(ts) - start > self.max_length:
+            start = len(ts) - self.max_length
+        if self.max_age is not None and len(ts) > start:
+            start = max(start, bisect.bisect_left(ts, ts[-1] - self.max_age, start))
+        self._start = start
+        # Compact once evicted samples outnumber live ones, so the cost is amortized.
+        if self._start > len(ts) - self._start:
+            del ts[:self._start]
+            del self._values[:self._start]
+            self._start = 0
+
+    def to_columns(self) -> SeriesColumns:
+        """Returns a copy of the series as `SeriesColumns`."""
+        return SeriesColumns(self._timestamps[self._start:], self._values[self._start:])
+
+    def to_list(self) -> List[Tuple[datetime, Optional[float]]]:
+        """Returns the series as `(datetime, value)` tuples, like `extract_data`."""
+        return self.to_columns().to_list()
+
+    @property
+    def latest(self) -> Optional[Tuple[datetime, Optional[float]]]:
+        """The newest sample, or None if the series is empty."""
+        if not len(self):
+            return None
+        return self.tail(1)[0]
+
+    def tail(self, count: int) -> List[Tuple[datetime, Optional[float]]]:
+        """The newest `count` samples as `(datetime, value)` tuples."""
+        start = max(self._start, len(self._timestamps) - count)
+        return SeriesColumns(self._timestamps[start:], self._values[start:]).to_list()
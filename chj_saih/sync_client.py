@@ -0,0 +1,165 @@
+"""
+Synchronous facade over the asynchronous CHJ-SAIH API functions.
+
+Scripts, cron jobs and notebooks that are not written with asyncio usually wrap
+every call in `asyncio.run`, which creates a new event loop and a new
+`aiohttp.ClientSession` each time. `SyncCHJSAIHClient` instead owns a single
+event loop running in a background thread and one persistent session, so
+blocking callers reuse pooled connections and can still run requests concurrently.
+"""
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Sequence, Union, Coroutine, TypeVar
+
+import aiohttp
+
+from .data_fetcher import (
+    fetch_station_list,
+    fetch_all_stations,
+    fetch_sensor_data,
+    fetch_stations_by_risk,
+    fetch_station_list_by_location,
+    fetch_stations_by_subcuenca,
+    SensorTypeLiteral,
+    SensorTypeAllLiteral,
+    ComparisonLiteral,
+)
+from .exceptions import CHJSAIHError
+from .sensors import Sensor
+
+T = TypeVar("T")
+
+
+class SyncCHJSAIHClient:
+    """
+    Blocking client that runs the async API on a dedicated background event loop.
+
+    The client can be used as a context manager; `close()` must be called otherwise
+    to release the session and stop the background thread.
+
+    Example:
+        with SyncCHJSAIHClient() as client:
+            stations = client.fetch_station_list('a')
+            data = client.get_data(FlowSensor(stations[0]["variable"], "ultimashoras", 12))
+    """
+    def __init__(self, connection_limit: int = 10, max_concurrency: int = 10):
+        """
+        Starts the background event loop and opens the shared session.
+
+        Args:
+            connection_limit: Maximum number of simultaneous pooled connections.
+            max_concurrency: Default number of in-flight requests for bulk calls.
+        """
+        self.max_concurrency = max_concurrency
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="chj_saih-sync-client", daemon=True)
+        self._thread.start()
+        self._closed = False
+        self._session: aiohttp.ClientSession = self._run(self._open_session(connection_limit))
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _open_session(self, connection_limit: int) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=connection_limit))
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Submits a coroutine to the background loop and blocks until it finishes."""
+        if self._closed:
+            coro.close()
+            raise CHJSAIHError("SyncCHJSAIHClient is closed.")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def fetch_station_list(self, sensor_type: SensorTypeLiteral) -> List[Dict[str, Any]]:
+        """Blocking version of `fetch_station_list`."""
+        return self._run(fetch_station_list(sensor_type, self._session))
+
+    def fetch_all_stations(self) -> List[Dict[str, Any]]:
+        """Blocking version of `fetch_all_stations`."""
+        return self._run(fetch_all_stations(self._session))
+
+    def fetch_sensor_data(self, variable: str, period_grouping: str = "ultimos5minutales", num_values: int = 30) -> List[Any]:
+        """Blocking version of `fetch_sensor_data`."""
+        return self._run(fetch_sensor_data(variable, period_grouping, num_values, self._session))
+
+    def fetch_stations_by_risk(
+        self,
+        sensor_type: SensorTypeAllLiteral = "e",
+        risk_level: int = 2,
+        comparison: ComparisonLiteral = "greater_equal"
+    ) -> List[Dict[str, Any]]:
+        """Blocking version of `fetch_stations_by_risk`."""
+        return self._run(fetch_stations_by_risk(sensor_type, risk_level, comparison, session=self._session))
+
+    def fetch_station_list_by_location(
+        self,
+        lat: float,
+        lon: float,
+        sensor_type: SensorTypeAllLiteral = "all",
+        radius_km: float = 50.0
+    ) -> List[Dict[str, Any]]:
+        """Blocking version of `fetch_station_list_by_location`."""
+        return self._run(fetch_station_list_by_location(lat, lon, sensor_type, radius_km, session=self._session))
+
+    def fetch_stations_by_subcuenca(
+        self,
+        subcuenca_id: int,
+        sensor_type: SensorTypeAllLiteral = "all"
+    ) -> List[Dict[str, Any]]:
+        """Blocking version of `fetch_stations_by_subcuenca`."""
+        return self._run(fetch_stations_by_subcuenca(subcuenca_id, sensor_type, session=self._session))
+
+    def get_data(self, sensor: Sensor) -> Dict[str, Any]:
+        """Blocking version of `Sensor.get_data` using the shared session."""
+        return self._run(sensor.get_data(self._session))
+
+    def get_data_many(
+        self,
+        sensors: Sequence[Sensor],
+        max_concurrency: Optional[int] = None
+    ) -> List[Union[Dict[str, Any], CHJSAIHError]]:
+        """
+        Fetches and parses several sensors concurrently on the background loop.
+
+        Args:
+            sensors: Sensor instances to fetch.
+            max_concurrency: Maximum in-flight requests. Defaults to the client setting.
+
+        Returns:
+            A list aligned with `sensors`. Each item is the parsed data dictionary or the
+            `CHJSAIHError` raised for that sensor, so one failure does not discard the rest.
+        """
+        return self._run(self._get_data_many(sensors, max_concurrency or self.max_concurrency))
+
+    async def _get_data_many(
+        self,
+        sensors: Sequence[Sensor],
+        max_concurrency: int
+    ) -> List[Union[Dict[str, Any], CHJSAIHError]]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _one(sensor: Sensor) -> Union[Dict[str, Any], CHJSAIHError]:
+            async with semaphore:
+                try:
+                    return await sensor.get_data(self._session)
+                except CHJSAIHError as e:
+                    return e
+
+        return list(await asyncio.gather(*(_one(sensor) for sensor in sensors)))
+
+    def close(self) -> None:
+        """Closes the shared session and stops the background event loop. Safe to call twice."""
+        if self._closed:
+            return
+        self._run(self._session.close())
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "SyncCHJSAIHClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
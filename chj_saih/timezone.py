@@ -0,0 +1,198 @@
+"""
+Europe/Madrid local time to UTC conversion through a precomputed DST transition table.
+
+The API reports peninsular Spanish wall-clock time (CET/CEST) and the parser returns it
+as naive datetimes or local epoch seconds. `MadridTimeTable` precomputes every summer-time
+transition once (EU rule: last Sunday of March and of October at 01:00 UTC), so converting
+a sample is a bisect into the table, or no lookup at all while consecutive samples stay
+within the same period, instead of a tzinfo call per sample.
+
+Around the switches, local times are handled explicitly:
+
+- Nonexistent (spring, 02:00-02:59 local): "shift_forward" reads them as standard time,
+  i.e. after the jump (02:30 -> 01:30 UTC, which is 03:30 CEST); "shift_backward" reads them
+  as summer time (-> 00:30 UTC); "raise" raises `DataParseError`.
+- Ambiguous (autumn, 02:00-02:59 local happens twice): "earliest" picks the summer-time
+  reading, "latest" the standard-time one, "raise" raises `DataParseError`. For series,
+  "infer" takes the first occurrence of a timestamp as summer time and repeats as standard time.
+
+The EU rule is applied to every year in the table; Spanish rules before 1996 differed slightly.
+"""
+import bisect
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional, Set
+
+from .columns import SeriesColumns, EPOCH
+from .exceptions import DataParseError, InvalidInputError
+
+AmbiguousLiteral = Literal["earliest", "latest", "infer", "raise"]
+NonexistentLiteral = Literal["shift_forward", "shift_backward", "raise"]
+
+STANDARD_OFFSET = 3600
+"""CET offset from UTC in seconds."""
+SUMMER_OFFSET = 7200
+"""CEST offset from UTC in seconds."""
+
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Position in the table, modulo 4, of each kind of local-time period.
+_STANDARD, _NONEXISTENT, _SUMMER, _AMBIGUOUS = range(4)
+
+
+def _last_sunday(year: int, month: int) -> int:
+    """Epoch day of the last Sunday of a month."""
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last_day = next_month - timedelta(days=1)
+    last_sunday = last_day - timedelta(days=(last_day.weekday() + 1) % 7)
+    return (last_sunday - date(1970, 1, 1)).days
+
+
+class MadridTimeTable:
+    """
+    Precomputed CET/CEST transitions for a range of years.
+
+    Attributes:
+        first_year (int): First year covered.
+        last_year (int): Last year covered. Times after it are treated as standard time.
+    """
+    def __init__(self, first_year: int = 1970, last_year: int = 2199):
+        if first_year > last_year:
+            raise InvalidInputError("first_year must not be greater than last_year.")
+        self.first_year = first_year
+        self.last_year = last_year
+        self.utc_transitions = array('q')
+        """UTC epoch seconds of each switch: [spring, autumn] per year."""
+        self.local_bounds = array('q')
+        """Local epoch seconds where each period starts: [gap, summer, overlap, standard] per year."""
+        for year in range(first_year, last_year + 1):
+            spring = _last_sunday(year, 3) * 86400 + 3600
+            autumn = _last_sunday(year, 10) * 86400 + 3600
+            self.utc_transitions.extend((spring, autumn))
+            self.local_bounds.extend((
+                spring + STANDARD_OFFSET,  # 02:00 local: nonexistent hour starts
+                spring + SUMMER_OFFSET,    # 03:00 local: summer time
+                autumn + STANDARD_OFFSET,  # 02:00 local: ambiguous hour starts
+                autumn + SUMMER_OFFSET,    # 03:00 local: standard time
+            ))
+
+    def utc_offset(self, utc_seconds: int) -> int:
+        """Offset from UTC, in seconds, in force at a UTC instant."""
+        return SUMMER_OFFSET if bisect.bisect_right(self.utc_transitions, utc_seconds) % 2 else STANDARD_OFFSET
+
+    def utc_to_local(self, utc_seconds: int) -> int:
+        """Converts UTC epoch seconds to local wall-clock epoch seconds."""
+        return utc_seconds + self.utc_offset(utc_seconds)
+
+    def classify(self, local_seconds: int) -> str:
+        """Kind of a local time: "standard", "summer", "ambiguous" or "nonexistent"."""
+        return ("standard", "nonexistent", "summer", "ambiguous")[bisect.bisect_right(self.local_bounds, local_seconds) % 4]
+
+    def _resolve(self, local_seconds: int, kind: int, ambiguous: str, nonexistent: str, repeated: bool) -> int:
+        if kind == _STANDARD:
+            return local_seconds - STANDARD_OFFSET
+        if kind == _SUMMER:
+            return local_seconds - SUMMER_OFFSET
+        if kind == _NONEXISTENT:
+            if nonexistent == "shift_forward":
+                return local_seconds - STANDARD_OFFSET
+            if nonexistent == "shift_backward":
+                return local_seconds - SUMMER_OFFSET
+            raise DataParseError(
+                f"Local time {EPOCH + timedelta(seconds=local_seconds)} does not exist in Europe/Madrid (spring DST switch)."
+            )
+        if ambiguous == "earliest" or (ambiguous == "infer" and not repeated):
+            return local_seconds - SUMMER_OFFSET
+        if ambiguous in ("latest", "infer"):
+            return local_seconds - STANDARD_OFFSET
+        raise DataParseError(
+            f"Local time {EPOCH + timedelta(seconds=local_seconds)} is ambiguous in Europe/Madrid (autumn DST switch)."
+        )
+
+    def local_to_utc(self, local_seconds: int, ambiguous: AmbiguousLiteral = "earliest",
+                     nonexistent: NonexistentLiteral = "shift_forward") -> int:
+        """
+        Converts local wall-clock epoch seconds to UTC epoch seconds.
+
+        Raises:
+            DataParseError: For ambiguous or nonexistent times when the policy is "raise".
+        """
+        _check_policies(ambiguous, nonexistent)
+        kind = bisect.bisect_right(self.local_bounds, local_seconds) % 4
+        return self._resolve(local_seconds, kind, ambiguous, nonexistent, False)
+
+    def local_to_utc_many(self, local_seconds: array, ambiguous: AmbiguousLiteral = "infer",
+                          nonexistent: NonexistentLiteral = "shift_forward") -> array:
+        """
+        Converts a buffer of local epoch seconds to UTC.
+
+        The table is searched only when a timestamp leaves the period of the previous one,
+        so a sorted series costs about one bisect per DST period it spans.
+
+        Raises:
+            DataParseError: For ambiguous or nonexistent times when the policy is "raise".
+        """
+        _check_policies(ambiguous, nonexistent)
+        bounds = self.local_bounds
+        result = array('q', bytes(8 * len(local_seconds)))
+        low, high, kind = 1, 0, _STANDARD  # Empty period: forces a lookup on the first sample.
+        seen_ambiguous: Set[int] = set()
+        for i, t in enumerate(local_seconds):
+            if not low <= t < high:
+                index = bisect.bisect_right(bounds, t)
+                kind = index % 4
+                low = bounds[index - 1] if index > 0 else -(2 ** 63)
+                high = bounds[index] if index < len(bounds) else 2 ** 63 - 1
+            if kind == _STANDARD:
+                result[i] = t - STANDARD_OFFSET
+            elif kind == _SUMMER:
+                result[i] = t - SUMMER_OFFSET
+            else:
+                repeated = t in seen_ambiguous
+                if kind == _AMBIGUOUS:
+                    seen_ambiguous.add(t)
+                result[i] = self._resolve(t, kind, ambiguous, nonexistent, repeated)
+        return result
+
+
+def _check_policies(ambiguous: str, nonexistent: str) -> None:
+    if ambiguous not in ("earliest", "latest", "infer", "raise"):
+        raise InvalidInputError(f"Invalid ambiguous policy '{ambiguous}'. Use 'earliest', 'latest', 'infer' or 'raise'.")
+    if nonexistent not in ("shift_forward", "shift_backward", "raise"):
+        raise InvalidInputError(
+            f"Invalid nonexistent policy '{nonexistent}'. Use 'shift_forward', 'shift_backward' or 'raise'."
+        )
+
+
+MADRID = MadridTimeTable()
+"""Shared table for 1970-2199."""
+
+
+def utc_datetime(utc_seconds: int) -> datetime:
+    """Aware UTC datetime for UTC epoch seconds."""
+    return _UTC_EPOCH + timedelta(seconds=utc_seconds)
+
+
+def local_to_utc_datetime(dt: datetime, ambiguous: AmbiguousLiteral = "earliest",
+                          nonexistent: NonexistentLiteral = "shift_forward",
+                          table: Optional[MadridTimeTable] = None) -> datetime:
+    """Converts a naive Madrid wall-clock datetime, as returned by `parse_date`, to an aware UTC datetime."""
+    local_seconds = (dt - EPOCH) // timedelta(seconds=1)
+    return utc_datetime((table or MADRID).local_to_utc(local_seconds, ambiguous, nonexistent))
+
+
+def columns_to_utc(columns: SeriesColumns, ambiguous: AmbiguousLiteral = "infer",
+                   nonexistent: NonexistentLiteral = "shift_forward",
+                   table: Optional[MadridTimeTable] = None) -> SeriesColumns:
+    """
+    Converts a sorted series with local timestamps to UTC epoch seconds.
+
+    With "infer", a timestamp repeated in the autumn hour is read as summer time the first
+    time and standard time afterwards; the result is re-sorted in that case. Otherwise the
+    values buffer is shared, not copied.
+    """
+    utc = (table or MADRID).local_to_utc_many(columns.timestamps, ambiguous, nonexistent)
+    if all(utc[i] <= utc[i + 1] for i in range(len(utc) - 1)):
+        return SeriesColumns(utc, columns.values)
+    order = sorted(range(len(utc)), key=utc.__getitem__)
+    return SeriesColumns(array('q', [utc[i] for i in order]), array('d', [columns.values[i] for i in order]))
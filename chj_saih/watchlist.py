@@ -0,0 +1,191 @@
+"""
+Shared watchlist that deduplicates sensor fetches across subscribers.
+
+Alert rules often watch the same variable with different windows (`num_values`), and
+polling each rule's sensor separately repeats the same request. In `WatchlistRegistry`,
+subscribers register a sensor, i.e. interest in (variable, period_grouping, window). The
+registry keeps a fetch plan with one upstream request per (variable, period_grouping) at
+the widest window, recomputed on every subscribe and unsubscribe. Each response is
+sliced to the last `num_values` entries of every subscriber and parsed by the
+subscriber's own sensor class, so each one receives exactly what its own request would
+have returned.
+
+The plan can be polled with `refresh`, or mirrored into an `AdaptivePollScheduler` with
+`attach` (using `scheduler_callback` as the scheduler's callback).
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import aiohttp
+
+from .data_fetcher import fetch_sensor_data
+from .exceptions import CHJSAIHError, InvalidInputError
+from .scheduler import AdaptivePollScheduler
+from .sensors import RawSensorDataType, Sensor
+
+WatchKey = Tuple[str, str]
+WatchResult = Union[Dict[str, Any], CHJSAIHError]
+WatchCallback = Callable[["WatchSubscription", WatchResult], Optional[Awaitable[None]]]
+
+
+class WatchSubscription:
+    """
+    A subscriber's interest in one sensor.
+
+    Attributes:
+        sensor (Sensor): The subscriber's sensor; its `num_values` is the window.
+        callback (Optional[WatchCallback]): Called with `(subscription, result)` on each fetch.
+        latest (Optional[WatchResult]): Parsed data (or the `CHJSAIHError`) of the last fetch.
+    """
+    def __init__(self, sensor: Sensor, callback: Optional[WatchCallback]):
+        self.sensor = sensor
+        self.callback = callback
+        self.latest: Optional[WatchResult] = None
+
+    @property
+    def key(self) -> WatchKey:
+        return (self.sensor.variable, self.sensor.period_grouping)
+
+
+class _PlanSensor(Sensor):
+    """Sensor for one planned fetch; its "data" is the raw response, sliced later per subscriber."""
+
+    def parse_data(self, raw_data: RawSensorDataType) -> Dict[str, Any]:
+        return {"raw": raw_data}
+
+
+def _slice_raw(raw_data: RawSensorDataType, num_values: int) -> RawSensorDataType:
+    """The response a request for the last `num_values` values would have returned."""
+    if not isinstance(raw_data, list) or len(raw_data) < 2 or not isinstance(raw_data[1], list):
+        return raw_data
+    return [raw_data[0], raw_data[1][-num_values:] if num_values > 0 else [], *raw_data[2:]]
+
+
+class WatchlistRegistry:
+    """
+    Merges subscriptions into the minimal set of upstream fetches.
+
+    Attributes:
+        fetches (int): Upstream fetches made by `refresh` or the attached scheduler.
+    """
+    def __init__(self):
+        self._subscriptions: Dict[WatchKey, List[WatchSubscription]] = {}
+        self._plan: Dict[WatchKey, int] = {}
+        self._scheduler: Optional[AdaptivePollScheduler] = None
+        self.fetches = 0
+
+    @property
+    def plan(self) -> Dict[WatchKey, int]:
+        """Widest window (`num_values`) to fetch per (variable, period_grouping)."""
+        return dict(self._plan)
+
+    def subscriptions(self, variable: str, period_grouping: str) -> List[WatchSubscription]:
+        return list(self._subscriptions.get((variable, period_grouping), []))
+
+    def subscribe(self, sensor: Sensor, callback: Optional[WatchCallback] = None) -> WatchSubscription:
+        """
+        Registers interest in a sensor's (variable, period_grouping, num_values).
+
+        Args:
+            sensor: The subscriber's sensor (e.g. `FlowSensor("A01", "ultimashoras", 24)`).
+            callback: Called with `(subscription, result)` after each fetch, where result is
+                      what `sensor.get_data` would return, or the `CHJSAIHError` raised.
+                      May be a coroutine function.
+
+        Raises:
+            InvalidInputError: If `num_values` is not positive.
+        """
+        if sensor.num_values <= 0:
+            raise InvalidInputError("num_values must be positive to subscribe.")
+        subscription = WatchSubscription(sensor, callback)
+        self._subscriptions.setdefault(subscription.key, []).append(subscription)
+        self._replan(subscription.key)
+        return subscription
+
+    def unsubscribe(self, subscription: WatchSubscription) -> None:
+        subscribers = self._subscriptions.get(subscription.key, [])
+        if subscription in subscribers:
+            subscribers.remove(subscription)
+            if not subscribers:
+                del self._subscriptions[subscription.key]
+            self._replan(subscription.key)
+
+    def _replan(self, key: WatchKey) -> None:
+        old = self._plan.get(key)
+        subscribers = self._subscriptions.get(key)
+        new = max(s.sensor.num_values for s in subscribers) if subscribers else None
+        if new == old:
+            return
+        if new is None:
+            del self._plan[key]
+        else:
+            self._plan[key] = new
+        if self._scheduler is not None:
+            self._sync_job(key, old, new)
+
+    def _sync_job(self, key: WatchKey, old: Optional[int], new: Optional[int]) -> None:
+        assert self._scheduler is not None
+        if new is None:
+            self._scheduler.remove(*key)
+            return
+        current = {job.key: job for job in self._scheduler.jobs}.get(key)
+        risk = current.risk if current is not None else 0
+        # A new or widened window is fetched right away; a narrowed one waits for its slot.
+        poll_now = old is None or new > old
+        self._scheduler.add(_PlanSensor(key[0], key[1], new), risk=risk, poll_now=poll_now)
+
+    async def _dispatch(self, key: WatchKey, result: Union[RawSensorDataType, CHJSAIHError]) -> None:
+        parsed: Dict[Tuple[type, int], WatchResult] = {}
+        for subscription in list(self._subscriptions.get(key, [])):
+            sensor = subscription.sensor
+            if isinstance(result, CHJSAIHError):
+                data: WatchResult = result
+            else:
+                cache_key = (type(sensor), sensor.num_values)
+                if cache_key not in parsed:
+                    try:
+                        parsed[cache_key] = sensor.parse_data(_slice_raw(result, sensor.num_values))
+                    except CHJSAIHError as e:
+                        parsed[cache_key] = e
+                data = parsed[cache_key]
+            subscription.latest = data
+            if subscription.callback is not None:
+                outcome = subscription.callback(subscription, data)
+                if asyncio.iscoroutine(outcome):
+                    await outcome
+
+    async def refresh(self, session: aiohttp.ClientSession, max_concurrency: int = 8) -> None:
+        """
+        Fetches every planned (variable, period_grouping) once and notifies its subscribers.
+
+        Each subscription's result is also kept in its `latest` attribute. Subscribers added
+        while a fetch is in flight receive the slice available, which may be shorter than
+        their window until the next refresh.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _fetch(key: WatchKey, num_values: int) -> None:
+            async with semaphore:
+                try:
+                    raw: Union[RawSensorDataType, CHJSAIHError] = await fetch_sensor_data(key[0], key[1], num_values, session)
+                except CHJSAIHError as e:
+                    raw = e
+            self.fetches += 1
+            await self._dispatch(key, raw)
+
+        await asyncio.gather(*(_fetch(key, num_values) for key, num_values in list(self._plan.items())))
+
+    def attach(self, scheduler: AdaptivePollScheduler) -> None:
+        """
+        Mirrors the fetch plan into `scheduler` and keeps it in sync on (un)subscribe.
+
+        The scheduler must be created with `registry.scheduler_callback` as its callback.
+        """
+        self._scheduler = scheduler
+        for key, num_values in self._plan.items():
+            self._sync_job(key, None, num_values)
+
+    async def scheduler_callback(self, job: Any, result: Any) -> None:
+        """`AdaptivePollScheduler` callback that slices each planned fetch for its subscribers."""
+        self.fetches += 1
+        await self._dispatch(job.key, result if isinstance(result, CHJSAIHError) else result["raw"])
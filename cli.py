@@ -1,16 +1,27 @@
 import argparse
 import asyncio
+import os
 import aiohttp
 from chj_saih.sensors import RainGaugeSensor, FlowSensor, ReservoirSensor, TemperatureSensor
 from chj_saih.data_fetcher import fetch_all_stations
+from chj_saih.archive import SeriesArchive
+from chj_saih.backfill import BackfillEngine, BackfillProgress, archive_sink
+
+
+def print_backfill_progress(progress: BackfillProgress):
+    eta = f"{progress.eta:.0f}s" if progress.eta is not None else "?"
+    print(f"\r{progress.completed + progress.skipped}/{progress.total} completados, "
+          f"{len(progress.failed)} fallidos, {progress.throughput:.2f}/s, ETA {eta}", end="", flush=True)
 
 async def main():
     parser = argparse.ArgumentParser(description="Herramienta CLI para interactuar con sensores")
-    parser.add_argument("action", choices=["get_data", "list_stations"], nargs="?", help="Acción a realizar")
+    parser.add_argument("action", choices=["get_data", "list_stations", "backfill"], nargs="?", help="Acción a realizar")
     parser.add_argument("--sensor_type", choices=["rain", "flow", "reservoir", "temperature"], help="Tipo de sensor")
     parser.add_argument("--variable", help="Variable del sensor")
     parser.add_argument("--num_values", type=int, help="Número de valores a obtener")
     parser.add_argument("--period_grouping", help="Agrupación temporal (ej. 'ultimos5minutales')")
+    parser.add_argument("--output", default="chj_saih_archive", help="Directorio del archivo histórico (backfill)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Peticiones simultáneas (backfill)")
 
     args = parser.parse_args()
 
@@ -19,6 +30,7 @@ async def main():
         print("Seleccione una acción:")
         print("1. Obtener datos de un sensor")
         print("2. Listar todas las estaciones")
+        print("3. Descargar el histórico de todas las estaciones")
         option = input("Ingrese el número de la opción deseada: ")
 
         if option == "1":
@@ -31,6 +43,10 @@ async def main():
             action = "list_stations"
             sensor_type = variable = period_grouping = None
             num_values = 0
+        elif option == "3":
+            action = "backfill"
+            sensor_type = variable = period_grouping = None
+            num_values = 0
         else:
             print("Opción inválida.")
             return
@@ -64,6 +80,19 @@ async def main():
             sensor = sensor_class(variable, period_grouping, num_values)
             data = await sensor.get_data(session)
             print(f"Datos obtenidos: {data}")
+        elif action == "backfill":
+            archive = SeriesArchive(args.output)
+            engine = BackfillEngine(
+                sink=archive_sink(archive),
+                checkpoint_path=os.path.join(args.output, "backfill.checkpoint"),
+                max_concurrency=args.concurrency,
+                progress_callback=print_backfill_progress
+            )
+            progress = await engine.run(session)
+            print()
+            print(f"Histórico guardado en '{args.output}'. Fallidos: {len(progress.failed)}")
+            for (failed_variable, failed_period), error in progress.failed.items():
+                print(f"  {failed_variable} ({failed_period}): {error}")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -17,9 +17,15 @@ setup(
     ],
     packages=find_packages(),
     install_requires=["aiohttp>=3.8,<4.0", "geopy"],
+    extras_require={
+        "numpy": ["numpy"],
+        "pandas": ["numpy", "pandas"],
+        "arrow": ["pyarrow"],
+    },
     entry_points={
         "console_scripts": [
-            "chj_saih-cli = cli:main"
+            "chj_saih-cli = cli:main",
+            "chj_saih-proxy = chj_saih.proxy:main"
         ],
     },
 )
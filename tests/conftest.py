@@ -0,0 +1,38 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+
+class FakeClock:
+    """Clock whose time only moves when a test sets `now`."""
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _session_returning(payloads):
+    session = MagicMock()
+
+    def get(url):
+        response = MagicMock()
+        response.status = 200 if url in payloads else 404
+        response.reason = "OK" if url in payloads else "Not Found"
+        response.read = AsyncMock(return_value=payloads.get(url, b""))
+        context = AsyncMock()
+        context.__aenter__.return_value = response
+        return context
+
+    session.get.side_effect = get
+    return session
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def session_returning():
+    """Factory of mock aiohttp sessions serving `{url: body}`; any other URL answers 404."""
+    return _session_returning
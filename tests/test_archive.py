@@ -0,0 +1,117 @@
+import math
+import os
+import pytest
+from array import array
+from datetime import datetime
+
+from chj_saih.archive import SeriesArchive
+from chj_saih.columns import SeriesColumns
+from chj_saih.exceptions import InvalidInputError
+
+BACKENDS = ["binary", pytest.param("parquet", marks=pytest.mark.skipif(
+    not __import__("importlib").util.find_spec("pyarrow"), reason="pyarrow not installed"))]
+
+
+def epoch(*args) -> int:
+    return int((datetime(*args) - datetime(1970, 1, 1)).total_seconds())
+
+
+def series(*points) -> SeriesColumns:
+    return SeriesColumns(array('q', [epoch(*p[0]) for p in points]), array('d', [p[1] for p in points]))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+class TestSeriesArchive:
+    def test_partitions_by_variable_and_month(self, tmp_path, backend):
+        archive = SeriesArchive(str(tmp_path), backend=backend)
+        archive.append("VAR", series(((2024, 1, 31, 23, 55), 1.0), ((2024, 2, 1, 0, 0), 2.0)))
+
+        assert archive.variables() == ["VAR"]
+        assert archive.months("VAR") == ["2024-01", "2024-02"]
+        assert len(archive.read("VAR")) == 2
+
+    def test_incremental_append_last_write_wins(self, tmp_path, backend):
+        archive = SeriesArchive(str(tmp_path), backend=backend)
+        archive.append("VAR", series(((2024, 1, 1, 0, 0), 1.0), ((2024, 1, 1, 0, 5), 2.0)))
+        archive.append("VAR", series(((2024, 1, 1, 0, 5), 2.5), ((2024, 1, 1, 0, 10), float("nan"))))
+
+        result = archive.read("VAR")
+
+        assert list(result.timestamps) == [epoch(2024, 1, 1, 0, m) for m in (0, 5, 10)]
+        assert list(result.values)[:2] == [1.0, 2.5]
+        assert math.isnan(result.values[2])
+
+    def test_time_range_and_column_projection(self, tmp_path, backend):
+        archive = SeriesArchive(str(tmp_path), backend=backend)
+        archive.append("VAR", series(*[((2024, month, 15, 12, 0), float(month)) for month in range(1, 7)]))
+
+        result = archive.read("VAR", start=datetime(2024, 3, 1), end=datetime(2024, 4, 30))
+        values = archive.read_column("VAR", "value", start=datetime(2024, 3, 1), end=datetime(2024, 4, 30))
+        all_values = archive.read_column("VAR", "value")
+
+        assert list(result.values) == [3.0, 4.0]
+        assert list(values) == [3.0, 4.0]
+        assert list(all_values) == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+    def test_column_projections_agree_after_overlapping_appends(self, tmp_path, backend):
+        archive = SeriesArchive(str(tmp_path), backend=backend)
+        archive.append("VAR", series(*[((2024, 1, 1, 0, 5 * k), float(k + 1)) for k in range(3)]))
+        archive.append("VAR", series(*[((2024, 1, 1, 0, 5 * k), 10.0 * (k + 1)) for k in range(1, 4)]))
+
+        timestamps = archive.read_column("VAR", "timestamp")
+        values = archive.read_column("VAR", "value")
+
+        assert len(timestamps) == len(values) == 4
+        assert list(values) == list(archive.read("VAR").values) == [1.0, 20.0, 30.0, 40.0]
+
+    def test_out_of_order_appends_read_in_time_order(self, tmp_path, backend):
+        archive = SeriesArchive(str(tmp_path), backend=backend)
+        archive.append("VAR", series(((2024, 1, 2, 0, 0), 2.0), ((2024, 1, 2, 0, 5), 3.0)))
+        archive.append("VAR", series(((2024, 1, 1, 0, 0), 1.0)))  # Backfilled later.
+
+        assert list(archive.read_column("VAR", "value")) == [1.0, 2.0, 3.0]
+        assert list(archive.read_column("VAR", "timestamp")) == list(archive.read("VAR").timestamps)
+
+    def test_append_never_overwrites_a_taken_part_index(self, tmp_path, backend):
+        archive = SeriesArchive(str(tmp_path), backend=backend)
+        for day in (1, 2):
+            archive.append("VAR", series(((2024, 1, day), float(day))))
+        month = tmp_path / "VAR" / "2024-01"
+        first = sorted(os.listdir(month))[0]
+        os.remove(month / first)  # The next append counts one part, but index 1 is taken.
+
+        archive.append("VAR", series(((2024, 1, 3), 3.0)))
+
+        assert len(os.listdir(month)) == 2
+        assert list(archive.read("VAR").values) == [2.0, 3.0]
+
+    def test_compact_merges_parts(self, tmp_path, backend):
+        archive = SeriesArchive(str(tmp_path), backend=backend)
+        archive.append("VAR", series(((2024, 1, 1, 0, 0), 1.0)))
+        archive.append("VAR", series(((2024, 1, 1, 0, 0), 3.0), ((2024, 1, 2, 0, 0), 4.0)))
+
+        archive.compact("VAR", "2024-01")
+
+        assert len(os.listdir(tmp_path / "VAR" / "2024-01")) == 1
+        assert list(archive.read("VAR").values) == [3.0, 4.0]
+
+
+class TestSeriesArchiveMixedBackends:
+    @pytest.mark.skipif(not __import__("importlib").util.find_spec("pyarrow"), reason="pyarrow not installed")
+    def test_value_projection_deduplicates_parquet_and_binary_parts(self, tmp_path):
+        binary = SeriesArchive(str(tmp_path), backend="binary")
+        binary.append("VAR", series(((2024, 1, 1, 0, 0), 1.0), ((2024, 1, 1, 0, 5), 2.0)))
+        archive = SeriesArchive(str(tmp_path), backend="parquet")
+        archive.append("VAR", series(((2024, 1, 1, 0, 5), 5.0), ((2024, 1, 1, 0, 10), 6.0)))
+
+        assert list(archive.read_column("VAR", "value")) == list(archive.read("VAR").values) == [1.0, 5.0, 6.0]
+
+
+class TestSeriesArchiveValidation:
+    def test_rejects_path_like_variables(self, tmp_path):
+        with pytest.raises(InvalidInputError):
+            SeriesArchive(str(tmp_path), backend="binary").append("../x", series(((2024, 1, 1), 1.0)))
+
+    def test_rejects_unknown_backend(self, tmp_path):
+        with pytest.raises(InvalidInputError):
+            SeriesArchive(str(tmp_path), backend="csv")
@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.archive import SeriesArchive
+from chj_saih.backfill import BackfillEngine, BackfillCheckpoint, archive_key, archive_sink
+from chj_saih.executors import ParseExecutor
+from chj_saih.exceptions import APIError
+
+SAMPLE_RAW = [{}, [["01/06/2024", 1.0], ["02/06/2024", 2.0]], {}]
+STATIONS = [
+    {"id": 1, "nombre": "A", "variable": "V1"},
+    {"id": 2, "nombre": "B", "variable": "V2"},
+    {"id": 3, "nombre": "C"},
+]
+
+
+@pytest.mark.asyncio
+class TestBackfillEngine:
+    @patch('chj_saih.backfill.fetch_sensor_data', new_callable=AsyncMock)
+    @patch('chj_saih.backfill.fetch_all_stations', new_callable=AsyncMock)
+    async def test_backfills_every_variable_and_period(self, mock_stations, mock_fetch, tmp_path):
+        mock_stations.return_value = STATIONS
+        mock_fetch.return_value = SAMPLE_RAW
+        stored = {}
+        reports = []
+        engine = BackfillEngine(sink=lambda v, p, columns: stored.__setitem__((v, p), columns),
+                                checkpoint_path=str(tmp_path / "cp"), progress_callback=reports.append)
+
+        progress = await engine.run(session=None)
+
+        assert set(stored) == {("V1", "ultimoanno"), ("V1", "ultimomes"), ("V2", "ultimoanno"), ("V2", "ultimomes")}
+        assert len(stored[("V1", "ultimoanno")]) == 2
+        assert progress.completed == 4 and not progress.failed
+        assert len(reports) == 4 and reports[-1].remaining == 0
+
+    @patch('chj_saih.backfill.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_resumes_from_checkpoint(self, mock_fetch, tmp_path):
+        mock_fetch.return_value = SAMPLE_RAW
+        checkpoint = tmp_path / "cp"
+        items = [("V1", "ultimomes"), ("V2", "ultimomes")]
+        BackfillCheckpoint(str(checkpoint)).mark_done(("V1", "ultimomes"))
+        engine = BackfillEngine(sink=lambda *args: None, checkpoint_path=str(checkpoint))
+
+        progress = await engine.run(session=None, items=items)
+
+        assert progress.skipped == 1 and progress.completed == 1
+        assert mock_fetch.call_args.args[0] == "V2"
+        assert BackfillCheckpoint(str(checkpoint)).done == set(items)
+
+    @patch('chj_saih.backfill.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_failures_are_retried_in_final_pass(self, mock_fetch, tmp_path):
+        attempts = {}
+
+        async def flaky(variable, *args):
+            attempts[variable] = attempts.get(variable, 0) + 1
+            if variable == "ALWAYS" or attempts[variable] == 1 and variable == "ONCE":
+                raise APIError("timeout")
+            return SAMPLE_RAW
+
+        mock_fetch.side_effect = flaky
+        engine = BackfillEngine(sink=AsyncMock(), checkpoint_path=str(tmp_path / "cp"))
+
+        progress = await engine.run(session=None, items=[("ONCE", "ultimomes"), ("ALWAYS", "ultimomes")])
+
+        assert attempts == {"ONCE": 2, "ALWAYS": 2}
+        assert list(progress.failed) == [("ALWAYS", "ultimomes")]
+        assert progress.completed == 1
+
+    @patch('chj_saih.backfill.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_writes_to_series_archive(self, mock_fetch, tmp_path):
+        mock_fetch.return_value = SAMPLE_RAW
+        archive = SeriesArchive(str(tmp_path / "archive"))
+        engine = BackfillEngine(sink=archive_sink(archive), checkpoint_path=str(tmp_path / "cp"))
+
+        progress = await engine.run(session=None, items=[("V1", "ultimomes"), ("V1", "ultimoanno")])
+
+        assert progress.completed == 2 and not progress.failed
+        assert archive.variables() == [archive_key("V1", "ultimoanno"), archive_key("V1", "ultimomes")]
+        assert list(archive.read(archive_key("V1", "ultimomes")).values) == [1.0, 2.0]
+
+    @patch('chj_saih.backfill.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_parses_with_the_given_executor(self, mock_fetch, tmp_path):
+        mock_fetch.return_value = SAMPLE_RAW
+        stored = {}
+        with ParseExecutor(strategy="thread") as executor:
+            engine = BackfillEngine(sink=lambda v, p, columns: stored.__setitem__(v, columns),
+                                    checkpoint_path=str(tmp_path / "cp"), executor=executor)
+            await engine.run(session=None, items=[("V1", "ultimomes")])
+
+        assert list(stored["V1"].values) == [1.0, 2.0]
+        assert executor.stats["thread"].calls == 1
+
+    @patch('chj_saih.backfill.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_sink_errors_are_recorded_per_item(self, mock_fetch, tmp_path):
+        mock_fetch.return_value = SAMPLE_RAW
+
+        def sink(variable, period, columns):
+            if variable == "BAD":
+                raise OSError("disk full")
+
+        engine = BackfillEngine(sink=sink, checkpoint_path=str(tmp_path / "cp"))
+
+        progress = await engine.run(session=None, items=[("BAD", "ultimomes"), ("GOOD", "ultimomes")])
+
+        assert progress.completed == 1
+        assert progress.failed == {("BAD", "ultimomes"): "OSError: disk full"}
@@ -0,0 +1,84 @@
+import asyncio
+
+import aiohttp
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.basins import fetch_subcuenca_summaries
+from chj_saih.catalog import StationCatalog
+from chj_saih.exceptions import APIError
+
+CATALOG = StationCatalog.from_stations([
+    {"id": 1, "nombre": "Pluvio 1", "variable": "P1", "subcuenca": 4, "estadoInt": 1, "tipo": "p"},
+    {"id": 2, "nombre": "Pluvio 2", "variable": "P2", "subcuenca": 4, "estadoInt": 2, "tipo": "p"},
+    {"id": 3, "nombre": "Aforo", "variable": "A1", "subcuenca": 4, "estadoInt": 3, "tipo": "a"},
+    {"id": 4, "nombre": "Embalse 1", "variable": "E1", "subcuenca": 6, "estadoInt": 1, "datoTotal": 20.0, "tipo": "e"},
+    {"id": 5, "nombre": "Embalse 2", "variable": "E2", "subcuenca": 6, "estadoInt": 1, "datoTotal": 10.0, "tipo": "e"},
+    {"id": 6, "nombre": "Temperatura", "variable": "T1", "subcuenca": 6, "estadoInt": 3, "tipo": "t"},
+])
+
+READINGS = {
+    "P1": [1.0, 2.5],
+    "P2": [0.5, None],
+    "A1": [12.0, 30.0, 25.0],
+    "E1": [14.0, 15.0],
+}
+
+
+async def fake_fetch(variable, period_grouping, num_values, session, timeout=None):
+    if variable not in READINGS:
+        raise APIError("offline")
+    return [{}, [[f"17/06/2024 1{k}:00", v] for k, v in enumerate(READINGS[variable])], {}]
+
+
+@pytest.mark.asyncio
+class TestSubcuencaSummaries:
+    @patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_aggregates_per_subcuenca(self, mock_fetch):
+        mock_fetch.side_effect = fake_fetch
+
+        summaries = await fetch_subcuenca_summaries(session=None, catalog=CATALOG, max_concurrency=2)
+
+        assert set(summaries) == {4, 6}
+        upper = summaries[4]
+        assert upper.station_count == 3
+        assert upper.rain_gauges == 2
+        assert upper.mean_rainfall == 2.0 and upper.max_rainfall == 3.5
+        assert upper.max_flow == 30.0
+        assert upper.worst_risk == 3
+        lower = summaries[6]
+        assert lower.station_count == 2  # Temperature excluded by default
+        assert lower.worst_risk == 1
+        assert lower.reservoir_volume == 15.0 and lower.reservoir_capacity == 20.0
+        assert lower.fill_ratio == 0.75
+        assert lower.failed == ["E2"]
+        assert mock_fetch.call_count == 5
+
+    @patch('chj_saih.basins.fetch_station_catalog', new_callable=AsyncMock)
+    @patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_fetches_catalog_once_when_not_given(self, mock_fetch, mock_catalog):
+        mock_fetch.side_effect = fake_fetch
+        mock_catalog.return_value = CATALOG
+
+        summaries = await fetch_subcuenca_summaries(session=None, sensor_types=('a',))
+
+        mock_catalog.assert_awaited_once()
+        assert list(summaries) == [4]
+        assert summaries[4].fill_ratio is None
+
+    @patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_timeouts_and_connection_errors_are_recorded(self, mock_fetch):
+        async def unreliable(variable, *args, **kwargs):
+            if variable == "P1":
+                raise asyncio.TimeoutError()
+            if variable == "P2":
+                raise aiohttp.ClientConnectionError("reset")
+            return await fake_fetch(variable, *args, **kwargs)
+
+        mock_fetch.side_effect = unreliable
+
+        summaries = await fetch_subcuenca_summaries(session=None, catalog=CATALOG, timeout=5)
+
+        assert summaries[4].failed == ["P1", "P2"]
+        assert summaries[4].mean_rainfall is None and summaries[4].max_flow == 30.0
+        assert all(call.args[4] == 5 for call in mock_fetch.call_args_list)
@@ -0,0 +1,86 @@
+import time
+import pytest
+from aiohttp import ClientResponseError
+
+from chj_saih.cassette import CassetteSession
+from chj_saih.config import API_URL, BASE_URL_STATION_LIST
+from chj_saih.data_fetcher import fetch_station_list, fetch_station_list_by_location, fetch_sensor_data
+from chj_saih.exceptions import APIError, InvalidInputError
+from chj_saih.sensors import FlowSensor
+
+STATIONS_JSON = b'[{"id": 1, "nombre": "Aforo", "latitud": 39.47, "longitud": -0.37, "variable": "V1"}]'
+SENSOR_JSON = b'[{}, [["17/06/2024 10:00", 3.5]], {}]'
+
+
+@pytest.fixture
+def recorded_cassette(tmp_path):
+    path = str(tmp_path / "fixtures" / "saih.json.gz")
+    return path, {
+        f"{BASE_URL_STATION_LIST}?t=a&id=": STATIONS_JSON,
+        f"{API_URL}?v=V1&t=ultimashoras&d=12": SENSOR_JSON,
+    }
+
+
+@pytest.mark.asyncio
+class TestCassetteSession:
+    async def test_record_then_replay_offline(self, recorded_cassette, session_returning):
+        path, payloads = recorded_cassette
+        real = session_returning(payloads)
+        async with CassetteSession(path, "record", real) as cassette:
+            await fetch_station_list('a', cassette)
+            await fetch_sensor_data("V1", "ultimashoras", 12, cassette)
+            with pytest.raises(APIError):
+                await fetch_sensor_data("MISSING", "ultimashoras", 12, cassette)
+
+        async with CassetteSession(path) as replay:
+            stations = await fetch_station_list('a', replay)
+            nearby = await fetch_station_list_by_location(39.47, -0.37, sensor_type='a', radius_km=1, session=replay)
+            data = await FlowSensor("V1", "ultimashoras", 12).get_data(replay)
+            with pytest.raises(APIError) as excinfo:
+                await fetch_sensor_data("MISSING", "ultimashoras", 12, replay)
+
+        assert stations[0]["nombre"] == "Aforo"
+        assert nearby[0]["var"] == "V1"
+        assert data["flow_data"][0][1] == 3.5
+        assert "Status code: 404" in str(excinfo.value)
+        assert replay.hits == 4
+
+    async def test_replay_unknown_url_is_a_client_error(self, tmp_path):
+        async with CassetteSession(str(tmp_path / "empty.json.gz")) as replay:
+            with pytest.raises(APIError) as excinfo:
+                await fetch_station_list('p', replay)
+        assert "No recorded response" in str(excinfo.value)
+
+    async def test_simulated_latency(self, recorded_cassette, session_returning):
+        path, payloads = recorded_cassette
+        async with CassetteSession(path, "record", session_returning(payloads)) as cassette:
+            await fetch_station_list('a', cassette)
+
+        replay = CassetteSession(path, latency=0.05)
+        started = time.monotonic()
+        await fetch_station_list('a', replay)
+        assert time.monotonic() - started >= 0.05
+
+    async def test_recording_requires_session(self, tmp_path):
+        with pytest.raises(InvalidInputError):
+            CassetteSession(str(tmp_path / "c.json.gz"), "record")
+
+    async def test_non_utf8_bodies_round_trip(self, tmp_path, session_returning):
+        path = str(tmp_path / "latin1.json.gz")
+        url = f"{API_URL}?v=V1&t=ultimashoras&d=12"
+        latin1 = '[{"nombre": "Ñ"}, [], {}]'.encode("latin-1")
+        async with CassetteSession(path, "record", session_returning({url: latin1})) as cassette:
+            await cassette.get(url)
+
+        async with CassetteSession(path) as replay:
+            response = await replay.get(url)
+        assert await response.read() == latin1
+
+    async def test_status_errors_can_be_printed(self, tmp_path, session_returning):
+        url = f"{API_URL}?v=MISSING&t=ultimashoras&d=12"
+        async with CassetteSession(str(tmp_path / "c.json.gz"), "record", session_returning({})) as cassette:
+            response = await cassette.get(url)
+        with pytest.raises(ClientResponseError) as excinfo:
+            response.raise_for_status()
+        assert "404" in str(excinfo.value) and "MISSING" in str(excinfo.value)
+        assert excinfo.value.request_info.method == "GET"
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.catalog import StationCatalog, StationCatalogStore, fetch_station_catalog
+from chj_saih.exceptions import APIError, DataParseError
+
+STATIONS = [
+    {"id": 465, "latitud": 40.098, "longitud": -0.217, "nombre": "Embalse Alcora", "variable": "1E02EVI1MVVR",
+     "unidades": "Hm³", "subcuenca": 0, "estado": "ESTADO_ROJO", "datoActual": 1.195, "datoTotal": 1.37,
+     "municipioNombre": "Alcora", "estadoInt": 3, "estadoInternal": "ESTADO_ROJO", "tipo": "e", "extra": "dropped"},
+    {"id": 12, "latitud": 39.5, "longitud": -0.4, "nombre": "Aforo Ñ", "variable": "0O04DQG0MVVR",
+     "unidades": "m³/s", "subcuenca": None, "estado": None, "datoActual": None, "datoTotal": None,
+     "municipioNombre": None, "estadoInt": 1, "estadoInternal": "ESTADO_VERDE", "tipo": "a"},
+]
+
+
+def fake_station_lists(sensor_type, session):
+    if sensor_type == 'e':
+        return [{k: v for k, v in STATIONS[0].items() if k != "tipo"}]
+    if sensor_type == 'a':
+        return [{k: v for k, v in STATIONS[1].items() if k != "tipo"}]
+    raise APIError("unavailable")
+
+
+class TestStationCatalog:
+    def test_snapshot_round_trip(self, tmp_path):
+        path = str(tmp_path / "catalog.bin")
+        catalog = StationCatalog.from_stations(STATIONS, created_at=1700000000.0)
+        catalog.save(path)
+
+        loaded = StationCatalog.load(path)
+
+        assert loaded.created_at == 1700000000.0
+        assert len(loaded) == 2
+        first, second = loaded.stations()
+        assert "extra" not in first
+        assert first["datoActual"] == 1.195 and first["nombre"] == "Embalse Alcora"
+        assert second["subcuenca"] is None and second["datoTotal"] is None and second["estado"] is None
+        assert second["nombre"] == "Aforo Ñ"
+
+    def test_invalid_snapshot_raises(self, tmp_path):
+        path = tmp_path / "catalog.bin"
+        path.write_bytes(b"not a catalog")
+        with pytest.raises(DataParseError):
+            StationCatalog.load(str(path))
+
+
+@pytest.mark.asyncio
+class TestStationCatalogStore:
+    @patch('chj_saih.catalog.fetch_station_list', new_callable=AsyncMock)
+    async def test_fetch_station_catalog_tags_types(self, mock_fsl):
+        mock_fsl.side_effect = fake_station_lists
+        catalog = await fetch_station_catalog(session=None)
+
+        assert [(s["nombre"], s["tipo"]) for s in catalog.stations()] == [("Aforo Ñ", "a"), ("Embalse Alcora", "e")]
+
+    @patch('chj_saih.catalog.fetch_station_list', new_callable=AsyncMock)
+    async def test_refresh_keeps_rows_of_failed_sensor_types(self, mock_fsl, tmp_path):
+        gauge = dict(STATIONS[1], id=7, nombre="Pluvio", tipo="p")
+        path = str(tmp_path / "catalog.bin")
+        StationCatalog.from_stations(STATIONS + [gauge], created_at=0.0).save(path)
+        store = StationCatalogStore(path, max_age=60)
+        await store.start(session=None)
+        mock_fsl.side_effect = fake_station_lists  # 'p' and 't' fail.
+
+        catalog = await store.refresh(session=None)
+
+        assert [(s["nombre"], s["tipo"]) for s in catalog.stations()] == [
+            ("Aforo Ñ", "a"), ("Embalse Alcora", "e"), ("Pluvio", "p")]
+        assert len(StationCatalog.load(path)) == 3
+
+    @patch('chj_saih.catalog.fetch_station_list', new_callable=AsyncMock)
+    async def test_start_without_snapshot_fetches_and_saves(self, mock_fsl, tmp_path):
+        mock_fsl.side_effect = fake_station_lists
+        path = str(tmp_path / "catalog.bin")
+        store = StationCatalogStore(path)
+
+        catalog = await store.start(session=None)
+
+        assert len(catalog) == 2
+        assert os.path.exists(path)
+
+    @patch('chj_saih.catalog.fetch_station_list', new_callable=AsyncMock)
+    async def test_stale_snapshot_is_served_then_swapped(self, mock_fsl, tmp_path):
+        mock_fsl.side_effect = fake_station_lists
+        path = str(tmp_path / "catalog.bin")
+        StationCatalog.from_stations(STATIONS[:1], created_at=0.0).save(path)
+        store = StationCatalogStore(path, max_age=60)
+        swapped = []
+        store.listeners.append(swapped.append)
+
+        catalog = await store.start(session=None)
+        assert len(catalog) == 1 and catalog.created_at == 0.0
+
+        await store.refresh_in_background(session=None)
+        assert len(store.catalog) == 2
+        assert swapped == [store.catalog]
+        assert StationCatalog.load(path).created_at > 0
+
+    @patch('chj_saih.catalog.fetch_station_list', new_callable=AsyncMock)
+    async def test_outage_on_cold_start_is_not_persisted_and_retried(self, mock_fsl, tmp_path):
+        mock_fsl.side_effect = APIError("down")
+        path = str(tmp_path / "catalog.bin")
+        StationCatalog.from_stations([]).save(path)  # Left by an earlier outage.
+        store = StationCatalogStore(path, retry_interval=0.01)
+        swapped = []
+        store.listeners.append(swapped.append)
+
+        catalog = await store.start(session=None)
+        assert len(catalog) == 0
+        assert len(StationCatalog.load(path)) == 0 and not swapped
+
+        mock_fsl.side_effect = fake_station_lists
+        for _ in range(100):
+            if swapped:
+                break
+            await asyncio.sleep(0.01)
+        await store.stop()
+
+        assert len(store.catalog) == 2 and swapped == [store.catalog]
+        assert len(StationCatalog.load(path)) == 2
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.changes import StationChangeFeed, diff_station_lists
+from chj_saih.exceptions import APIError
+
+OLD = [
+    {"id": 1, "nombre": "A", "datoActual": 1.0, "estadoInt": 1},
+    {"id": 2, "nombre": "B", "datoActual": 2.0, "estadoInt": 1},
+    {"id": 3, "nombre": "C", "datoActual": 3.0, "estadoInt": 1},
+]
+NEW = [
+    {"id": 1, "nombre": "A", "datoActual": 1.0, "estadoInt": 1},
+    {"id": 2, "nombre": "B", "datoActual": 2.5, "estadoInt": 3, "estado": "ESTADO_ROJO"},
+    {"id": 4, "nombre": "D", "datoActual": 0.0, "estadoInt": 0},
+]
+
+
+class TestDiffStationLists:
+    def test_added_removed_changed(self):
+        diff = diff_station_lists(OLD, NEW)
+
+        assert [s["id"] for s in diff.added] == [4]
+        assert [s["id"] for s in diff.removed] == [3]
+        assert diff.changed == {2: {"datoActual": (2.0, 2.5), "estadoInt": (1, 3), "estado": (None, "ESTADO_ROJO")}}
+        assert diff.stations[1]["nombre"] == "A"
+
+    def test_ignore_fields_and_no_changes(self):
+        assert not diff_station_lists(OLD, OLD)
+        diff = diff_station_lists(OLD[:2], [OLD[0], dict(OLD[1], datoActual=9.0)], ignore_fields=["datoActual"])
+        assert not diff
+
+
+@pytest.mark.asyncio
+class TestStationChangeFeed:
+    async def test_stream_yields_only_non_empty_diffs(self):
+        fetch = AsyncMock(side_effect=[OLD, OLD, [], NEW])
+        feed = StationChangeFeed(session=None, interval=0, fetch=fetch)
+
+        diffs = []
+        async for diff in feed.stream():
+            diffs.append(diff)
+            if len(diffs) == 2:
+                break
+
+        assert len(diffs[0].added) == 3
+        assert set(diffs[1].changed) == {2}
+        assert fetch.call_count == 4
+
+    @patch('chj_saih.changes.fetch_station_list', new_callable=AsyncMock)
+    async def test_failed_sensor_type_keeps_its_stations(self, mock_fsl):
+        lists = {'a': OLD[:2], 'e': OLD[2:]}
+        mock_fsl.side_effect = lambda sensor_type, session: lists.get(sensor_type, [])
+        feed = StationChangeFeed(session=None)
+        await feed.refresh()
+
+        def only_aforos(sensor_type, session):
+            if sensor_type != 'a':
+                raise APIError("down")
+            return [OLD[0], NEW[1]]
+        mock_fsl.side_effect = only_aforos
+        diff = await feed.refresh()
+
+        assert not diff.added and not diff.removed
+        assert set(diff.changed) == {2}
+        assert [s["id"] for s in feed.snapshot] == [1, 2, 3]
@@ -185,7 +185,7 @@ class TestDataFetcher:
     # Tests for fetch_all_stations
     @patch('chj_saih.data_fetcher.fetch_station_list', new_callable=AsyncMock)
     async def test_fetch_all_stations_success(self, mock_fetch_station_list):
-        def side_effect_fetch_station_list(sensor_type, session):
+        def side_effect_fetch_station_list(sensor_type, session, timeout=None):
             if sensor_type == 'a': # Aforos
                 return [{"id": "S01", "nombre": "Station A", "variable": "varA"}]
             elif sensor_type == 'p': # Pluviómetros
@@ -210,7 +210,7 @@ class TestDataFetcher:
         assert stations[3]["nombre"] == "Station D"
 
         # Assert that fetch_station_list was called for each sensor type
-        expected_calls = [call('a', session), call('t', session), call('e', session), call('p', session)]
+        expected_calls = [call('a', session, None), call('t', session, None), call('e', session, None), call('p', session, None)]
         # The order of calls to fetch_station_list within fetch_all_stations is fixed: ['a', 't', 'e', 'p']
         # So we can check the calls in order.
         mock_fetch_station_list.assert_has_calls(expected_calls, any_order=False)
@@ -219,7 +219,7 @@ class TestDataFetcher:
 
     @patch('chj_saih.data_fetcher.fetch_station_list', new_callable=AsyncMock)
     async def test_fetch_all_stations_partial_failure(self, mock_fetch_station_list):
-        def side_effect_fetch_station_list(sensor_type, session):
+        def side_effect_fetch_station_list(sensor_type, session, timeout=None):
             if sensor_type == 'a':
                 return [{"id": "S01", "nombre": "Station A", "variable": "varA"}]
             elif sensor_type == 'p':
@@ -324,7 +324,7 @@ class TestDataFetcher:
         assert len(stations) == 2
         assert stations[0]["nombre"] == "Station B"
         assert stations[1]["nombre"] == "Station C"
-        mock_fsl.assert_called_once_with('e', session)
+        mock_fsl.assert_called_once_with('e', session, None)
 
     @patch('chj_saih.data_fetcher.fetch_station_list', new_callable=AsyncMock)
     async def test_fetch_stations_by_risk_success_greater_equal(self, mock_fsl):
@@ -339,7 +339,7 @@ class TestDataFetcher:
         assert len(stations) == 2
         assert stations[0]["nombre"] == "Station B"
         assert stations[1]["nombre"] == "Station C"
-        mock_fsl.assert_called_once_with('e', session)
+        mock_fsl.assert_called_once_with('e', session, None)
 
     @patch('chj_saih.data_fetcher.fetch_station_list', new_callable=AsyncMock)
     async def test_fetch_stations_by_risk_all_types(self, mock_fsl):
@@ -347,7 +347,7 @@ class TestDataFetcher:
         async with aiohttp.ClientSession() as session:
             await fetch_stations_by_risk(sensor_type="all", risk_level=1, comparison="equal", session=session)
 
-        expected_calls = [call('a', session), call('t', session), call('e', session), call('p', session)]
+        expected_calls = [call('a', session, None), call('t', session, None), call('e', session, None), call('p', session, None)]
         # Order of calls: 'a', 't', 'e', 'p'
         mock_fsl.assert_has_calls(expected_calls, any_order=False)
         assert mock_fsl.call_count == 4
@@ -378,10 +378,10 @@ class TestDataFetcher:
             with pytest.raises(APIError) as excinfo:
                 await fetch_stations_by_risk(sensor_type='e', risk_level=1, session=session)
         assert "Failed to fetch" in str(excinfo.value) # Check if the original error message is part of it
-        mock_fsl.assert_called_once_with('e', session)
+        mock_fsl.assert_called_once_with('e', session, None)
 
     # Tests for fetch_station_list_by_location
-    @patch('aiohttp.ClientSession.get', new_callable=AsyncMock) # Was MagicMock
+    @patch('aiohttp.ClientSession.get', new_callable=MagicMock)
     async def test_fetch_station_list_by_location_success(self, mock_session_get_method): # mock_session_get_method is session.get
         # Stations: A (in), B (out), C (in, edge), D (out)
         mock_data_a_type = [
@@ -393,9 +393,8 @@ class TestDataFetcher:
             {"id": "S04", "nombre": "Station D", "latitud": 12.0, "longitud": 12.0, "variable": "varD", "unidades": "mm"}, # Out
         ]
 
-        # This side_effect function will be awaited by the patched session.get (mock_session_get_method)
-        # It needs to return the object that 'async with' expects (an async context manager)
-        async def side_effect_for_get(url):
+        # session.get() must return the object that 'async with' expects (an async context manager)
+        def side_effect_for_get(url):
             mock_response_ctx = AsyncMock() # This is what 'response' will be in 'async with ... as response'
             mock_response_ctx.raise_for_status = MagicMock()
 
@@ -437,7 +436,7 @@ class TestDataFetcher:
         assert actual_urls_called == [ec.args[0] for ec in expected_urls] # Use the existing expected_urls variable
 
 
-    @patch('aiohttp.ClientSession.get', new_callable=AsyncMock) # Was MagicMock
+    @patch('aiohttp.ClientSession.get', new_callable=MagicMock)
     async def test_fetch_station_list_by_location_all_types(self, mock_session_get_method): # mock_session_get_method is session.get
         # Simplified mock: just ensure it's called for all types
         mock_response_content = AsyncMock() # This is the 'response' object
@@ -448,8 +447,7 @@ class TestDataFetcher:
         async_context_manager.__aenter__ = AsyncMock(return_value=mock_response_content)
         async_context_manager.__aexit__ = AsyncMock(return_value=None)
 
-        # session.get() is an async method, its mock (mock_session_get_method) will be awaited.
-        # The result of that await (return_value of the mock) should be the async_context_manager.
+        # session.get() returns the async context manager.
         mock_session_get_method.return_value = async_context_manager
 
         async with aiohttp.ClientSession() as session:
@@ -468,7 +466,7 @@ class TestDataFetcher:
         assert actual_urls_called == [ec.args[0] for ec in expected_calls] # Corrected variable name
 
 
-    @patch('aiohttp.ClientSession.get', new_callable=AsyncMock) # Was MagicMock
+    @patch('aiohttp.ClientSession.get', new_callable=MagicMock)
     async def test_fetch_station_list_by_location_no_stations_found(self, mock_session_get_method): # mock_session_get_method is session.get
         mock_response_content = AsyncMock() # This is the 'response' object
         mock_response_content.raise_for_status = MagicMock()
@@ -493,7 +491,7 @@ class TestDataFetcher:
                 await fetch_station_list_by_location(lat=10.0, lon=10.0, sensor_type="invalid", session=session)
         assert "Invalid sensor_type: invalid" in str(excinfo.value)
 
-    @patch('aiohttp.ClientSession.get', new_callable=AsyncMock) # Was MagicMock
+    @patch('aiohttp.ClientSession.get', new_callable=MagicMock)
     async def test_fetch_station_list_by_location_api_error(self, mock_session_get_method): # mock_session_get_method is session.get
         mock_response_content = AsyncMock() # This is the 'response' object
         mock_response_content.raise_for_status = MagicMock(side_effect=aiohttp.ClientResponseError(
@@ -512,7 +510,7 @@ class TestDataFetcher:
 
 
     # Tests for fetch_stations_by_subcuenca
-    @patch('aiohttp.ClientSession.get', new_callable=AsyncMock) # Was MagicMock
+    @patch('aiohttp.ClientSession.get', new_callable=MagicMock)
     async def test_fetch_stations_by_subcuenca_success(self, mock_session_get_method): # mock_session_get_method is session.get
         mock_data = [
             {"id": "S01", "nombre": "Station A Sub1", "subcuenca": 1},
@@ -536,7 +534,7 @@ class TestDataFetcher:
         assert stations[1]["nombre"] == "Station C Sub1"
         mock_session_get_method.assert_called_once_with(f"{BASE_URL_STATION_LIST}?t=p&id=")
 
-    @patch('aiohttp.ClientSession.get', new_callable=AsyncMock) # Was MagicMock
+    @patch('aiohttp.ClientSession.get', new_callable=MagicMock)
     async def test_fetch_stations_by_subcuenca_all_types(self, mock_session_get_method): # mock_session_get_method is session.get
         mock_response_content = AsyncMock() # This is the 'response' object
         mock_response_content.raise_for_status = MagicMock()
@@ -568,7 +566,7 @@ class TestDataFetcher:
                 await fetch_stations_by_subcuenca(subcuenca_id=1, sensor_type="invalid", session=session)
         assert "Invalid sensor_type. Use 't', 'a', 'p', 'e', or 'all'." in str(excinfo.value)
 
-    @patch('aiohttp.ClientSession.get', new_callable=AsyncMock) # Was MagicMock
+    @patch('aiohttp.ClientSession.get', new_callable=MagicMock)
     async def test_fetch_stations_by_subcuenca_api_error(self, mock_session_get_method): # mock_session_get_method is session.get
         mock_response_content = AsyncMock() # This is the 'response' object
         mock_response_content.raise_for_status = MagicMock(side_effect=aiohttp.ClientResponseError(
@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from chj_saih.client import CHJSAIHClient, ClientMetrics, RateLimiter, ResponseCache
+from chj_saih.config import API_URL, BASE_URL_STATION_LIST
+from chj_saih.exceptions import APIError, CHJSAIHError, InvalidInputError
+from chj_saih.sensors import FlowSensor, RainGaugeSensor
+
+STATIONS_JSON = b'[{"id": 1, "nombre": "Aforo", "latitud": 39.47, "longitud": -0.37, "variable": "V1", "subcuenca": 4}]'
+SENSOR_JSON = b'[{}, [["17/06/2024 10:00", 3.5], ["17/06/2024 10:05", 4.0]], {}]'
+PROXY = "http://127.0.0.1:8765"
+
+
+@pytest.mark.asyncio
+class TestCHJSAIHClient:
+    async def test_fetch_functions_use_client_urls(self, session_returning):
+        session = session_returning({
+            f"{PROXY}/stations?t=a&id=": STATIONS_JSON,
+            f"{PROXY}/data?v=V1&t=ultimos5minutales&d=2": SENSOR_JSON,
+        })
+        async with CHJSAIHClient(session, api_url=f"{PROXY}/data", station_list_url=f"{PROXY}/stations") as client:
+            stations = await client.fetch_station_list('a')
+            nearby = await client.fetch_station_list_by_location(39.47, -0.37, sensor_type='a', radius_km=1)
+            in_basin = await client.fetch_stations_by_subcuenca(4, sensor_type='a')
+            data = await client.get_data(client.flow_sensor("V1", "ultimos5minutales", 2))
+
+        assert stations[0]["nombre"] == "Aforo"
+        assert nearby[0]["var"] == "V1" and in_basin[0]["id"] == 1
+        assert [value for _, value in data["flow_data"]] == [3.5, 4.0]
+        assert client.metrics.requests == 4
+        assert client.metrics.latency.count("/data") == 1
+        session.close.assert_not_called()
+
+    async def test_cache_and_errors(self, session_returning):
+        session = session_returning({f"{BASE_URL_STATION_LIST}?t=a&id=": STATIONS_JSON})
+        cache = ResponseCache(ttl=60)
+        async with CHJSAIHClient(session, cache=cache) as client:
+            await client.fetch_station_list('a')
+            await client.fetch_station_list('a')
+            with pytest.raises(APIError):
+                await client.fetch_sensor_data("MISSING", "ultimashoras", 12)
+            with pytest.raises(APIError):
+                await client.fetch_sensor_data("MISSING", "ultimashoras", 12)
+
+        assert session.get.call_count == 3
+        assert (client.metrics.requests, client.metrics.cache_hits, client.metrics.errors) == (3, 1, 2)
+        assert len(cache) == 1
+
+    async def test_shared_metrics_and_sensor_constructors(self, session_returning):
+        metrics = ClientMetrics()
+        session = session_returning({f"{API_URL}?v=V1&t=ultimos5minutales&d=2": SENSOR_JSON})
+        async with CHJSAIHClient(session, metrics=metrics) as first, CHJSAIHClient(session, metrics=metrics) as second:
+            sensors = [FlowSensor("V1", "ultimos5minutales", 2), FlowSensor("BAD", "ultimos5minutales", 2)]
+            results = await first.get_data_many(sensors)
+            columns = await second.get_columns(second.sensor('p', "V1", "ultimos5minutales", 2))
+
+        assert results[0]["flow_data"][0][1] == 3.5 and isinstance(results[1], APIError)
+        assert list(columns.values) == [3.5, 4.0]
+        assert metrics.requests == 3
+        assert isinstance(first.rain_gauge_sensor("V1", "ultimashoras", 3), RainGaugeSensor)
+        with pytest.raises(InvalidInputError):
+            first.sensor('x', "V1", "ultimashoras", 3)
+
+    async def test_concurrent_misses_share_one_request(self, session_returning):
+        session = session_returning({f"{BASE_URL_STATION_LIST}?t=a&id=": STATIONS_JSON})
+        async with CHJSAIHClient(session) as client:
+            first, second = await asyncio.gather(client.fetch_station_list('a'), client.fetch_station_list('a'))
+            await client.fetch_station_list('a')
+
+        assert first == second
+        assert session.get.call_count == client.metrics.requests == 2
+
+    async def test_get_rejects_request_options(self):
+        async with CHJSAIHClient(MagicMock()) as client:
+            with pytest.raises(TypeError):
+                client.get(f"{API_URL}?v=V1", headers={"X": "1"})
+
+    async def test_cancellation_is_not_counted_as_error(self):
+        session = MagicMock()
+        context = AsyncMock()
+        context.__aenter__.side_effect = asyncio.CancelledError()
+        session.get.return_value = context
+        async with CHJSAIHClient(session) as client:
+            with pytest.raises(asyncio.CancelledError):
+                await client.fetch_station_list('a')
+        assert (client.metrics.requests, client.metrics.errors) == (1, 0)
+
+    async def test_owns_session_only_when_not_given(self):
+        client = CHJSAIHClient()
+        with pytest.raises(CHJSAIHError):
+            await client.fetch_station_list('a')
+        async with client:
+            assert client.session is not None and not client.session.closed
+            own = client.session
+        assert own.closed and client.session is None
+
+    async def test_default_timeout_is_passed(self):
+        with patch('chj_saih.client.fetch_sensor_data', new_callable=AsyncMock) as mock_fetch:
+            async with CHJSAIHClient(MagicMock(), timeout=5) as client:
+                await client.fetch_sensor_data("V1", "ultimashoras", 12)
+                await client.fetch_sensor_data("V1", "ultimashoras", 12, timeout=1)
+        assert [c.args[4] for c in mock_fetch.call_args_list] == [5, 1]
+        assert all(c.args[3] is client for c in mock_fetch.call_args_list)
+
+
+@pytest.mark.asyncio
+class TestRateLimiterAndCache:
+    async def test_rate_limiter_spaces_requests(self, fake_clock):
+        clock = fake_clock
+        waits = []
+
+        async def fake_sleep(seconds):
+            waits.append(seconds)
+            clock.now += seconds
+
+        limiter = RateLimiter(rate=2.0, burst=2, clock=clock)
+        with patch('chj_saih.client.asyncio.sleep', side_effect=fake_sleep):
+            for _ in range(4):
+                await limiter.acquire()
+        assert waits == [pytest.approx(0.5), pytest.approx(0.5)]
+        with pytest.raises(InvalidInputError):
+            RateLimiter(rate=0)
+
+    async def test_cache_expires_and_evicts(self, fake_clock):
+        clock = fake_clock
+        cache = ResponseCache(ttl=10, max_entries=2, clock=clock)
+        response = MagicMock(status=200, reason="OK")
+        cache.put("a", response, b"1")
+        cache.put("b", response, b"2")
+        assert await cache.get("a").json() == 1
+        cache.put("c", response, b"3")
+        assert cache.get("b") is None and cache.get("a") is not None
+        clock.now = 11
+        assert cache.get("a") is None
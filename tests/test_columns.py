@@ -0,0 +1,95 @@
+import math
+import pytest
+from array import array
+
+from chj_saih.columns import SeriesColumns, align_columns, to_wide_frame
+from chj_saih.exceptions import DataParseError
+from chj_saih.sensors import SensorDataParser, FlowSensor
+
+RAW = [
+    {"paramVisual": [{"nombre": "ultimos5minutales"}]},
+    [
+        ["17/06/2024 10:10", 12.0],
+        ["17/06/2024 10:00", 10.0],
+        ["17/06/2024 10:05", "n/a"],
+        ["17/06/2024 10:15", None],
+        ["not a date", 1.0],
+    ],
+    {}
+]
+
+
+class TestExtractColumns:
+    def test_matches_extract_data(self):
+        parser = SensorDataParser(RAW)
+        columns = parser.extract_columns()
+
+        assert list(columns.timestamps) == [1718618400, 1718618700, 1718619000]
+        assert columns.to_list() == parser.extract_data()
+
+    @pytest.mark.parametrize("period_grouping, date_str", [
+        ("ultimos5minutales", "01/01/2024 00:05"),
+        ("ultimodia", "31/12/2023 23h."),
+        ("ultimoanno", "29/02/2024"),
+    ])
+    def test_epoch_seconds_match_strptime(self, period_grouping, date_str):
+        parser = SensorDataParser([{}, [[date_str, 1.0]]])
+        columns = parser.extract_columns(period_grouping)
+        assert columns.to_list()[0][0] == parser.extract_data(period_grouping)[0][0]
+
+    @pytest.mark.parametrize("date_str", ["30/02/2024 10:00", "29/02/2023 10:00", "17/13/2024 10:00", "17/06/2024 24:00"])
+    def test_invalid_dates_are_rejected(self, date_str):
+        with pytest.raises(DataParseError):
+            SensorDataParser([{}, []]).to_epoch_seconds(date_str, "%d/%m/%Y %H:%M")
+
+    def test_keeps_and_drops_the_same_rows_as_extract_data(self):
+        dates = ["17/06/24 10:05", "17/06/2024 +10:00", "17/06/2024 1_0:00", "1_7/06/2024 10:00",
+                 "17/06/2024 10:05:00", "17/06/2024  10:05", "7/6/2024 9:05", "17/06/2024 10:20"]
+        parser = SensorDataParser([{}, [[date_str, float(k)] for k, date_str in enumerate(dates)]])
+        columns = parser.extract_columns("ultimos5minutales")
+        assert columns.to_list() == parser.extract_data("ultimos5minutales")
+        assert list(columns.values) == [6.0, 5.0, 7.0]
+
+    def test_sensor_parse_columns(self):
+        columns = FlowSensor("VAR", "ultimos5minutales", 5).parse_columns(RAW)
+        assert len(columns) == 3
+        assert math.isnan(columns.values[1])
+
+
+class TestAlignColumns:
+    def test_union_with_nan_fill(self):
+        a = SeriesColumns(array('q', [0, 300]), array('d', [1.0, 2.0]))
+        b = SeriesColumns(array('q', [300, 600]), array('d', [5.0, 6.0]))
+
+        timestamps, values = align_columns({"a": a, "b": b})
+
+        assert list(timestamps) == [0, 300, 600]
+        assert list(values["a"])[:2] == [1.0, 2.0] and math.isnan(values["a"][2])
+        assert math.isnan(values["b"][0]) and list(values["b"])[1:] == [5.0, 6.0]
+
+
+class TestOptionalExports:
+    def test_to_numpy_is_zero_copy(self):
+        np = pytest.importorskip("numpy")
+        columns = SeriesColumns(array('q', [0, 300]), array('d', [1.0, 2.0]))
+        timestamps, values = columns.to_numpy()
+
+        columns.values[0] = 9.0
+        assert values[0] == 9.0
+        assert timestamps.dtype == np.dtype("datetime64[s]")
+
+    def test_to_wide_frame(self):
+        pytest.importorskip("pandas")
+        a = SeriesColumns(array('q', [0, 300]), array('d', [1.0, 2.0]))
+        b = SeriesColumns(array('q', [300, 600]), array('d', [5.0, 6.0]))
+        frame = to_wide_frame({"a": a, "b": b})
+
+        assert list(frame.columns) == ["a", "b"]
+        assert len(frame) == 3
+        assert frame["b"].isna().tolist() == [True, False, False]
+
+    def test_to_arrow(self):
+        pytest.importorskip("pyarrow")
+        table = SeriesColumns(array('q', [0, 300]), array('d', [1.0, 2.0])).to_arrow()
+        assert table.column_names == ["timestamp", "value"]
+        assert table.column("value").to_pylist() == [1.0, 2.0]
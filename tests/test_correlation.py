@@ -0,0 +1,123 @@
+import math
+import pytest
+from array import array
+from unittest.mock import patch
+
+from chj_saih.columns import SeriesColumns
+from chj_saih.correlation import LagCorrelationEngine, compute_lag_correlations, subcuenca_pairs
+from chj_saih.exceptions import InvalidInputError
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+H = 3600
+USE_NUMPY = [False, pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed"))]
+
+# Irregular rain pulses; `lagged` builds a flow that repeats them `lag` hours later, attenuated.
+RAIN = [0, 0, 5, 0, 0, 1, 8, 2, 0, 0, 0, 3, 0, 0, 6, 1, 0, 0, 0, 0, 2, 7, 0, 0, 0, 4, 0, 0, 0, 0]
+
+
+def hourly(values, first=0):
+    return SeriesColumns(array('q', [(first + k) * H for k in range(len(values))]), array('d', values))
+
+
+def lagged(values, lag):
+    return [10.0] * lag + [0.5 * v + 10 for v in values[:len(values) - lag]]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+class TestComputeLagCorrelations:
+    def test_finds_lag_for_many_pairs(self, use_numpy):
+        series = {"rain": hourly(RAIN), "flow3": hourly(lagged(RAIN, 3)), "flow5": hourly(lagged(RAIN, 5))}
+        results = compute_lag_correlations(series, [("rain", "flow3"), ("rain", "flow5")], H, 8 * H, use_numpy=use_numpy)
+        assert results[("rain", "flow3")].best_lag_steps == 3
+        assert results[("rain", "flow3")].best_lag_seconds == 3 * H
+        assert results[("rain", "flow5")].best_lag_seconds == 5 * H
+        assert len(results[("rain", "flow3")].correlations) == 9
+        assert results[("rain", "flow3")].correlation > 0.8
+        assert results[("rain", "flow3")].samples == len(RAIN)
+
+    def test_gaps_are_interpolated_and_partial_overlap(self, use_numpy):
+        flow = hourly(lagged(RAIN, 2))
+        # Drop one flow sample and start the rain two hours later than the flow.
+        flow = SeriesColumns(array('q', flow.timestamps[:10] + flow.timestamps[11:]),
+                             array('d', flow.values[:10] + flow.values[11:]))
+        rain = hourly(RAIN[2:], first=2)
+        result = compute_lag_correlations({"r": rain, "f": flow}, [("r", "f")], H, 6 * H, use_numpy=use_numpy)[("r", "f")]
+        assert result.best_lag_steps == 2
+        assert result.samples == len(RAIN) - 2
+
+    def test_not_enough_data(self, use_numpy):
+        series = {"r": hourly([1.0, 2.0]), "f": hourly([2.0, 3.0]), "flat": hourly([4.0] * 10), "r10": hourly(RAIN[:10])}
+        results = compute_lag_correlations(series, [("r", "f"), ("r10", "flat")], H, 4 * H, use_numpy=use_numpy)
+        for result in results.values():
+            assert all(math.isnan(v) for v in result.correlations)
+            assert result.best_lag_steps is None and result.correlation is None
+
+    def test_python_and_numpy_agree(self, use_numpy):
+        series = {"rain": hourly(RAIN), "flow": hourly([math.sin(k) + v for k, v in enumerate(lagged(RAIN, 4))])}
+        expected = compute_lag_correlations(series, [("rain", "flow")], H, 10 * H, use_numpy=False)[("rain", "flow")]
+        result = compute_lag_correlations(series, [("rain", "flow")], H, 10 * H, use_numpy=use_numpy)[("rain", "flow")]
+        assert list(result.correlations) == pytest.approx(list(expected.correlations))
+
+
+class TestValidation:
+    def test_invalid_input(self):
+        with pytest.raises(InvalidInputError):
+            compute_lag_correlations({"r": hourly(RAIN)}, [("r", "missing")])
+        with pytest.raises(InvalidInputError):
+            compute_lag_correlations({"r": hourly(RAIN)}, [("r", "r")], max_lag=-1)
+        assert compute_lag_correlations({}, []) == {}
+
+    def test_subcuenca_pairs(self):
+        stations = [
+            {"variable": "P1", "tipo": "p", "subcuenca": 1},
+            {"variable": "A1", "tipo": "a", "subcuenca": 1},
+            {"variable": "A2", "tipo": "a", "subcuenca": 1},
+            {"variable": "P2", "tipo": "p", "subcuenca": 2},
+            {"variable": "E1", "tipo": "e", "subcuenca": 1},
+        ]
+        assert subcuenca_pairs(stations) == [("P1", "A1"), ("P1", "A2")]
+
+
+class TestLagCorrelationEngine:
+    def test_recomputes_only_updated_pairs(self):
+        engine = LagCorrelationEngine(cadence="ultimashoras", max_lag=6 * H, history=None, use_numpy=False)
+        engine.add_pair("rain", "flow2")
+        engine.add_pair("rain2", "flow4")
+        engine.update("rain", hourly(RAIN[:20]))
+        engine.update("flow2", hourly(lagged(RAIN, 2)[:20]))
+        engine.update("rain2", hourly(RAIN))
+        engine.update("flow4", hourly(lagged(RAIN, 4)))
+
+        with patch("chj_saih.correlation.compute_lag_correlations", wraps=compute_lag_correlations) as compute:
+            first = engine.results()
+            assert compute.call_count == 1
+            assert first[("rain", "flow2")].best_lag_steps == 2
+            assert first[("rain2", "flow4")].best_lag_steps == 4
+
+            assert engine.results()[("rain", "flow2")] is first[("rain", "flow2")]
+            assert compute.call_count == 1
+
+            engine.update("rain", hourly(RAIN[20:], first=20))
+            engine.update("flow2", hourly(lagged(RAIN, 2)[20:], first=20))
+            second = engine.results()
+            assert compute.call_count == 2
+            assert compute.call_args[0][1] == [("rain", "flow2")]
+            assert second[("rain", "flow2")].samples == len(RAIN)
+            assert second[("rain2", "flow4")] is first[("rain2", "flow4")]
+
+    def test_pairs_and_history(self):
+        engine = LagCorrelationEngine(max_lag=2 * H, history=5 * H, use_numpy=False)
+        engine.add_pair("r", "f")
+        engine.add_pair("r", "f")
+        assert engine.pairs == [("r", "f")]
+        engine.update("r", hourly(RAIN))
+        assert len(engine.series["r"]) == 6
+        with pytest.raises(InvalidInputError):
+            engine.update("unknown", hourly(RAIN))
+        engine.remove_pair("r", "f")
+        assert engine.results() == {}
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.columns import SeriesColumns
+from chj_saih.exceptions import DataParseError, InvalidInputError
+from chj_saih.executors import CALIBRATION_ITEMS, ParseExecutor, _decode_data
+from chj_saih.sensors import FlowSensor, RainGaugeSensor
+
+
+def make_raw(count):
+    values = [[f"01/01/2024 {(i // 60) % 24:02d}:{i % 60:02d}", float(i)] for i in range(count)]
+    return [{}, values, {}]
+
+
+RAW = [{}, [["17/06/2024 10:00", 1.5], ["17/06/2024 11:00", "bad"], ["17/06/2024 09:00", 2.0]], {}]
+
+
+def test_choose_auto():
+    executor = ParseExecutor(process_budget=1.0)
+    assert executor.choose(CALIBRATION_ITEMS) == "inline"
+    assert executor.choose(CALIBRATION_ITEMS + 1) == "thread"
+    executor.seconds_per_item = 1e-5
+    assert executor.choose(100) == "inline"
+    assert executor.choose(1000) == "thread"
+    assert executor.choose(200000) == "process"
+    assert ParseExecutor("thread").choose(1) == "thread"
+    with pytest.raises(InvalidInputError):
+        ParseExecutor("gpu")
+
+
+@pytest.mark.asyncio
+class TestParseExecutor:
+    @pytest.mark.parametrize("strategy", ["inline", "thread", "process"])
+    async def test_strategies_match_inline_parsing(self, strategy):
+        sensor = FlowSensor("V1", "ultimashoras", 3)
+        with ParseExecutor(strategy, max_workers=1) as executor:
+            data = await executor.parse_data(sensor, RAW)
+            columns = await executor.parse_columns(sensor, RAW)
+        assert data == sensor.parse_data(RAW)
+        assert columns == sensor.parse_columns(RAW)
+        assert executor.stats[strategy].calls == 2
+        assert executor.stats[strategy].items == 6
+
+    async def test_process_results_are_decoded_off_the_loop(self):
+        decoded_on = []
+
+        def decode(encoded):
+            decoded_on.append(threading.current_thread())
+            return _decode_data(encoded)
+
+        sensor = FlowSensor("V1", "ultimashoras", 3)
+        with ParseExecutor("process", max_workers=1) as executor:
+            with patch('chj_saih.executors._decode_data', decode):
+                data = await executor.parse_data(sensor, RAW)
+        assert data == sensor.parse_data(RAW)
+        assert decoded_on and decoded_on[0] is not threading.current_thread()
+
+    async def test_auto_learns_cost_and_reports_time(self):
+        with ParseExecutor() as executor:
+            await executor.parse_data(RainGaugeSensor("P1", "ultimashoras", 10), make_raw(10))
+        assert executor.seconds_per_item is not None
+        assert executor.stats["inline"].seconds > 0
+
+    async def test_errors_propagate(self):
+        with ParseExecutor("thread") as executor:
+            with pytest.raises(DataParseError):
+                await executor.parse_data(FlowSensor("V1", "ultimashoras", 3), "not a payload")
+
+    @patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_sensor_get_data_with_executor(self, mock_fetch):
+        mock_fetch.return_value = RAW
+        sensor = FlowSensor("V1", "ultimashoras", 3)
+        with ParseExecutor("thread") as executor:
+            data = await sensor.get_data(None, executor=executor)
+            columns = await sensor.get_columns(None, executor=executor)
+        assert data == sensor.parse_data(RAW)
+        assert isinstance(columns, SeriesColumns) and len(columns) == 3
@@ -0,0 +1,82 @@
+import random
+import pytest
+
+from chj_saih.catalog import StationCatalog
+from chj_saih.exceptions import InvalidInputError
+from chj_saih.geo import StationGeoIndex, haversine_km, point_in_polygon
+
+random.seed(7)
+STATIONS = [
+    {"id": i, "nombre": f"S{i}", "tipo": "pate"[i % 4],
+     "latitud": random.uniform(38.5, 40.5), "longitud": random.uniform(-1.5, 0.2)}
+    for i in range(400)
+] + [{"id": 999, "nombre": "Sin coordenadas", "latitud": None, "longitud": None}]
+
+ZONES = {
+    "triangle": [(39.0, -1.0), (40.0, -0.8), (39.2, 0.1)],
+    "concave": [(38.6, -1.4), (39.6, -1.4), (39.6, -0.4), (39.3, -0.4), (39.3, -1.1), (38.6, -1.1)],
+    "tiny": [(39.40, -0.40), (39.42, -0.40), (39.42, -0.38), (39.40, -0.38)],
+}
+
+
+def brute_force(polygon):
+    return [s for s in STATIONS if s["latitud"] is not None and point_in_polygon(s["latitud"], s["longitud"], polygon)]
+
+
+class TestStationGeoIndex:
+    @pytest.mark.parametrize("cell_size", [0.05, 0.1, 0.5])
+    def test_polygons_match_brute_force(self, cell_size):
+        index = StationGeoIndex(STATIONS, cell_size=cell_size)
+
+        result = index.query_polygons(ZONES)
+
+        assert len(index) == 400
+        for name, polygon in ZONES.items():
+            assert [s["id"] for s in result[name]] == [s["id"] for s in brute_force(polygon)]
+
+    def test_bbox(self):
+        index = StationGeoIndex(STATIONS)
+        expected = [s["id"] for s in STATIONS[:400] if 39.0 <= s["latitud"] <= 39.5 and -1.0 <= s["longitud"] <= -0.5]
+
+        assert [s["id"] for s in index.query_bbox(39.0, -1.0, 39.5, -0.5)] == expected
+
+    def test_accepts_by_location_keys_and_catalog(self):
+        index = StationGeoIndex([{"id": 1, "lat": 39.47, "lon": -0.37}])
+        assert index.query_bbox(39, -1, 40, 0)[0]["id"] == 1
+
+        catalog_index = StationGeoIndex.from_catalog(StationCatalog.from_stations(STATIONS))
+        assert len(catalog_index) == 400
+
+    def test_invalid_inputs(self):
+        index = StationGeoIndex(STATIONS)
+        with pytest.raises(InvalidInputError):
+            index.query_bbox(40, 0, 39, 1)
+        with pytest.raises(InvalidInputError):
+            index.query_polygon([(39, 0), (40, 0)])
+
+
+class TestNearestStations:
+    def brute_nearest(self, lat, lon, k, sensor_type=None):
+        candidates = [s for s in STATIONS[:400] if sensor_type is None or s["tipo"] == sensor_type]
+        return sorted(candidates, key=lambda s: haversine_km(lat, lon, s["latitud"], s["longitud"]))[:k]
+
+    @pytest.mark.parametrize("sensor_type", [None, "p", "a"])
+    def test_matches_brute_force(self, sensor_type):
+        index = StationGeoIndex(STATIONS, cell_size=0.05)
+        points = [(39.47, -0.37), (38.0, -3.0), (40.4, 0.1)]
+
+        results = index.nearest_stations_batch(points, k=3, sensor_type=sensor_type)
+
+        for (lat, lon), found in zip(points, results):
+            assert [s["id"] for s, _ in found] == [s["id"] for s in self.brute_nearest(lat, lon, 3, sensor_type)]
+            distances = [d for _, d in found]
+            assert distances == sorted(distances)
+            assert distances == [haversine_km(lat, lon, s["latitud"], s["longitud"]) for s, _ in found]
+            assert all(s["tipo"] == sensor_type for s, _ in found if sensor_type)
+
+    def test_fewer_stations_than_k_and_unknown_type(self):
+        index = StationGeoIndex(STATIONS[:2])
+        assert len(index.nearest_stations(39.5, -0.5, k=5)) == 2
+        assert index.nearest_stations(39.5, -0.5, k=1, sensor_type="x") == []
+        with pytest.raises(InvalidInputError):
+            index.nearest_stations(39.5, -0.5, k=0)
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from chj_saih.config import API_URL
+from chj_saih.data_fetcher import (
+    fetch_all_stations,
+    fetch_sensor_data,
+    fetch_station_list_by_location,
+    fetch_stations_by_subcuenca,
+)
+from chj_saih.exceptions import APIError, DeadlineExceededError
+from chj_saih.hedging import HedgedFetcher, LatencyTracker, endpoint_of, gather_with_deadline
+from chj_saih.sensors import FlowSensor
+
+
+class SlowResponse:
+    def __init__(self, delay, payload):
+        self.delay = delay
+        self.payload = payload
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self):
+        return self.payload
+
+
+class DelaySession:
+    """Answers the n-th request after delays[n] seconds with payload n."""
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+        index = len(self.urls) - 1
+        return SlowResponse(self.delays[index], index)
+
+
+def warmed_fetcher(latency=0.01, **kwargs):
+    tracker = LatencyTracker(min_samples=5)
+    for _ in range(10):
+        tracker.record(endpoint_of(API_URL), latency)
+    return HedgedFetcher(tracker, min_hedge_delay=0.01, **kwargs)
+
+
+def test_latency_tracker_percentiles():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(1, 10):
+        tracker.record("/x", i / 100)
+    assert tracker.percentile("/x", 0.5) is None
+    tracker.record("/x", 1.0)
+    assert tracker.percentile("/x", 0.5) == 0.05
+    assert tracker.percentile("/x", 0.95) == 1.0
+    assert tracker.percentile("/other", 0.5) is None
+
+
+@pytest.mark.asyncio
+class TestHedgedFetcher:
+    async def test_hedge_wins_when_primary_hangs(self):
+        fetcher = warmed_fetcher()
+        session = DelaySession([5.0, 0.0])
+        data = await asyncio.wait_for(fetcher.fetch_sensor_data("V1", "ultimashoras", 24, session), 1)
+
+        assert data == 1
+        assert session.urls == [f"{API_URL}?v=V1&t=ultimashoras&d=24"] * 2
+        assert (fetcher.hedges_sent, fetcher.hedges_won) == (1, 1)
+        # 10 warm-up samples, the winning hedge and the cancelled primary as a lower bound.
+        assert fetcher.tracker.count(endpoint_of(API_URL)) == 12
+
+    async def test_no_hedge_without_latency_history_or_when_fast(self):
+        session = DelaySession([0.05])
+        fetcher = HedgedFetcher()
+        assert await fetcher.fetch_sensor_data("V1", session=session) == 0
+        assert fetcher.hedges_sent == 0
+        assert fetcher.tracker.count(endpoint_of(API_URL)) == 1
+
+        fast = warmed_fetcher(latency=1.0)
+        assert await fast.fetch_sensor_data("V1", session=DelaySession([0.0])) == 0
+        assert fast.hedges_sent == 0
+
+    async def test_deadline_cancels_all_attempts(self):
+        fetcher = warmed_fetcher()
+        with pytest.raises(DeadlineExceededError):
+            await fetcher.fetch_sensor_data("V1", session=DelaySession([5.0, 5.0]), timeout=0.1)
+
+    async def test_batch_deadline(self):
+        fetcher = HedgedFetcher(hedge_percentile=None)
+        session = DelaySession([0.0, 5.0, 0.0])
+        results = await fetcher.fetch_sensor_data_many(
+            [("A", "ultimashoras", 1), ("B", "ultimashoras", 1), ("C", "ultimashoras", 1)], session, deadline=0.2)
+
+        assert results[0] == 0 and results[2] == 2
+        assert isinstance(results[1], DeadlineExceededError)
+
+    async def test_gather_with_deadline_wraps_errors(self):
+        async def boom():
+            raise RuntimeError("x")
+
+        results = await gather_with_deadline([boom()], 1)
+        assert isinstance(results[0], APIError)
+
+
+@pytest.mark.asyncio
+async def test_fetch_sensor_data_timeout():
+    session = MagicMock()
+    session.get = DelaySession([5.0]).get
+    with pytest.raises(DeadlineExceededError):
+        await fetch_sensor_data("V1", session=session, timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_every_fetch_function_honours_timeout():
+    with pytest.raises(DeadlineExceededError):
+        await fetch_station_list_by_location(39.5, -0.4, sensor_type='a', session=DelaySession([5.0]), timeout=0.05)
+    with pytest.raises(DeadlineExceededError):
+        await fetch_stations_by_subcuenca(4, sensor_type='p', session=DelaySession([5.0]), timeout=0.05)
+    with pytest.raises(DeadlineExceededError):
+        await FlowSensor("V1", "ultimashoras", 3).get_data(DelaySession([5.0]), timeout=0.05)
+    with pytest.raises(DeadlineExceededError):
+        await FlowSensor("V1", "ultimashoras", 3).get_columns(DelaySession([5.0]), timeout=0.05)
+    # With every type, a stalled type is skipped like any other failing one.
+    assert await asyncio.wait_for(fetch_all_stations(DelaySession([5.0] * 4), timeout=0.05), 1) == []
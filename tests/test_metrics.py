@@ -0,0 +1,68 @@
+import math
+import pytest
+
+from chj_saih.catalog import StationCatalog
+from chj_saih.metrics import CatalogMetricsCache, compute_catalog_metrics
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+USE_NUMPY = [False, pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed"))]
+
+
+def reservoir(id, subcuenca, actual, total, tipo="e"):
+    return {"id": id, "nombre": f"Embalse {id}", "subcuenca": subcuenca, "datoActual": actual,
+            "datoTotal": total, "unidades": "Hm³", "tipo": tipo}
+
+
+OLD = StationCatalog.from_stations([reservoir(1, 0, 10.0, 20.0), reservoir(2, 6, 5.0, 10.0)], created_at=100.0)
+NEW = StationCatalog.from_stations([
+    reservoir(2, 6, 6.0, 10.0),
+    reservoir(1, 0, 9.0, 20.0),
+    reservoir(3, 6, 1.0, None),
+    {"id": 4, "subcuenca": 6, "datoActual": 3.2, "datoTotal": None, "unidades": "m³/s", "tipo": "a"},
+    reservoir(5, None, 2.0, 4.0, tipo=None),
+], created_at=200.0)
+
+
+def values(buffer):
+    return [None if math.isnan(v) else pytest.approx(v) for v in buffer]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_compute_metrics(use_numpy):
+    metrics = compute_catalog_metrics(NEW, OLD, use_numpy=use_numpy)
+
+    assert values(metrics.fill_ratio) == [0.6, 0.45, None, None, 0.5]
+    assert values(metrics.storage_delta) == [1.0, -1.0, None, None, None]
+    basin = metrics.by_subcuenca[6]
+    # Reservoir 3 has no capacity, so its volume stays out of the fill ratio.
+    assert (basin.reservoirs, basin.volume, basin.capacity, basin.delta) == (2, 6.0, 10.0, pytest.approx(1.0))
+    assert basin.fill_ratio == pytest.approx(0.6)
+    assert metrics.by_subcuenca[None].reservoirs == 1
+    assert metrics.previous_created_at == 100.0
+    assert metrics.for_station(1) == {"fill_ratio": 0.45, "storage_delta": pytest.approx(-1.0)}
+    assert metrics.for_station(99) is None
+
+
+def test_cache_recomputes_only_on_new_catalog():
+    cache = CatalogMetricsCache()
+    first = cache.update(OLD)
+    assert cache.update(OLD) is first
+    second = cache.update(NEW)
+    assert second is not first
+    assert values(second.storage_delta)[:2] == [1.0, -1.0]
+
+
+def test_cache_attaches_to_store(tmp_path):
+    from chj_saih.catalog import StationCatalogStore
+    store = StationCatalogStore(str(tmp_path / "catalog.bin"))
+    store.catalog = OLD
+    cache = CatalogMetricsCache()
+    cache.attach(store)
+    assert cache.metrics.catalog is OLD
+    store.listeners[0](NEW)
+    assert cache.metrics.catalog is NEW
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+
+from chj_saih.exceptions import APIError, InvalidInputError
+from chj_saih.priority import PriorityFetchQueue
+from chj_saih.sensors import FlowSensor
+
+
+def sensor(name):
+    return FlowSensor(name, "ultimos5minutales", 12)
+
+
+@pytest.mark.asyncio
+class TestPriorityFetchQueue:
+    async def test_serves_most_urgent_first(self):
+        order = []
+
+        async def fetch(s):
+            order.append(s.variable)
+            return s.variable
+
+        queue = PriorityFetchQueue(fetch=fetch, max_workers=1, clock=lambda: 10000.0)
+        futures = [
+            queue.submit(sensor("green-fresh"), risk=1, last_fetched=9990.0),
+            queue.submit(sensor("green-stale"), risk=1, last_fetched=0.0),
+            queue.submit(sensor("red"), risk=3, last_fetched=9990.0),
+            queue.submit(sensor("green-vip"), risk=1, priority=60, last_fetched=9990.0),
+        ]
+        async with queue:
+            results = await asyncio.gather(*futures)
+
+        assert order == ["red", "green-vip", "green-stale", "green-fresh"]
+        assert results == ["green-fresh", "green-stale", "red", "green-vip"]
+        assert queue.completed == 4
+
+    async def test_risk_outranks_any_priority_and_staleness(self):
+        queue = PriorityFetchQueue(fetch=lambda s: asyncio.sleep(0, s.variable), clock=lambda: 10000.0)
+        assert queue.score(risk=3, last_fetched=10000.0) > queue.score(risk=2, priority=99, last_fetched=None)
+        assert queue.score(risk=1, priority=1000) == queue.score(risk=1, priority=99)
+        assert queue.score(risk=1, priority=-5) == queue.score(risk=1)
+
+    async def test_preempts_low_priority_when_full(self):
+        queue = PriorityFetchQueue(fetch=lambda s: asyncio.sleep(0, s.variable), max_queued=2)
+        low = queue.submit(sensor("low"), risk=0, last_fetched=queue.clock())
+        mid = queue.submit(sensor("mid"), risk=1)
+        high = queue.submit(sensor("high"), risk=3)
+        lower = queue.submit(sensor("lower"), risk=0, last_fetched=queue.clock())
+
+        assert low.cancelled() and lower.cancelled()
+        assert (queue.preempted, queue.rejected) == (1, 1)
+        async with queue:
+            assert await asyncio.gather(mid, high) == ["mid", "high"]
+
+    async def test_duplicate_submission_rescoring_and_errors(self):
+        calls = []
+
+        async def fetch(s):
+            calls.append(s.variable)
+            if s.variable == "bad":
+                raise APIError("boom")
+            return s.variable
+
+        queue = PriorityFetchQueue(fetch=fetch, max_workers=1)
+        first = queue.submit(sensor("a"), risk=0)
+        queue.submit(sensor("b"), risk=1)
+        again = queue.submit(sensor("a"), risk=3)
+        bad = queue.submit(sensor("bad"), risk=0)
+        assert again is first and len(queue) == 3
+        async with queue:
+            await first
+            with pytest.raises(APIError):
+                await bad
+        assert calls == ["a", "b", "bad"]
+
+    async def test_stop_cancels_pending(self):
+        started = asyncio.Event()
+
+        async def fetch(s):
+            started.set()
+            await asyncio.sleep(10)
+
+        queue = PriorityFetchQueue(fetch=fetch, max_workers=1)
+        queue.start()
+        running = queue.submit(sensor("a"))
+        waiting = queue.submit(sensor("b"))
+        await started.wait()
+        await queue.stop()
+        assert running.cancelled() and waiting.cancelled()
+
+    async def test_validation(self):
+        with pytest.raises(InvalidInputError):
+            PriorityFetchQueue()
+        with pytest.raises(InvalidInputError):
+            PriorityFetchQueue(fetch=lambda s: None, max_workers=0)
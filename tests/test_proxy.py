@@ -0,0 +1,123 @@
+import asyncio
+import json
+import pytest
+import aiohttp
+from aiohttp.test_utils import TestServer
+from unittest.mock import AsyncMock, MagicMock
+
+from chj_saih.config import API_PATH, STATION_LIST_PATH
+from chj_saih.exceptions import APIError
+from chj_saih.proxy import CachingProxy
+
+SAMPLE_RAW = [{}, [["17/06/2024 10:00", 10.0]], {}]
+
+
+@pytest.mark.asyncio
+class TestCachingProxy:
+    async def test_concurrent_misses_share_one_upstream_request(self):
+        proxy = CachingProxy()
+
+        async def slow_fetch(url):
+            await asyncio.sleep(0.01)
+            return b"[]"
+
+        proxy._fetch_upstream = AsyncMock(side_effect=slow_fetch)
+        url = proxy.sensor_data_url("VAR", "ultimashoras", "12")
+        bodies = await asyncio.gather(*(proxy.get(url) for _ in range(5)))
+
+        assert bodies == [b"[]"] * 5
+        proxy._fetch_upstream.assert_called_once_with(url)
+
+    async def test_cancelled_caller_does_not_strand_other_waiters(self):
+        proxy = CachingProxy()
+        release = asyncio.Event()
+
+        async def blocked_fetch(url):
+            await release.wait()
+            return b"[]"
+
+        proxy._fetch_upstream = AsyncMock(side_effect=blocked_fetch)
+        url = proxy.sensor_data_url("VAR", "ultimashoras", "12")
+        owner = asyncio.create_task(proxy.get(url))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(proxy.get(url))
+        await asyncio.sleep(0)
+        owner.cancel()
+        release.set()
+
+        assert await asyncio.wait_for(waiter, 1) == b"[]"
+        assert owner.cancelled()
+        assert proxy._fetch_upstream.call_count == 1
+        assert await proxy.get(url) == b"[]"  # Stored by the shared request.
+
+    async def test_stop_cancels_inflight_requests(self):
+        proxy = CachingProxy()
+        proxy._fetch_upstream = AsyncMock(side_effect=lambda url: asyncio.sleep(3600))
+        waiter = asyncio.create_task(proxy.get(proxy.station_list_url('a')))
+        await asyncio.sleep(0)
+
+        await proxy.stop()
+
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(waiter, 1)
+
+    async def test_upstream_timeout_is_an_api_error(self):
+        proxy = CachingProxy()
+        context = AsyncMock()
+        context.__aenter__.side_effect = asyncio.TimeoutError()
+        session = MagicMock()
+        session.get.return_value = context
+        await proxy.start(session)
+        try:
+            with pytest.raises(APIError):
+                await proxy._fetch_upstream(proxy.station_list_url('a'))
+        finally:
+            await proxy.stop()
+
+    async def test_poll_refreshes_lists_and_requested_queries(self):
+        proxy = CachingProxy()
+        proxy._fetch_upstream = AsyncMock(return_value=b"[]")
+        data_url = proxy.sensor_data_url("VAR", "ultimashoras", "12")
+        await proxy.get(data_url)
+        proxy._fetch_upstream.reset_mock()
+
+        await proxy.poll_once()
+
+        polled = {c.args[0] for c in proxy._fetch_upstream.call_args_list}
+        assert polled == {proxy.station_list_url(t) for t in "atep"} | {data_url}
+
+    async def test_idle_queries_stop_being_polled(self):
+        proxy = CachingProxy(idle_expiry=0.0)
+        proxy._fetch_upstream = AsyncMock(return_value=b"[]")
+        data_url = proxy.sensor_data_url("VAR", "ultimashoras", "12")
+        await proxy.get(data_url)
+        await asyncio.sleep(0.001)
+        proxy._fetch_upstream.reset_mock()
+
+        await proxy.poll_once()
+
+        assert data_url not in {c.args[0] for c in proxy._fetch_upstream.call_args_list}
+
+    async def test_serves_same_url_shapes_over_http(self):
+        proxy = CachingProxy(poll_interval=3600)
+        payloads = {
+            proxy.station_list_url('a'): json.dumps([{"id": 1}]).encode(),
+            proxy.sensor_data_url("VAR", "ultimashoras", "12"): json.dumps(SAMPLE_RAW).encode(),
+        }
+
+        async def fake_fetch(url):
+            if url not in payloads:
+                raise APIError("not found upstream")
+            return payloads[url]
+
+        proxy._fetch_upstream = AsyncMock(side_effect=fake_fetch)
+        async with TestServer(proxy.make_app()) as server:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(server.make_url(f"{STATION_LIST_PATH}?t=a&id=")) as response:
+                    assert await response.json() == [{"id": 1}]
+                async with session.get(server.make_url(f"{API_PATH}?v=VAR&t=ultimashoras&d=12")) as response:
+                    assert await response.json() == SAMPLE_RAW
+                async with session.get(server.make_url(f"{API_PATH}?v=OTHER&t=ultimashoras&d=12")) as response:
+                    assert response.status == 502
+                async with session.get(server.make_url(f"{STATION_LIST_PATH}?t=x&id=")) as response:
+                    assert response.status == 400
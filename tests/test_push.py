@@ -0,0 +1,153 @@
+import asyncio
+import json
+import pytest
+import aiohttp
+from aiohttp.test_utils import TestServer
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from chj_saih.changes import diff_station_lists
+from chj_saih.push import PushHub, PushServer
+from chj_saih.scheduler import PollJob
+from chj_saih.sensors import FlowSensor
+
+READINGS = [(datetime(2024, 6, 17, 10, 0), 12.5)]
+
+
+async def wait_for_subscribers(hub, count):
+    while len(hub.subscriptions) < count:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+class TestPushHub:
+    async def test_filters_and_drops_oldest_for_slow_clients(self):
+        hub = PushHub(queue_size=2)
+        only_v1 = hub.subscribe(["V1"])
+        risk_only = hub.subscribe([], risk=True)
+
+        for value in (1.0, 2.0, 3.0):
+            hub.publish_readings("V1", [(datetime(2024, 1, 1), value)])
+        hub.publish_readings("V2", READINGS)
+        hub.publish_diff(diff_station_lists(
+            [{"id": 7, "variable": "V1", "estadoInt": 1}], [{"id": 7, "variable": "V1", "estadoInt": 3}]))
+
+        assert only_v1.dropped == 1
+        assert [only_v1.queue.get_nowait()["readings"][0][1] for _ in range(2)] == [2.0, 3.0]
+        assert risk_only.queue.get_nowait() == {"type": "risk", "id": 7, "variable": "V1", "old": 1, "new": 3}
+        assert risk_only.queue.empty()
+
+    async def test_scheduler_callback_publishes_parsed_data(self):
+        hub = PushHub()
+        subscription = hub.subscribe()
+        hub.scheduler_callback(PollJob(FlowSensor("V1", "ultimos5minutales", 1)), {"flow_data": READINGS})
+
+        assert subscription.queue.get_nowait()["readings"] == [["2024-06-17T10:00:00", 12.5]]
+
+    async def test_scheduler_callback_publishes_only_new_readings(self):
+        hub = PushHub()
+        subscription = hub.subscribe()
+        job = PollJob(FlowSensor("V1", "ultimos5minutales", 2))
+        later = (datetime(2024, 6, 17, 10, 5), 13.0)
+        hub.scheduler_callback(job, {"flow_data": READINGS})
+        hub.scheduler_callback(job, {"flow_data": READINGS})
+        hub.scheduler_callback(job, {"flow_data": READINGS + [later]})
+
+        published = [subscription.queue.get_nowait()["readings"] for _ in range(subscription.queue.qsize())]
+        assert published == [[["2024-06-17T10:00:00", 12.5]], [["2024-06-17T10:05:00", 13.0]]]
+
+    async def test_each_cadence_of_a_variable_is_tracked_separately(self):
+        hub = PushHub()
+        subscription = hub.subscribe()
+        hub.scheduler_callback(PollJob(FlowSensor("V1", "ultimos5minutales", 1)), {"flow_data": READINGS})
+        hub.scheduler_callback(PollJob(FlowSensor("V1", "ultimashoras", 1)), {"flow_data": READINGS})
+
+        events = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+        assert [event["period_grouping"] for event in events] == ["ultimos5minutales", "ultimashoras"]
+
+
+@pytest.mark.asyncio
+class TestPushServer:
+    async def test_sse_stream(self):
+        hub = PushHub()
+        async with TestServer(PushServer(hub).make_app()) as server:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(server.make_url("/events?variables=V1")) as response:
+                    assert response.headers["Content-Type"] == "text/event-stream"
+                    await wait_for_subscribers(hub, 1)
+                    hub.publish_readings("V2", READINGS)
+                    hub.publish_readings("V1", READINGS)
+                    assert (await response.content.readline()) == b"event: reading\n"
+                    data = await response.content.readline()
+        event = json.loads(data.decode()[len("data: "):])
+        assert event["variable"] == "V1"
+
+    async def test_websocket_filter_update(self):
+        hub = PushHub()
+        async with TestServer(PushServer(hub).make_app()) as server:
+            async with aiohttp.ClientSession() as session:
+                async with session.ws_connect(server.make_url("/ws?variables=V1")) as ws:
+                    await wait_for_subscribers(hub, 1)
+                    await ws.send_json({"variables": ["V2"], "risk": True})
+                    subscription = next(iter(hub.subscriptions))
+                    while subscription.variables != {"V2"}:
+                        await asyncio.sleep(0.01)
+                    hub.publish_readings("V1", READINGS)
+                    hub.publish_risk_change(7, "V2", 1, 2)
+                    event = await ws.receive_json(timeout=2)
+        assert event["type"] == "risk"
+        await asyncio.sleep(0.05)
+        assert not hub.subscriptions
+
+    async def test_websocket_rejects_non_object_messages(self):
+        hub = PushHub()
+        async with TestServer(PushServer(hub).make_app()) as server:
+            async with aiohttp.ClientSession() as session:
+                async with session.ws_connect(server.make_url("/ws?variables=V1")) as ws:
+                    await wait_for_subscribers(hub, 1)
+                    await ws.send_str("[1, 2]")
+                    not_an_object = await ws.receive_json(timeout=2)
+                    await ws.send_json({"variables": "V2"})
+                    not_a_list = await ws.receive_json(timeout=2)
+                    await ws.send_json({"variables": ["V2", 3]})
+                    not_strings = await ws.receive_json(timeout=2)
+                    hub.publish_readings("V1", READINGS)
+                    event = await ws.receive_json(timeout=2)
+        assert [e["type"] for e in (not_an_object, not_a_list, not_strings)] == ["error"] * 3
+        assert event["variable"] == "V1"
+
+    async def test_cancelled_handler_propagates_and_unsubscribes(self):
+        hub = PushHub()
+        request = MagicMock(query={})
+        with patch("chj_saih.push.web.StreamResponse") as response_class:
+            response_class.return_value.prepare = AsyncMock()
+            task = asyncio.ensure_future(PushServer(hub).handle_events(request))
+            await wait_for_subscribers(hub, 1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert not hub.subscriptions
+
+    async def test_cancelled_websocket_handler_leaves_no_tasks(self):
+        class IdleSocket:
+            closed = False
+
+            async def prepare(self, request):
+                pass
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                await asyncio.Event().wait()
+
+        hub = PushHub()
+        with patch("chj_saih.push.web.WebSocketResponse", return_value=IdleSocket()):
+            task = asyncio.ensure_future(PushServer(hub).handle_ws(MagicMock(query={})))
+            await wait_for_subscribers(hub, 1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        await asyncio.sleep(0)
+        assert [t for t in asyncio.all_tasks() if t is not asyncio.current_task()] == []
+        assert not hub.subscriptions
@@ -0,0 +1,52 @@
+import math
+import random
+import pytest
+from array import array
+
+from chj_saih.columns import SeriesColumns
+from chj_saih.exceptions import InvalidInputError
+from chj_saih.quality import QCConfig, QualityFlag, check_sensor, config_for, flag_counts, quality_flags
+from chj_saih.sensors import FlowSensor, RainGaugeSensor
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+NAN = math.nan
+CONFIG = QCConfig(min_value=0.0, max_value=100.0, spike_threshold=20.0, stuck_count=3, stuck_ignore=(0.0,), max_rate=60.0)
+USE_NUMPY = [False, pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed"))]
+
+
+def series(values, step=3600):
+    return SeriesColumns(array('q', [i * step for i in range(len(values))]), array('d', values))
+
+
+VALUES = [5.0, 5.5, 60.0, 6.0, NAN, 7.0, 7.0, 7.0, 7.0, 0.0, 0.0, 0.0, -1.0, 150.0]
+EXPECTED = [0, 0, QualityFlag.SPIKE, 0, QualityFlag.MISSING] + [QualityFlag.STUCK] * 4 + [0, 0, 0] + [
+    QualityFlag.BELOW_MIN, QualityFlag.ABOVE_MAX | QualityFlag.RATE]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_flags(use_numpy):
+    flags = quality_flags(series(VALUES), CONFIG, use_numpy=use_numpy)
+    assert flags.typecode == 'B'
+    assert list(flags) == [int(f) for f in EXPECTED]
+    assert len(quality_flags(series([]), CONFIG, use_numpy=use_numpy)) == 0
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed")
+def test_numpy_and_python_paths_agree():
+    rng = random.Random(1)
+    values = [rng.choice([NAN, 0.0, 3.0, rng.uniform(-10, 200)]) for _ in range(2000)]
+    columns = series(values, step=300)
+    assert quality_flags(columns, CONFIG, use_numpy=True) == quality_flags(columns, CONFIG, use_numpy=False)
+
+
+def test_sensor_defaults_and_counts():
+    assert config_for(RainGaugeSensor("P", "ultimashoras", 1)).min_value == 0.0
+    flags = check_sensor(FlowSensor("A", "ultimashoras", 3), series([-2.0, 3.0, NAN]))
+    assert flag_counts(flags) == {"MISSING": 1, "BELOW_MIN": 1}
+    with pytest.raises(InvalidInputError):
+        quality_flags(series([1.0]), QCConfig(stuck_count=1))
@@ -0,0 +1,72 @@
+import math
+import pytest
+from array import array
+
+from chj_saih.columns import SeriesColumns
+from chj_saih.exceptions import InvalidInputError
+from chj_saih.resample import Gap, align_to_grid, detect_gaps, resample, resolve_cadence
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+NAN = math.nan
+H = 3600
+USE_NUMPY = [False, pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason="numpy not installed"))]
+
+# Hourly series missing 02:00 and 03:00, with a NaN at 05:00.
+SERIES = SeriesColumns(array('q', [0, H, 4 * H, 5 * H, 6 * H]), array('d', [1.0, 2.0, 5.0, NAN, 7.0]))
+
+
+def same(a, b):
+    return len(a) == len(b) and all((math.isnan(x) and math.isnan(y)) or x == pytest.approx(y) for x, y in zip(a, b))
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+class TestResample:
+    def test_fill_methods(self, use_numpy):
+        filled, report = resample(SERIES, "ultimashoras", "nan", use_numpy=use_numpy)
+        assert list(filled.timestamps) == [k * H for k in range(7)]
+        assert same(filled.values, [1, 2, NAN, NAN, 5, NAN, 7])
+        assert same(resample(SERIES, H, "ffill", use_numpy=use_numpy)[0].values, [1, 2, 2, 2, 5, 5, 7])
+        assert same(resample(SERIES, H, "linear", use_numpy=use_numpy)[0].values, [1, 2, 3, 4, 5, 6, 7])
+        assert same(resample(SERIES, H, "linear", max_gap=1, use_numpy=use_numpy)[0].values, [1, 2, NAN, NAN, 5, 6, 7])
+        assert same(resample(SERIES, H, "ffill", max_gap=1, use_numpy=use_numpy)[0].values, [1, 2, NAN, NAN, 5, 5, 7])
+
+        assert (report.expected, report.present, report.missing) == (7, 4, 3)
+        assert report.gaps == [Gap(2 * H, 3 * H, 2), Gap(5 * H, 5 * H, 1)]
+        assert report.longest_gap == 2
+
+    def test_ffill_leaves_gaps_longer_than_max_gap_unfilled(self, use_numpy):
+        gap_of_3 = SeriesColumns(array('q', [0, 4 * H, 5 * H]), array('d', [1.0, 5.0, 6.0]))
+
+        def values(max_gap, end=None):
+            return resample(gap_of_3, H, "ffill", end=end, max_gap=max_gap, use_numpy=use_numpy)[0].values
+
+        assert same(values(3), [1, 1, 1, 1, 5, 6])
+        assert same(values(2), [1, NAN, NAN, NAN, 5, 6])
+        assert same(values(2, end=7 * H), [1, NAN, NAN, NAN, 5, 6, 6, 6])
+        assert same(values(1, end=7 * H), [1, NAN, NAN, NAN, 5, 6, NAN, NAN])
+
+    def test_shared_grid(self, use_numpy):
+        other = SeriesColumns(array('q', [4 * H + 1800, 8 * H]), array('d', [11.0, 18.0]))
+        grid, values, reports = align_to_grid({"A": SERIES, "B": other}, H, "linear", use_numpy=use_numpy)
+        assert list(grid) == [k * H for k in range(9)]
+        assert same(values["B"], [NAN, NAN, NAN, NAN, NAN, 12.0, 14.0, 16.0, 18.0])
+        assert reports["A"].gaps[-1] == Gap(7 * H, 8 * H, 2)
+        assert reports["B"].present == 1 and reports["B"].gaps[0] == Gap(0, 7 * H, 8)
+
+    def test_empty(self, use_numpy):
+        filled, report = resample(SeriesColumns(), 300, use_numpy=use_numpy)
+        assert len(filled) == 0 and report.coverage == 1.0
+
+
+def test_detect_gaps_and_validation():
+    assert detect_gaps(SERIES, "ultimashoras").missing == 3
+    assert resolve_cadence("ultimos5minutales") == 300
+    with pytest.raises(InvalidInputError):
+        resolve_cadence("cada_rato")
+    with pytest.raises(InvalidInputError):
+        resample(SERIES, H, "cubic")
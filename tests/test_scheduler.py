@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.exceptions import CHJSAIHError
+from chj_saih.scheduler import AdaptivePollScheduler
+from chj_saih.sensors import FlowSensor, RainGaugeSensor
+
+SAMPLE_RAW = [{}, [["17/06/2024 10:00", 1.0]], {}]
+
+
+class TestAdaptivePollScheduler:
+    def test_interval_depends_on_cadence_and_risk(self):
+        assert AdaptivePollScheduler.interval_for("ultimos5minutales", 3) == 300
+        assert AdaptivePollScheduler.interval_for("ultimos5minutales", 1) == 900
+        assert AdaptivePollScheduler.interval_for("ultimashoras", 2) == 3600
+        assert AdaptivePollScheduler.interval_for("ultimomes", 0) == 6 * 86400
+
+    def test_next_due_is_aligned_after_upstream_update(self):
+        scheduler = AdaptivePollScheduler(session=None, callback=lambda job, result: None, settle_delay=30)
+        assert scheduler.next_due(300, 1000.0) == 1230.0
+        assert scheduler.next_due(300, 1230.0) == 1530.0
+        assert scheduler.next_due(300, 1229.0) == 1230.0
+
+    def test_daily_cadence_is_aligned_to_madrid_midnight(self):
+        scheduler = AdaptivePollScheduler(session=None, callback=lambda job, result: None, settle_delay=60)
+        # 2024-06-17 12:00 UTC: next local midnight is 22:00 UTC (CEST); in January, 23:00 UTC (CET).
+        assert scheduler.next_due(86400, 1718625600.0) == 1718661600 + 60
+        assert scheduler.next_due(86400, 1705320000.0) == 1705359600 + 60
+
+    def test_update_risk_promotes_rising_stations(self, fake_clock):
+        clock = fake_clock
+        clock.now = 10_000.0
+        scheduler = AdaptivePollScheduler(session=None, callback=lambda job, result: None, clock=clock)
+        rising = scheduler.add(FlowSensor("V1", "ultimos5minutales", 10), risk=1, poll_now=False)
+        falling = scheduler.add(FlowSensor("V2", "ultimos5minutales", 10), risk=3, poll_now=False)
+        falling_due = falling.due
+
+        promoted = scheduler.update_risk([
+            {"variable": "V1", "estadoInt": 3},
+            {"variable": "V2", "estadoInt": 1},
+        ])
+
+        assert promoted == [rising]
+        assert rising.due == clock.now and rising.interval == 300
+        assert falling.due == falling_due and falling.interval == 900
+
+
+@pytest.mark.asyncio
+class TestAdaptivePollSchedulerRun:
+    @patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_red_stations_are_polled_first(self, mock_fetch):
+        mock_fetch.return_value = SAMPLE_RAW
+        order = []
+        done = asyncio.Event()
+
+        def callback(job, result):
+            order.append(job.sensor.variable)
+            if len(order) == 3:
+                done.set()
+
+        scheduler = AdaptivePollScheduler(session=None, callback=callback,
+                                          max_requests_per_minute=6000, max_concurrency=1)
+        scheduler.add(RainGaugeSensor("GREEN", "ultimos5minutales", 5), risk=1)
+        scheduler.add(RainGaugeSensor("YELLOW", "ultimos5minutales", 5), risk=2)
+        scheduler.add(RainGaugeSensor("RED", "ultimos5minutales", 5), risk=3)
+        scheduler.start()
+        await asyncio.wait_for(done.wait(), 2)
+        await scheduler.stop()
+
+        assert order == ["RED", "YELLOW", "GREEN"]
+        assert all(job.due > job.last_polled for job in scheduler.jobs)
+
+    async def test_unexpected_errors_are_reported_and_rescheduled(self, caplog, fake_clock):
+        clock = fake_clock
+        clock.now = 10_000.0
+        results = []
+
+        def callback(job, result):
+            results.append(result)
+            raise RuntimeError("callback bug")
+
+        scheduler = AdaptivePollScheduler(session=None, callback=callback, clock=clock)
+        job = scheduler.add(FlowSensor("V1", "ultimos5minutales", 5))
+        semaphore = asyncio.Semaphore(1)
+        await semaphore.acquire()
+        with patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock, side_effect=KeyError("boom")):
+            await scheduler._poll(job, semaphore)
+
+        assert isinstance(results[0], CHJSAIHError) and "KeyError" in str(results[0])
+        assert job.last_polled == clock.now and job.due == scheduler.next_due(job.interval, clock.now)
+        assert not semaphore.locked()
+        assert "callback failed" in caplog.text
@@ -0,0 +1,68 @@
+import math
+import pytest
+from array import array
+from datetime import datetime, timedelta
+
+from chj_saih.columns import SeriesColumns
+from chj_saih.series import SensorSeries
+
+T0 = datetime(2024, 6, 17, 10, 0)
+
+
+def window(start_minute, values):
+    return [(T0 + timedelta(minutes=start_minute + 5 * k), v) for k, v in enumerate(values)]
+
+
+class TestSensorSeries:
+    def test_overlapping_windows_are_deduplicated(self):
+        series = SensorSeries()
+        assert series.merge(window(0, [1.0, 2.0, 3.0])) == 3
+        assert series.merge(window(5, [2.0, 3.0, 4.0])) == 1
+
+        assert series.to_list() == window(0, [1.0, 2.0, 3.0, 4.0])
+
+    def test_revised_values_last_write_wins(self):
+        series = SensorSeries()
+        series.merge(window(0, [1.0, 2.0, 3.0]))
+        series.merge(window(10, [3.5, None]))
+
+        assert series.to_list() == window(0, [1.0, 2.0, 3.5, None])
+
+    def test_window_filling_a_gap_and_older_samples(self):
+        series = SensorSeries()
+        series.merge(window(0, [1.0]))
+        series.merge(window(20, [5.0]))
+        t0 = int((T0 - datetime(1970, 1, 1)).total_seconds())
+        added = series.merge(SeriesColumns(array('q', [t0 + 600, t0 - 300]), array('d', [3.0, 0.0])))
+
+        assert added == 2
+        assert [v for _, v in series.to_list()] == [0.0, 1.0, 3.0, 5.0]
+
+    def test_max_length_keeps_newest(self):
+        series = SensorSeries(max_length=3)
+        for start in range(0, 50, 5):
+            series.merge(window(start, [float(start)]))
+
+        assert len(series) == 3
+        assert [v for _, v in series.to_list()] == [35.0, 40.0, 45.0]
+        assert series.latest == (T0 + timedelta(minutes=45), 45.0)
+
+    def test_max_age_drops_old_samples(self):
+        series = SensorSeries(max_age=600)
+        series.merge(window(0, [1.0, 2.0, 3.0, 4.0]))
+
+        assert [v for _, v in series.to_list()] == [2.0, 3.0, 4.0]
+
+    def test_empty_window(self):
+        series = SensorSeries()
+        assert series.merge([]) == 0
+        assert series.latest is None
+
+    def test_nan_values_round_trip_as_none(self):
+        series = SensorSeries()
+        series.merge(SeriesColumns(array('q', [0]), array('d', [math.nan])))
+        assert series.to_list()[0][1] is None
+
+    def test_rejects_non_positive_max_length(self):
+        with pytest.raises(ValueError):
+            SensorSeries(max_length=0)
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.exceptions import APIError
+from chj_saih.sensors import FlowSensor, RainGaugeSensor, iter_sensors_data
+
+
+def make_raw(count, start_hour=0):
+    return [{}, [[f"01/01/2024 {start_hour + i // 60:02d}:{i % 60:02d}", float(i)] for i in range(count)], {}]
+
+
+@pytest.mark.asyncio
+class TestSensorIterData:
+    @patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_yields_readings_and_chunks(self, mock_fetch):
+        mock_fetch.return_value = make_raw(5)
+        sensor = FlowSensor("V1", "ultimashoras", 5)
+
+        readings = [reading async for reading in sensor.iter_data(None)]
+        chunks = [chunk async for chunk in sensor.iter_data(None, chunk_size=2)]
+
+        assert readings == sensor.parse_data(make_raw(5))["flow_data"]
+        assert [len(c) for c in chunks] == [2, 2, 1]
+        assert readings[0] == (datetime(2024, 1, 1, 0, 0), 0.0)
+
+
+@pytest.mark.asyncio
+class TestIterSensorsData:
+    async def test_interleaves_in_completion_order_and_reports_errors(self):
+        delays = {"SLOW": 0.05, "FAST": 0.0}
+
+        async def fake_fetch(variable, period_grouping, num_values, session):
+            if variable == "BAD":
+                raise APIError("boom")
+            await asyncio.sleep(delays[variable])
+            return make_raw(3)
+
+        sensors = [FlowSensor("SLOW", "ultimashoras", 3), RainGaugeSensor("FAST", "ultimashoras", 3),
+                   FlowSensor("BAD", "ultimashoras", 3)]
+        with patch('chj_saih.sensors.fetch_sensor_data', side_effect=fake_fetch):
+            results = [(sensor.variable, chunk) async for sensor, chunk in iter_sensors_data(sensors, None, chunk_size=2)]
+
+        variables = [variable for variable, _ in results]
+        assert variables.index("FAST") < variables.index("SLOW")
+        assert isinstance(dict(results)["BAD"], APIError)
+        assert sum(len(chunk) for variable, chunk in results if variable == "SLOW") == 3
+
+    async def test_bounded_prefetch(self):
+        fetched = []
+
+        async def fake_fetch(variable, period_grouping, num_values, session):
+            fetched.append(variable)
+            return make_raw(1)
+
+        sensors = [FlowSensor(f"V{i}", "ultimashoras", 1) for i in range(10)]
+        with patch('chj_saih.sensors.fetch_sensor_data', side_effect=fake_fetch):
+            stream = iter_sensors_data(sensors, None, max_concurrency=2)
+            await stream.__anext__()
+            await asyncio.sleep(0.01)
+            assert len(fetched) <= 3
+            await stream.aclose()
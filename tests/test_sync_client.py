@@ -0,0 +1,63 @@
+import threading
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.exceptions import APIError, CHJSAIHError
+from chj_saih.sensors import FlowSensor
+from chj_saih.sync_client import SyncCHJSAIHClient
+
+SAMPLE_RAW = [
+    {"paramVisual": [{"nombre": "ultimos5minutales"}]},
+    [["17/06/2024 10:05", 10.5], ["17/06/2024 10:00", 10.0]],
+    {}
+]
+
+
+class TestSyncClient:
+    @patch('chj_saih.sync_client.fetch_station_list', new_callable=AsyncMock)
+    def test_fetch_station_list_reuses_session(self, mock_fsl):
+        mock_fsl.return_value = [{"id": "S01", "nombre": "Station A"}]
+        with SyncCHJSAIHClient() as client:
+            first = client.fetch_station_list('a')
+            client.fetch_station_list('p')
+
+        assert first == [{"id": "S01", "nombre": "Station A"}]
+        sessions = {c.args[1] for c in mock_fsl.call_args_list}
+        assert len(sessions) == 1
+
+    @patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock)
+    def test_get_data_runs_on_background_thread(self, mock_fetch):
+        threads = []
+
+        async def side_effect(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return SAMPLE_RAW
+
+        mock_fetch.side_effect = side_effect
+        with SyncCHJSAIHClient() as client:
+            data = client.get_data(FlowSensor("VAR", "ultimos5minutales", 2))
+
+        assert [v for _, v in data["flow_data"]] == [10.0, 10.5]
+        assert threads[0] is not threading.current_thread()
+
+    @patch('chj_saih.sensors.fetch_sensor_data', new_callable=AsyncMock)
+    def test_get_data_many_keeps_errors_per_sensor(self, mock_fetch):
+        async def side_effect(variable, *args, **kwargs):
+            if variable == "BAD":
+                raise APIError("boom")
+            return SAMPLE_RAW
+
+        mock_fetch.side_effect = side_effect
+        sensors = [FlowSensor("A", "ultimos5minutales", 2), FlowSensor("BAD", "ultimos5minutales", 2)]
+        with SyncCHJSAIHClient() as client:
+            results = client.get_data_many(sensors, max_concurrency=1)
+
+        assert "flow_data" in results[0]
+        assert isinstance(results[1], APIError)
+
+    def test_closed_client_raises(self):
+        client = SyncCHJSAIHClient()
+        client.close()
+        client.close()
+        with pytest.raises(CHJSAIHError):
+            client.fetch_all_stations()
@@ -0,0 +1,80 @@
+import pytest
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from chj_saih.columns import SeriesColumns, EPOCH
+from chj_saih.exceptions import DataParseError, InvalidInputError
+from chj_saih.sensors import SensorDataParser
+from chj_saih.timezone import MADRID, columns_to_utc, local_to_utc_datetime
+
+try:
+    from zoneinfo import ZoneInfo
+    ZoneInfo("Europe/Madrid")
+    HAS_ZONEINFO = True
+except Exception:
+    HAS_ZONEINFO = False
+
+
+def epoch(*args):
+    return int((datetime(*args) - EPOCH).total_seconds())
+
+
+local = utc = epoch  # Naming the side of the conversion keeps the assertions readable.
+
+
+def test_regular_offsets_and_classification():
+    assert MADRID.local_to_utc(local(2024, 1, 15, 12, 0)) == utc(2024, 1, 15, 11, 0)
+    assert MADRID.local_to_utc(local(2024, 7, 15, 12, 0)) == utc(2024, 7, 15, 10, 0)
+    assert MADRID.classify(local(2024, 3, 31, 2, 30)) == "nonexistent"
+    assert MADRID.classify(local(2024, 10, 27, 2, 30)) == "ambiguous"
+    assert MADRID.classify(local(2024, 10, 27, 3, 0)) == "standard"
+    assert MADRID.utc_to_local(utc(2024, 7, 15, 10, 0)) == local(2024, 7, 15, 12, 0)
+
+
+def test_switch_policies():
+    gap = local(2024, 3, 31, 2, 30)
+    assert MADRID.local_to_utc(gap) == utc(2024, 3, 31, 1, 30)
+    assert MADRID.local_to_utc(gap, nonexistent="shift_backward") == utc(2024, 3, 31, 0, 30)
+    overlap = local(2024, 10, 27, 2, 30)
+    assert MADRID.local_to_utc(overlap) == utc(2024, 10, 27, 0, 30)
+    assert MADRID.local_to_utc(overlap, ambiguous="latest") == utc(2024, 10, 27, 1, 30)
+    with pytest.raises(DataParseError):
+        MADRID.local_to_utc(gap, nonexistent="raise")
+    with pytest.raises(DataParseError):
+        MADRID.local_to_utc(overlap, ambiguous="raise")
+    with pytest.raises(InvalidInputError):
+        MADRID.local_to_utc(overlap, ambiguous="guess")
+
+
+@pytest.mark.skipif(not HAS_ZONEINFO, reason="Europe/Madrid zoneinfo not available")
+def test_matches_zoneinfo():
+    madrid = ZoneInfo("Europe/Madrid")
+    start = local(2000, 1, 1)
+    hours = array('q', range(start, start + 25 * 365 * 86400, 3 * 3600 + 17 * 60))
+    converted = MADRID.local_to_utc_many(hours, ambiguous="earliest")
+    for t, u in zip(hours, converted):
+        dt = (EPOCH + timedelta(seconds=t)).replace(tzinfo=madrid)
+        if MADRID.classify(t) == "nonexistent":
+            continue
+        assert int(dt.timestamp()) == u
+
+
+def test_parser_utc_output_infers_repeated_hour():
+    raw = [{}, [["27/10/2024 01:00", 1], ["27/10/2024 02:00", 2], ["27/10/2024 02:00", 3], ["27/10/2024 03:00", 4]], {}]
+    parser = SensorDataParser(raw)
+    data = parser.extract_data_utc("ultimashoras")
+    assert data == [
+        (datetime(2024, 10, 26, 23, 0, tzinfo=timezone.utc), 1.0),
+        (datetime(2024, 10, 27, 0, 0, tzinfo=timezone.utc), 2.0),
+        (datetime(2024, 10, 27, 1, 0, tzinfo=timezone.utc), 3.0),
+        (datetime(2024, 10, 27, 2, 0, tzinfo=timezone.utc), 4.0),
+    ]
+    columns = parser.extract_columns_utc("ultimashoras")
+    assert list(columns.timestamps) == [int(dt.timestamp()) for dt, _ in data]
+    assert list(columns.values) == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_scalar_and_columns_helpers():
+    assert local_to_utc_datetime(datetime(2024, 7, 1, 12)) == datetime(2024, 7, 1, 10, tzinfo=timezone.utc)
+    series = SeriesColumns(array('q', [local(2024, 1, 1)]), array('d', [5.0]))
+    assert list(columns_to_utc(series).timestamps) == [utc(2023, 12, 31, 23, 0)]
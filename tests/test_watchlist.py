@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from chj_saih.exceptions import APIError, InvalidInputError
+from chj_saih.scheduler import AdaptivePollScheduler
+from chj_saih.sensors import FlowSensor, RainGaugeSensor
+from chj_saih.watchlist import WatchlistRegistry
+
+
+def make_raw(num_values):
+    values = [[f"01/06/2024 {hour:02d}:00", float(hour)] for hour in range(24)][-num_values:]
+    return [{"meta": 1}, values, {"time": 1}]
+
+
+def fake_fetch(variable, period_grouping, num_values, session):
+    return make_raw(num_values)
+
+
+class TestWatchPlan:
+    def test_plan_follows_widest_window(self):
+        registry = WatchlistRegistry()
+        a = registry.subscribe(FlowSensor("A01", "ultimashoras", 6))
+        b = registry.subscribe(FlowSensor("A01", "ultimashoras", 24))
+        registry.subscribe(RainGaugeSensor("P01", "ultimashoras", 12))
+        registry.subscribe(FlowSensor("A01", "ultimodia", 3))
+        assert registry.plan == {("A01", "ultimashoras"): 24, ("P01", "ultimashoras"): 12, ("A01", "ultimodia"): 3}
+
+        registry.unsubscribe(b)
+        assert registry.plan[("A01", "ultimashoras")] == 6
+        registry.unsubscribe(a)
+        registry.unsubscribe(a)
+        assert ("A01", "ultimashoras") not in registry.plan
+        with pytest.raises(InvalidInputError):
+            registry.subscribe(FlowSensor("A01", "ultimashoras", 0))
+
+
+@pytest.mark.asyncio
+class TestWatchlistRegistry:
+    @patch('chj_saih.watchlist.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_refresh_fetches_once_and_slices(self, mock_fetch):
+        mock_fetch.side_effect = fake_fetch
+        registry = WatchlistRegistry()
+        received = []
+
+        async def on_data(subscription, result):
+            received.append((subscription.sensor.num_values, result))
+
+        narrow = registry.subscribe(FlowSensor("A01", "ultimashoras", 3), on_data)
+        wide = registry.subscribe(FlowSensor("A01", "ultimashoras", 24), lambda s, r: None)
+        rain = registry.subscribe(RainGaugeSensor("A01", "ultimashoras", 5))
+        await registry.refresh(session="session")
+
+        mock_fetch.assert_awaited_once_with("A01", "ultimashoras", 24, "session")
+        assert registry.fetches == 1
+        assert narrow.latest == FlowSensor("A01", "ultimashoras", 3).parse_data(make_raw(3))
+        assert [value for _, value in narrow.latest["flow_data"]] == [21.0, 22.0, 23.0]
+        assert len(wide.latest["flow_data"]) == 24
+        assert len(rain.latest["rainfall_data"]) == 5
+        assert received == [(3, narrow.latest)]
+
+    @patch('chj_saih.watchlist.fetch_sensor_data', new_callable=AsyncMock)
+    async def test_errors_reach_every_subscriber(self, mock_fetch):
+        mock_fetch.side_effect = APIError("down")
+        registry = WatchlistRegistry()
+        first = registry.subscribe(FlowSensor("A01", "ultimashoras", 3))
+        second = registry.subscribe(FlowSensor("A01", "ultimashoras", 6))
+        await registry.refresh(session=None)
+        assert isinstance(first.latest, APIError) and second.latest is first.latest
+
+    async def test_scheduler_jobs_track_plan(self):
+        registry = WatchlistRegistry()
+        scheduler = AdaptivePollScheduler(session=None, callback=registry.scheduler_callback, clock=lambda: 1000.0)
+        narrow = registry.subscribe(FlowSensor("A01", "ultimashoras", 3))
+        registry.attach(scheduler)
+        assert [(job.sensor.variable, job.sensor.num_values) for job in scheduler.jobs] == [("A01", 3)]
+
+        wide = registry.subscribe(FlowSensor("A01", "ultimashoras", 12))
+        assert scheduler.jobs[0].sensor.num_values == 12
+        assert scheduler.jobs[0].due == 1000.0
+
+        job = scheduler.jobs[0]
+        await registry.scheduler_callback(job, job.sensor.parse_data(make_raw(12)))
+        assert len(narrow.latest["flow_data"]) == 3
+        assert len(wide.latest["flow_data"]) == 12
+        assert registry.fetches == 1
+
+        registry.unsubscribe(wide)
+        assert scheduler.jobs[0].sensor.num_values == 3
+        registry.unsubscribe(narrow)
+        assert scheduler.jobs == []